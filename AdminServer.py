@@ -0,0 +1,135 @@
+from asyncio import start_unix_server, Server, StreamReader, StreamWriter
+from typing import Callable
+import json
+import math
+import os
+
+
+class AdminServer:
+    """
+    The AdminServer class is the local control plane of a running game server. It listens on a Unix socket, so only
+    users with access to the socket file can reach it, and answers one JSON object per line for every command line:
+        - rooms                     List every room with its players, free seats, spectators and scores.
+        - dump <room>               Snapshot of a room's board: the rendered board, player positions and scores.
+        - kick <room> <player>      Close the connection of a player, freeing the seat.
+        - queue                     Matchmaking metrics: queue depth, waits and the cost of a match decision.
+        - latency                   Round trip time and jitter of every player, by room, from their pings.
+        - drain                     Stop accepting players, let the matches in progress finish, then exit.
+    Every command is answered from the game's room index; only dump reads a board, the one it was asked for.
+    """
+    def __init__(self, game):
+        """
+        Initialize an AdminServer for a game.
+        :param game: The Game to control.
+        """
+        self.game = game
+        self.commands = {
+            "rooms": self.list_rooms,
+            "dump": self.dump_room,
+            "kick": self.kick_player,
+            "queue": self.get_queue_metrics,
+            "latency": self.get_latency,
+            "drain": self.drain,
+        }
+
+    async def start(self, path: str) -> Server:
+        """
+        Asynchronously starts listening on a Unix socket, replacing a stale socket file left by a previous run.
+        :param path: The path of the socket file.
+        :return: The listening Server.
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        return await start_unix_server(self.handle, path)
+
+    def get_room(self, room_id: str):
+        """
+        Retrieves a room from the game's index.
+        :param room_id: The id of the room, as sent by the admin.
+        :return: The Room.
+        :raises ValueError: If the id is not a number or there is no such room.
+        """
+        room = self.game.rooms.get(int(room_id))
+        if room is None:
+            raise ValueError(f"Room {room_id} not found")
+        return room
+
+    async def list_rooms(self) -> dict:
+        """
+        :return: The summary of every room.
+        """
+        return {"rooms": [room.get_summary() for room in self.game.rooms.values()], "draining": self.game.draining}
+
+    async def dump_room(self, room_id: str) -> dict:
+        """
+        :param room_id: The id of the room.
+        :return: The room's summary, its rendered board (the room's cached render) and the position of every player.
+        """
+        room = self.get_room(room_id)
+        summary = room.get_summary()
+        summary["board"] = room.get_board_payload()[2].decode()
+        summary["positions"] = {player.get_name(): player.get_coordinates() for player in room.board.players}
+        return summary
+
+    async def kick_player(self, room_id: str, player: str) -> dict:
+        """
+        :param room_id: The id of the room.
+        :param player: The name of the player.
+        :return: Whether a connection was playing as the player and was closed.
+        """
+        writer = self.get_room(room_id).connections.get(player)
+        if writer is not None:
+            writer.close()
+        return {"kicked": writer is not None}
+
+    async def get_queue_metrics(self) -> dict:
+        """
+        :return: The matchmaker's metrics.
+        :raises ValueError: If matchmaking is not enabled.
+        """
+        if self.game.matchmaker is None:
+            raise ValueError("Matchmaking is not enabled")
+        return self.game.matchmaker.get_metrics()
+
+    async def get_latency(self) -> dict:
+        """
+        :return: The round trip time estimate of every seated connection, by room. In tick mode each room also reports
+                 its input delay: the number of ticks a command from its slowest player may spend on the way, half a
+                 round trip plus twice the jitter. Moves from faster players are held back by the whole ticks they
+                 are ahead of it, so that moves sent at the same time join the same tick.
+        """
+        rooms = []
+        for room in self.game.rooms.values():
+            summary = {"room": room.room_id,
+                       "players": {player: latency.get_summary() for player, latency in room.latency.items()}}
+            if self.game.config.tick_interval:
+                delay = max((latency.get_delay() for latency in room.latency.values()), default=0.0)
+                summary["input_delay_ticks"] = math.ceil(delay / self.game.config.tick_interval)
+            rooms.append(summary)
+        return {"rooms": rooms}
+
+    async def drain(self) -> dict:
+        """
+        :return: The number of players the server is still waiting for.
+        """
+        await self.game.drain()
+        return {"draining": True, "connections": self.game.num_connections}
+
+    async def handle(self, reader: StreamReader, writer: StreamWriter) -> None:
+        """
+        Asynchronously answers the commands of one admin connection until it closes.
+        :param reader: The StreamReader used for reading commands from the admin.
+        :param writer: The StreamWriter used for sending answers to the admin.
+        """
+        while line := await reader.readline():
+            name, *arguments = line.decode().split() or [""]
+            command: Callable = self.commands.get(name)
+            try:
+                if command is None:
+                    raise ValueError(f"Unknown command, expected one of {', '.join(self.commands)}")
+                answer = await command(*arguments)
+            except (TypeError, ValueError) as e:
+                answer = {"error": str(e)}
+            writer.write(json.dumps(answer).encode() + b'\n')
+            await writer.drain()
+        writer.close()
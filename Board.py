@@ -1,27 +1,59 @@
+from typing import Callable
 import constants
-import random
+import time
+from Journal import Journal
+from Occupancy import Occupancy
 from Tile import Tile
 from Player import Player
+from Terrain import Terrain
 from Treasure import Treasure
+from treasure_generation import TreasureGenerator
+
+DEFAULT_GENERATOR = TreasureGenerator()
+
 
 class Board:
     """
     The Board class represents the game board for a treasure-collecting game. It creates a game-board
     of Tile objects and provides methods for players to move on the board and collect Treasure.
+    The board keeps the time the match started, the number of moves made and a version number that changes whenever a
+    player joins or moves. Collect observers are called whenever a player collects a treasure.
     """
-    def __init__(self, length: int, num_treasures: int, min_treasure: int, max_treasure: int):
+    def __init__(self, length: int, num_treasures: int, min_treasure: int, max_treasure: int,
+                 generator: TreasureGenerator = None, terrain: Terrain = None):
         """
-        Board is initialized as a 2D Array of Tile Objects. Treasures are randomly placed on the tiles
+        Board is initialized as a 2D Array of Tile Objects. Treasures are placed on the tiles by the treasure generator
         and the board starts out with 0 players. Boatd is validated via the validate_board method.
+        :param length: The length of a side of the board.
+        :param num_treasures: The number of treasures to place. Fewer are placed if walls leave fewer free tiles.
+        :param min_treasure: The smallest treasure value.
+        :param max_treasure: The largest treasure value.
+        :param generator: The TreasureGenerator placing the treasure. Defaults to uniform positions and values.
+        :param terrain: The Terrain of the board. Defaults to open ground everywhere.
+        :raises ValueError: If the settings fail validate_board or the terrain does not have the length of the board.
         """
         self.length = length
         self.num_treasures = num_treasures
         self.min_treasure = min_treasure
         self.max_treasure = max_treasure
         self.validate_board()
+        if terrain is not None and terrain.length != length:
+            raise ValueError("Terrain must have the length of the board")
+        self.terrain = terrain
+        self.wading = {}
+        self.generator = generator if generator is not None else DEFAULT_GENERATOR
+        if terrain is None:
+            self.occupancy = Occupancy(length)
+        else:
+            self.occupancy = Occupancy(length, terrain.walls, terrain.get_masks())
         self.game_board = self.create_game_board()
         self.populate_board_with_treasure()
         self.players = []
+        self.started_at = time.monotonic()
+        self.num_moves = 0
+        self.version = 0
+        self.collect_observers = []
+        self.journal = None
 
     def validate_board(self) -> None:
         """
@@ -46,27 +78,36 @@ class Board:
         Creates a 2D List of Tiles to be used as the game-board
         :return: A 2D List of Tiles representing the game-board
         """
-        return [[Tile(y_pos, x_pos) for x_pos in range(self.length)] for y_pos in range(self.length)]
+        if self.terrain is None:
+            return [[Tile(y_pos, x_pos, occupancy=self.occupancy) for x_pos in range(self.length)]
+                    for y_pos in range(self.length)]
+        return [[Tile(y_pos, x_pos, self.terrain.get_description(y_pos, x_pos), self.occupancy)
+                 for x_pos in range(self.length)] for y_pos in range(self.length)]
 
     def populate_board_with_treasure(self) -> None:
         """
-        Inserts num_treasures amount of treasure randomly across the board.
+        Inserts num_treasures amount of treasure across the board, with positions and values sampled in bulk by the
+        board's treasure generator.
         Treasure Value is between min_treasure and max_treasure (inclusive)
         """
-        for _ in range(self.num_treasures):
-            tile = self.find_empty_tile()
-            tile.add_treasure(Treasure(random.randint(self.min_treasure, self.max_treasure)))
+        self.num_treasures = self.generator.populate(self, self.num_treasures)
 
     def find_empty_tile(self) -> Tile:
         """
-        Retrieves a Tile that is free of both treasure and player
+        Retrieves a Tile that is free of both treasure and player. Tiles are drawn from the treasure generator's random
+        number generator, so a seeded generator also places the players the same way every time. Whether a tile is
+        empty is read from the occupancy bitsets.
         :return: The Tile Object free of treasure and player.
+        :raises ValueError: If no tile is empty.
         """
+        empty = self.occupancy.get_empty()
+        if not empty:
+            raise ValueError("Error: No empty tile")
+        randint = self.generator.random.randint
         while True:
-            y_pos, x_pos = random.randint(0, self.length - 1), random.randint(0, self.length - 1)
-            tile = self.game_board[y_pos][x_pos]
-            if tile.get_treasure() is None and tile.get_player() is None:
-                return tile
+            y_pos, x_pos = randint(0, self.length - 1), randint(0, self.length - 1)
+            if empty >> (y_pos * self.length + x_pos) & 1:
+                return self.game_board[y_pos][x_pos]
 
     def add_player_to_game_board(self, player_name: str) -> None:
         """
@@ -78,6 +119,9 @@ class Board:
 
         self.players.append(new_player)
         tile.add_player(new_player)
+        self.version += 1
+        if self.journal is not None:
+            self.journal.append(Journal.JOIN, player_name, *tile.get_coordinates(), new_player.get_score())
 
     def find_player_by_name(self, player_name: str) -> Player:
         """
@@ -99,30 +143,75 @@ class Board:
         :param direction: The direction that the player will move
         """
         if self.is_valid_movement(player_name, direction):
-            dst_tile = self.get_tile_after_player_move(player_name, direction)
-            self.move_player_to_tile(player_name, dst_tile)
-            self.collect_treasure_from_tile(player_name, dst_tile)
+            self.move_player(self.find_player_by_name(player_name), direction)
+
+    def move_player(self, player: Player, direction: str) -> bool:
+        """
+        Moves a player to a new Tile and collect Treasure, given the Player itself rather than its name. Used by
+        callers that already hold the Player, such as a connection bound to its player, so no lookup by name is made.
+        A move off the board, into a wall, onto another player or in an invalid direction is ignored. The first move
+        into mud only starts wading into it; the player enters the mud with the next move in the same direction.
+        :param player: The Player to be moved.
+        :param direction: The direction that the player will move.
+        :return: True if the player moved, False otherwise.
+        """
+        row, col = player.get_coordinates()
+        cell = row * self.length + col
+        if not self.occupancy.can_move(cell, direction):
+            return False
+        dst_cell = self.occupancy.get_step(cell, direction)
+        if not self.wade(player.get_name(), dst_cell):
+            return False
+        dst_tile = self.game_board[dst_cell // self.length][dst_cell % self.length]
+        player.set_coordinates(dst_tile.get_coordinates())
+        dst_tile.add_player(player)
+        self.game_board[row][col].remove_player()
+        if self.journal is not None:
+            self.journal.append(Journal.MOVE, player.get_name(), *dst_tile.get_coordinates())
+        self.collect_treasure(player, dst_tile)
+        self.num_moves += 1
+        self.version += 1
+        return True
+
+    def wade(self, player_name: str, dst_cell: int) -> bool:
+        """
+        Checks whether a player moving to a cell gets there with this move. Mud takes two moves in a row towards it:
+        the first one is remembered and the second one enters the mud.
+        :param player_name: The name of the player moving.
+        :param dst_cell: The cell the player moves to.
+        :return: True if the player enters the cell now, False if it is still wading into mud.
+        """
+        if self.starts_wading(player_name, dst_cell):
+            self.wading[player_name] = dst_cell
+            return False
+        self.wading.pop(player_name, None)
+        return True
+
+    def starts_wading(self, player_name: str, dst_cell: int) -> bool:
+        """
+        :param player_name: The name of the player moving.
+        :param dst_cell: The cell the player moves to.
+        :return: True if the move only starts wading into mud, False if the player enters the cell with it. Nothing is
+                 recorded; wade records the move once it is made.
+        """
+        return self.terrain is not None and bool(self.terrain.mud >> dst_cell & 1) and \
+            self.wading.get(player_name) != dst_cell
 
     def is_valid_movement(self, player_name: str, direction: str) -> bool:
         """
         Validates whether the given movement direction is executable for the specified player. The method checks
         if the player can move in the specified direction without colliding into other players or going out of bounds
-        on the game-board.
+        on the game-board, with a lookup in the occupancy bitsets.
         :param player_name: The name of the player to be moved.
         :param direction: The direction the player is trying to move.
         :raises ValueError: Catches Error If the direction is not valid and returns false.
         :return: True if the direction is valid and executable, False otherwise.
         """
         curr_y, curr_x = self.find_player_by_name(player_name).get_coordinates()
+        cell, can_move = curr_y * self.length + curr_x, self.occupancy.can_move
         try:
             match direction:
-                case constants.UP if curr_y > 0 and self.game_board[curr_y - 1][curr_x].get_player() is None:
-                    return True
-                case constants.DOWN if curr_y < self.length - 1 and self.game_board[curr_y + 1][curr_x].player is None:
-                    return True
-                case constants.LEFT if curr_x > 0 and self.game_board[curr_y][curr_x - 1].player is None:
-                    return True
-                case constants.RIGHT if curr_x < self.length - 1 and self.game_board[curr_y][curr_x + 1].player is None:
+                case constants.UP | constants.DOWN | constants.LEFT | constants.RIGHT if can_move(cell, direction):
                     return True
                 case constants.QUIT:
                     self.get_results()
@@ -168,15 +257,138 @@ class Board:
         :param player_name: The name of the player searching for treasure
         :param tile: The Tile that is being searched
         """
+        self.collect_treasure(self.find_player_by_name(player_name), tile)
+
+    def collect_treasure(self, player: Player, tile: Tile) -> None:
+        """
+        Searches tile for treasure and adds the treasure's value to the given Player's score, if present.
+        :param player: The Player searching for treasure
+        :param tile: The Tile that is being searched
+        """
         treasure = tile.get_treasure()
         if treasure is not None:
-            player = self.find_player_by_name(player_name)
             player.add_points(treasure.get_value())
-            print(f"{player_name} has collected {treasure.get_value()} points\nTheir new score is {player.get_score()}")
+            print(f"{player.get_name()} has collected {treasure.get_value()} points\nTheir new score is {player.get_score()}")
             tile.remove_treasure()
             self.num_treasures -= 1
+            if self.journal is not None:
+                self.journal.append(Journal.COLLECT, player.get_name(), *tile.get_coordinates(), treasure.get_value())
+            for observer in self.collect_observers:
+                observer(self, tile, treasure)
+
+    def add_collect_observer(self, observer: Callable[['Board', Tile, Treasure], None]) -> None:
+        """
+        Registers a function to be called with the board, the tile and the treasure whenever a treasure is collected.
+        :param observer: The function to call.
+        """
+        self.collect_observers.append(observer)
+
+    def respawn_treasure(self, treasure: Treasure, tile: Tile = None) -> bool:
+        """
+        Puts a treasure back on the board: on the given tile if it is empty, otherwise on a random empty tile.
+        :param treasure: The Treasure to put back.
+        :param tile: The preferred Tile, usually the one the treasure was collected from.
+        :return: True if the treasure was placed, False if the board has no empty tile.
+        """
+        if tile is None or not self.occupancy.get_empty() >> tile.cell & 1:
+            empty = Occupancy.get_cells(self.occupancy.get_empty())
+            if not empty:
+                return False
+            row, col = divmod(self.generator.random.choice(empty), self.length)
+            tile = self.game_board[row][col]
+        tile.add_treasure(treasure)
+        self.num_treasures += 1
+        self.version += 1
+        if self.journal is not None:
+            self.journal.append(Journal.RESPAWN, '', *tile.get_coordinates(), treasure.get_value())
+        return True
+
+    # ------------------------------------------- SIMULTANEOUS MOVES ---------------------------------------------------
+    def resolve_moves(self, moves: dict[str, str]) -> list[str]:
+        """
+        Resolves one tick of simultaneous moves, independent of the order the moves arrived in:
+          - A move off the board or into a wall, or an invalid direction, is ignored.
+          - If two or more players move onto the same tile none of them move, and any treasure there stays put.
+          - Two players swapping tiles both stay put.
+          - A player moving onto a tile that stays occupied (its player is not moving away) stays put. This is repeated
+            until no more moves are cancelled, so blocked chains resolve the same way every time.
+          - The first move into mud that is not cancelled only starts wading into it: the player stays put, so moves
+            onto its tile are checked again. Cancelled moves leave the wading state of their player as it was.
+        The remaining players move together and then collect the treasure on their new tile.
+        :param moves: A dict mapping player name to the direction that player chose this tick.
+        :return: The names of the players that moved, in sorted order.
+        """
+        players = {player.get_name(): player for player in self.players}
+        destinations = {}
+        for name, direction in sorted(moves.items()):
+            if name not in players or direction not in constants.DIRECTIONS:
+                continue
+            row, col = players[name].get_coordinates()
+            dst_cell = self.occupancy.get_step(row * self.length + col, direction)
+            if dst_cell >= 0:
+                destinations[name] = divmod(dst_cell, self.length)
+
+        targeted = {}
+        for name, destination in destinations.items():
+            targeted[destination] = targeted.get(destination, 0) + 1
+        occupant = {player.get_coordinates(): name for name, player in players.items()}
+        for name, destination in list(destinations.items()):
+            other = occupant.get(destination)
+            swapping = other in destinations and destinations[other] == players[name].get_coordinates()
+            if targeted[destination] > 1 or swapping:
+                del destinations[name]
+
+        self.cancel_blocked(destinations, occupant)
+
+        wading = {name: destination for name, destination in destinations.items()
+                  if self.starts_wading(name, destination[0] * self.length + destination[1])}
+        for name in wading:
+            del destinations[name]
+        self.cancel_blocked(destinations, occupant)
+        for name, (row, col) in wading.items():
+            self.wade(name, row * self.length + col)
+        for name, (row, col) in destinations.items():
+            self.wade(name, row * self.length + col)
+
+        for name in destinations:
+            row, col = players[name].get_coordinates()
+            self.game_board[row][col].remove_player()
+        for name, (row, col) in sorted(destinations.items()):
+            tile = self.game_board[row][col]
+            players[name].set_coordinates(tile.get_coordinates())
+            tile.add_player(players[name])
+            if self.journal is not None:
+                self.journal.append(Journal.MOVE, name, row, col)
+            self.collect_treasure(players[name], tile)
+        if destinations:
+            self.num_moves += len(destinations)
+            self.version += 1
+        return sorted(destinations)
+
+    @staticmethod
+    def cancel_blocked(destinations: dict[str, tuple[int, int]], occupant: dict[tuple[int, int], str]) -> None:
+        """
+        Cancels every move onto a tile whose player stays put, until no more moves are cancelled.
+        :param destinations: The tile each moving player moves to, by name; cancelled moves are removed from it.
+        :param occupant: The name of the player on each occupied tile, by coordinates.
+        """
+        cancelled = True
+        while cancelled:
+            cancelled = False
+            for name, destination in list(destinations.items()):
+                other = occupant.get(destination)
+                if other is not None and other not in destinations:
+                    del destinations[name]
+                    cancelled = True
 
     # --------------------------------------------- END THE GAME -------------------------------------------------------
+    def get_duration(self) -> float:
+        """
+        Retrieves how long the match on this board has been running.
+        :return: The number of seconds since the board was created.
+        """
+        return time.monotonic() - self.started_at
+
     def get_results(self) -> str:
         """
         Generates a String Representation of the game results displaying who won the game.
@@ -0,0 +1,176 @@
+from asyncio import sleep
+from collections import deque
+from typing import Callable, Optional
+from Board import Board
+import constants
+
+
+class Bot:
+    """
+    The Bot class is a server-side player that lives on a Board without a network connection. A bot walks the shortest
+    path to the nearest treasure, found with a breadth-first search that treats other players as obstacles. The path is
+    kept between moves and only re-planned when the board changed in a way that affects it: the next cell became
+    occupied or the targeted treasure was collected by someone else.
+    """
+    def __init__(self, board: Board, name: str):
+        """
+        Initialize a Bot on the given board. If no player with the name is on the board yet, one is added.
+        :param board: The Board the bot plays on.
+        :param name: The name of the player the bot controls.
+        """
+        self.board = board
+        self.name = name
+        if not any(player.get_name() == name for player in board.players):
+            board.add_player_to_game_board(name)
+        self.player = board.find_player_by_name(name)
+        self.path = []
+        self.target = None
+        self.planned_version = -1
+        self.num_plans = 0
+
+    def get_neighbours(self, cell: int) -> list[tuple[int, str]]:
+        """
+        Retrieves the cells next to a cell, with the direction that leads to each.
+        :param cell: The index of the cell (row * length + col).
+        :return: A list of (neighbour index, direction) inside the board and not walls, from the board's step masks.
+        """
+        neighbours = []
+        for direction in constants.DIRECTIONS:
+            neighbour = self.board.occupancy.get_step(cell, direction)
+            if neighbour >= 0:
+                neighbours.append((neighbour, direction))
+        return neighbours
+
+    def plan(self) -> None:
+        """
+        Plans the shortest path to the nearest treasure with a breadth-first search from the bot's position. Cells
+        holding other players are obstacles. The path is stored reversed, as (cell, direction) steps, so the next step
+        is at the end.
+        """
+        self.num_plans += 1
+        self.path = []
+        self.target = None
+        length = self.board.length
+        row, col = self.player.get_coordinates()
+        start = row * length + col
+        came_from = {start: None}
+        for player in self.board.players:
+            other_row, other_col = player.get_coordinates()
+            came_from.setdefault(other_row * length + other_col, None)
+
+        treasure = self.board.occupancy.treasure
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            if cell != start and treasure >> cell & 1:
+                self.target = cell
+                while came_from[cell] is not None:
+                    previous, direction = came_from[cell]
+                    self.path.append((cell, direction))
+                    cell = previous
+                return
+            for neighbour, direction in self.get_neighbours(cell):
+                if neighbour not in came_from:
+                    came_from[neighbour] = (cell, direction)
+                    queue.append(neighbour)
+
+    def is_path_valid(self) -> bool:
+        """
+        Checks whether the stored path can still be followed: the target still holds treasure and the next cell is
+        free of players.
+        :return: True if the path is still usable, False if it must be re-planned.
+        """
+        occupancy = self.board.occupancy
+        if not self.path or not occupancy.treasure >> self.target & 1:
+            return False
+        return not occupancy.players >> self.path[-1][0] & 1
+
+    def choose_move(self) -> Optional[str]:
+        """
+        Chooses the bot's next move without making it, re-planning first if the board changed and the path is no
+        longer valid.
+        :return: The direction of the next step, None if no treasure is reachable.
+        """
+        if self.planned_version != self.board.version and not self.is_path_valid():
+            self.plan()
+        self.planned_version = self.board.version
+        return self.path[-1][1] if self.path else None
+
+    def advance(self) -> None:
+        """Records that the bot made the move chosen by choose_move."""
+        self.path.pop()
+        self.planned_version = self.board.version
+
+    def step(self) -> bool:
+        """
+        Moves the bot one cell along its path. A move that did not happen, such as the first move into mud, keeps the
+        path so the bot tries the same step again.
+        :return: True if the bot moved, False if it did not or no treasure is reachable.
+        """
+        direction = self.choose_move()
+        if direction is None or not self.board.move_player(self.player, direction):
+            return False
+        self.advance()
+        return True
+
+
+class BotRunner:
+    """
+    The BotRunner class drives any number of bots from a single task: every interval each bot takes one step. Running
+    all bots from one task keeps the cost per bot to a method call rather than a task wake-up.
+    """
+    def __init__(self, interval: float = constants.BOT_INTERVAL, on_move: Callable[[Board], None] = None):
+        """
+        Initialize a BotRunner with no bots.
+        :param interval: The number of seconds between bot steps.
+        :param on_move: Called with the board after a bot moved on it, e.g. to publish the update.
+        """
+        self.interval = interval
+        self.on_move = on_move
+        self.bots = []
+
+    def add_bot(self, bot: Bot) -> None:
+        """
+        Adds a bot to the runner.
+        :param bot: The Bot to drive.
+        """
+        self.bots.append(bot)
+
+    def step(self) -> int:
+        """
+        Gives every bot one step.
+        :return: The number of bots that moved.
+        """
+        moved = 0
+        for bot in self.bots:
+            if bot.step():
+                moved += 1
+                if self.on_move is not None:
+                    self.on_move(bot.board)
+        return moved
+
+    def submit_moves(self, submit: Callable[[str, str], None]) -> None:
+        """
+        Hands every bot's next move to a tick instead of making it, for boards that resolve moves together.
+        :param submit: Called with the bot's name and direction for every bot that has a move.
+        """
+        for bot in self.bots:
+            direction = bot.choose_move()
+            if direction is not None:
+                submit(bot.name, direction)
+
+    def advance(self, moved: list[str]) -> None:
+        """
+        Advances the bots whose submitted moves were made when the tick was resolved. Bots whose move was blocked keep
+        their path and re-check it on their next move.
+        :param moved: The names of the players that moved this tick.
+        """
+        for bot in self.bots:
+            if bot.name in moved:
+                bot.advance()
+
+    async def run(self) -> None:
+        """Asynchronously steps every bot each interval, forever."""
+        while True:
+            await sleep(self.interval)
+            self.step()
@@ -1,10 +1,36 @@
 #!/usr/bin/python3
-from asyncio import start_server, StreamReader, StreamWriter
-from struct import pack
+from asyncio import (create_task, get_running_loop, sleep, start_server, wait, wait_for, Event, FIRST_COMPLETED,
+                     IncompleteReadError, Semaphore, StreamReader, StreamWriter, TimeoutError)
+from collections import OrderedDict
+from os.path import exists, join
+from socket import IPPROTO_TCP, TCP_NODELAY
+from struct import pack, unpack_from
+from time import monotonic, time
+from typing import Optional
+from AdminServer import AdminServer
 from Board import Board
-import view
+from Bot import Bot, BotRunner
+from Journal import Journal
+from Matchmaker import Matchmaker, Ticket
+from MatchHistory import MatchHistory
+from Player import Player
+from Respawner import Respawner
+from Room import Room
+from RttEstimator import RttEstimator
+from ServerConfig import ServerConfig
+from SharedBoard import SharedBoard
+from Terrain import Terrain
+from TokenBucket import TokenBucket
+from checkpoint import Checkpointer, read_checkpoint
+from protocol import FrameWriter, BOARD_PREFIX, PING_REQUEST, PONG
+from treasure_generation import TreasureGenerator
 import constants
 
+try:
+    from socket import TCP_INFO
+except ImportError:  # Linux only
+    TCP_INFO = None
+
 
 class Game:
     """
@@ -13,36 +39,190 @@ class Game:
         - Sets up a TCP Asynchronous Server to accept connections represented as players.
         - Handles the player commands Asynchronously from the connections maintaining the flow of the game.
     """
-    def __init__(self):
+    COMMAND_MAP = {                     # byte:          0010 1000
+        0b0010: constants.UP,           # >> 4:          ____ 0010
+        0b0100: constants.LEFT,         # command_bits:  0010
+        0b0110: constants.RIGHT,
+        0b0011: constants.DOWN,
+        0b0000: constants.QUIT,
+        0b1111: constants.GAME,
+        0b1000: constants.CODEC,
+        0b0101: constants.SPECTATE,
+        0b0111: constants.PING,
+    }
+
+    def __init__(self, config: ServerConfig = None):
         """
-        Initializes the Game instance by creating the game board by instantiating the Board object.
+        Initializes the Game instance by creating the game board by instantiating the Board object, with treasure
+        placed by the configured treasure distribution.
         Adds Two players to the board.
         Num connections is 0 to start with because no connections have been accepted yet. The game can only support two
-        connections.
+        connections. Rooms are indexed by id for the admin interface.
+        If a checkpoint file is configured and exists, the board is restored from it instead. If a match history
+        database is configured, the result of the match is recorded once every player has quit. Seats taken by bots
+        are removed from the connections the game accepts. With a tick interval configured, moves are resolved together
+        once per tick instead of as they arrive. With a respawn delay configured, collected treasure respawns. The
+        board's terrain is loaded from the configured map file or generated with the configured density.
+        With matchmaking configured, connecting players are queued instead and every match gets a room of its own, with
+        a new board; the first room is left to bots and spectators.
+        :param config: The network settings of the server. Defaults to the settings in constants.py.
         """
-        self.game_board = Board(constants.BOARD_LENGTH, constants.NUM_TREASURES, constants.MIN_TREASURE, constants.MAX_TREASURE)
+        self.config = config if config is not None else ServerConfig()
+        self.treasure_generator = TreasureGenerator.from_name(self.config.treasure_distribution,
+                                                              self.config.treasure_seed)
+        self.game_board = Board(constants.BOARD_LENGTH, constants.NUM_TREASURES, constants.MIN_TREASURE,
+                                constants.MAX_TREASURE, self.treasure_generator, self.get_terrain())
         self.game_board.add_player_to_game_board(constants.PLAYER_ONE_NAME)
         self.game_board.add_player_to_game_board(constants.PLAYER_TWO_NAME)
+        self.max_connections = 2 - self.config.bot_seats
+        self.seats = [constants.PLAYER_ONE_NAME, constants.PLAYER_TWO_NAME][:self.max_connections]
+        self.room = Room(constants.DEFAULT_ROOM, self.game_board, self.seats, self.config.fog_radius)
+        self.rooms = {self.room.room_id: self.room}
+        self.next_room_id = constants.DEFAULT_ROOM + 1
+        self.run_id = int(time() * 1000)  # Names the journal files of this run, so a restart never appends to them
         self.num_connections = 0
-        self.max_connections = 2
+        self.matchmaker = Matchmaker() if self.config.matchmaking else None
+        self.match_task = None
+        self.match_keys = {}
+        self.server = None
+        self.admin = None
+        self.draining = False
+        self.stopped = Event()
+        self.renders = Semaphore(self.config.max_renders)
+        self.strikes = OrderedDict()  # Address ----> TokenBucket of strikes, least recently struck first
+        self.history = None
+        self.history_task = None
+        if self.config.history_path is not None:
+            self.history = MatchHistory(self.config.history_path)
+        self.checkpointer = None
+        self.checkpoint_task = None
+        if self.config.checkpoint_path is not None:
+            self.checkpointer = Checkpointer(self.config.checkpoint_path, self.config.checkpoint_interval,
+                                             self.get_live_boards)
+            if exists(self.config.checkpoint_path):
+                self.restore_boards(read_checkpoint(self.config.checkpoint_path))
+        self.bot_runner = BotRunner(on_move=lambda board: self.room.schedule_update())
+        self.bot_task = None
+        for name in [constants.PLAYER_TWO_NAME, constants.PLAYER_ONE_NAME][:self.config.bot_seats]:
+            self.bot_runner.add_bot(Bot(self.game_board, name))
+        self.tick_task = None
+        self.respawner = None
+        self.respawn_task = None
+        if self.config.respawn_delay:
+            self.respawner = Respawner(self.config.respawn_delay, on_respawn=self.publish_board)
+            self.respawner.watch(self.game_board)
 
-    """------------------- RECEIVING DATA FROM CLIENT -------------------"""
+    def get_terrain(self) -> Optional[Terrain]:
+        """
+        Builds the terrain of the board from the config: the map file if there is one, otherwise terrain generated with
+        the terrain density and the treasure seed.
+        :return: The Terrain, None for open ground everywhere.
+        :raises ValueError: If the map file is not a valid map for the board.
+        """
+        if self.config.terrain_map is not None:
+            return Terrain.load(self.config.terrain_map)
+        if self.config.terrain_density:
+            return Terrain.generate(constants.BOARD_LENGTH, self.config.terrain_density, self.config.treasure_seed)
+        return None
 
-    @staticmethod
-    def get_player_from_byte(byte: bytes) -> str:
+    def get_live_boards(self) -> dict[int, Board]:
         """
-        Byte ----> Player Name
-        :param byte: A byte with the 5th and 6h bits mapping to a player: ****PP**
-        :return: Player Name that matches the 5th and 6th most significant bits in byte, "ERROR" if the bits
-        do not map to a valid player.
+        Retrieves every board with a match in progress.
+        :return: A dict mapping room id to Board.
         """
-        player_map = {                            # byte:        0110 10 00
-            0b01: constants.PLAYER_ONE_NAME,      # & 0xC:       0000 10 00
-            0b10: constants.PLAYER_TWO_NAME       # >> 2:        __00 00 10
-        }                                         # player_bits: 10
+        return {room_id: room.board for room_id, room in self.rooms.items()}
 
-        player_bits = (int.from_bytes(byte, byteorder='big') & 0xC) >> 2
-        return player_map.get(player_bits, "ERROR")
+    def restore_boards(self, boards: dict[int, Board]) -> None:
+        """
+        Replaces the live boards with boards restored from a checkpoint.
+        :param boards: A dict mapping room id to restored Board.
+        """
+        if constants.DEFAULT_ROOM in boards:
+            self.game_board = boards[constants.DEFAULT_ROOM]
+            self.game_board.generator = self.treasure_generator
+            self.room = Room(constants.DEFAULT_ROOM, self.game_board, self.seats, self.config.fog_radius)
+            self.rooms = {self.room.room_id: self.room}
+
+    def publish_board(self, board: Board) -> None:
+        """
+        Schedules the update of whichever room a board belongs to.
+        :param board: The Board that changed.
+        """
+        for room in self.rooms.values():
+            if room.board is board:
+                room.schedule_update()
+                return
+
+    def create_room(self) -> Room:
+        """
+        Creates a room for a new match, with a new board and both players on it. The room journals and publishes to its
+        replica like the rooms that existed when the server started, and its treasure respawns.
+        :return: The Room.
+        """
+        board = Board(constants.BOARD_LENGTH, constants.NUM_TREASURES, constants.MIN_TREASURE, constants.MAX_TREASURE,
+                      self.treasure_generator, self.get_terrain())
+        room = Room(self.next_room_id, board, fog_radius=self.config.fog_radius)
+        self.next_room_id += 1
+        self.rooms[room.room_id] = room
+        if self.config.journal_dir is not None:
+            self.open_journal(room)
+        for name in room.seats:
+            board.add_player_to_game_board(name)
+        if self.config.replica_prefix is not None:
+            room.replica = SharedBoard(self.config.replica_prefix, room.room_id, board)
+            room.publish_update()
+        if self.respawner is not None:
+            self.respawner.watch(board)
+        return room
+
+    def close_room(self, room: Room) -> None:
+        """
+        Stops journaling a room and removes its replica segment.
+        :param room: The Room.
+        """
+        if room.replica is not None:
+            room.replica.close()
+            room.replica = None
+        if room.board.journal is not None:
+            room.board.journal.close()
+            room.board.journal = None
+
+    def end_match(self, room: Room) -> None:
+        """
+        Ends the match of a room once every player has left it: the result is recorded in the match history, and for a
+        room made by the matchmaker the players' ratings are updated and the room is closed and removed.
+        :param room: The Room.
+        """
+        if self.history is not None:
+            self.history.record(room.board)
+        keys = self.match_keys.pop(room.room_id, None)
+        if keys is not None:
+            self.matchmaker.record_result([(keys[player.get_name()], player.get_score())
+                                           for player in room.board.players])
+            self.close_room(room)
+            del self.rooms[room.room_id]
+
+    def open_journal(self, room: Room) -> None:
+        """
+        Starts journaling a room's board to a new file in the journal directory, named after the room and the run of the
+        server: room ids start over when the server restarts, so a match never appends to the journal of an earlier
+        run's match. The players already on the board are recorded as joining where they stand, with their score.
+        :param room: The Room.
+        :raises ValueError: If the room's file exists but is not its journal.
+        """
+        board = room.board
+        board.journal = Journal(self.get_journal_path(room.room_id), room.room_id)
+        for player in board.players:
+            board.journal.append(Journal.JOIN, player.get_name(), *player.get_coordinates(), player.get_score())
+
+    def get_journal_path(self, room_id: int) -> str:
+        """
+        :param room_id: The id of a room.
+        :return: The path of the room's journal file in this run of the server.
+        """
+        return join(self.config.journal_dir, f"room_{room_id}_{self.run_id}.journal")
+
+    """------------------- RECEIVING DATA FROM CLIENT -------------------"""
 
     @staticmethod
     def get_command_from_byte(byte: bytes) -> str:
@@ -52,112 +232,495 @@ class Game:
         :return: Command Name that matches the 4 most significant bits in byte, "ERROR" if ths bits
         do not map to a valid command.
         """
-        command_map = {                     # byte:          0010 1000
-            0b0010: constants.UP,           # >> 4:          ____ 0010
-            0b0100: constants.LEFT,         # command_bits:  0010
-            0b0110: constants.RIGHT,
-            0b0011: constants.DOWN,
-            0b0000: constants.QUIT,
-            0b1111: constants.GAME,
-        }
         command_bits = (int.from_bytes(byte, byteorder='big')) >> 4
-        return command_map.get(command_bits, "ERROR")
+        return Game.COMMAND_MAP.get(command_bits, "ERROR")
 
-    def parse_command_byte(self, byte: bytes) -> tuple[str, str]:
+    @staticmethod
+    def get_option_from_byte(byte: bytes) -> int:
         """
-        Byte from Server ----> [Player Name, Command Name]
-        :param byte: A byte with command and player hard-coated in: CCCC PP ** (C = Command; P = Player)
-        :return: (Player Name, Command Name) extracted from the byte.
+        Byte ----> Command Option
+        :param byte: A byte with the 2 least significant bits holding a command option: ******OO
+        :return: The option bits as an integer. Only the CODEC command uses them, to select the codec.
         """
-        player = self.get_player_from_byte(byte)
-        command = self.get_command_from_byte(byte)
-        return player, command
+        return int.from_bytes(byte, byteorder='big') & 0x3
 
     """------------------- SENDING DATA TO CLIENT -------------------"""
 
-    async def send_board_to_client(self, writer: StreamWriter) -> None:
+    async def send_board_to_client(self, frames: FrameWriter, room: Room, player: Player = None) -> None:
         """
         Asynchronously sends the player scores and current game board state to a client.
         Prepares a data packet containing the following information:
           - Length of Packet as an Unsigned Short
           - Scores of both players, both as Unsigned Shorts
           - Current state of the game-board as a binary string.
-        :param writer: The StreamWriter used for sending data to the specific client.
+        The header and scores are packed into the connection's prefix buffer and written alongside the board, so the
+        board is never copied into a combined packet. Once a codec is negotiated the header is the wide header and the
+        scores and board are encoded together with the codec. The board is rendered once per change by the Room.
+        At most max_renders responses are built and sent at the same time; further responses wait for a free slot.
+        In fog of war mode a player is only sent what they can see.
+        :param frames: The FrameWriter used for sending data to the specific client.
+        :param room: The Room the client plays in.
+        :param player: The Player the client plays as, None to send the whole board.
         """
-        board = view.display(self.game_board)
-        player_1_score = self.game_board.find_player_by_name(constants.PLAYER_ONE_NAME).get_score()
-        player_2_score = self.game_board.find_player_by_name(constants.PLAYER_TWO_NAME).get_score()
+        async with self.renders:
+            if player is None:
+                player_1_score, player_2_score, board = room.get_board_payload()
+            else:
+                player_1_score, player_2_score, board = room.get_player_payload(player)
 
-        packet = pack('!HH', player_1_score, player_2_score) + board.encode()
-        packet_header = pack('!H', len(packet))
-        writer.write(packet_header + packet)
-        await writer.drain()
+            frames.write_frame(board, BOARD_PREFIX, player_1_score, player_2_score)
+            await frames.drain_if_needed()
 
-    async def send_results_to_client(self, writer: StreamWriter) -> None:
+    async def send_results_to_client(self, frames: FrameWriter, room: Room) -> None:
         """
         Asynchronously sends the player scores to a client.
         Prepares a data packet containing the following information:
           - Length of Packet as an Unsigned Short
           - Scores of both players, both as Unsigned Shorts
-        :param writer: The StreamWriter used for sending data to the specific client.
+        The connection is fully drained because no further messages follow the results.
+        :param frames: The FrameWriter used for sending data to the specific client.
+        :param room: The Room the client plays in.
         """
-        results = self.game_board.get_results()
+        results = room.board.get_results()
 
-        packet = results.encode()
-        packet_header = pack('!H', len(packet))
-        writer.write(packet_header + packet)
-        await writer.drain()
+        frames.write_frame(results.encode())
+        await frames.drain()
 
-    async def execute_client_command(self, writer: StreamWriter, player: str, command: str) -> None:
+    async def negotiate_codec(self, frames: FrameWriter, codec_id: int) -> None:
+        """
+        Asynchronously switches a client connection to a codec. The server answers with a frame, still using the short
+        header, holding the id of the codec it accepted as an unsigned char. An unknown codec falls back to raw frames
+        with the wide header. Every frame after the answer uses the wide header and the accepted codec.
+        :param frames: The FrameWriter used for sending data to the specific client.
+        :param codec_id: The id of the codec requested by the client.
+        """
+        if codec_id not in constants.CODEC_NAMES.values():
+            codec_id = constants.CODEC_RAW
+        frames.write_frame(pack('!B', codec_id))
+        frames.set_codec(codec_id)
+        await frames.drain_if_needed()
+
+    async def execute_client_command(self, frames: FrameWriter, room: Room, player: Player, command: str,
+                                     option: int = 0) -> None:
         """
         Asynchronously processes and executes a client command, updating the game state and responding accordingly.
-        If the Command is a valid movement, it executes the movement and sends updates scores and board to client.
+        If the Command is a valid movement, it executes the movement, sends updates scores and board to client and,
+        if the board changed, schedules the update of the room's spectators. In tick mode the movement is queued for the
+        next tick instead, which answers it, or for a later tick if the client is faster than the room's slowest.
         If the Command is Game, it sends scores and board to client.
-        If the Command is an error, it sends an error message and terminates the connection with the client.
+        If the Command is Codec, it negotiates the codec selected by the option bits.
+        In tick mode Game and Codec are answered after the tick answering the client's waiting moves.
+        If the Command is an error, it terminates the connection with the client without writing anything more, and
+        counts a strike against the client's address.
 
-        :param writer: The StreamWriter used for sending data to the specific client.
-        :param player: The name of the player associated with the command.
+        :param frames: The FrameWriter used for sending data to the specific client.
+        :param room: The Room the client plays in.
+        :param player: The Player the client's connection is bound to.
         :param command: The command issued by the client.
+        :param option: The option bits of the command byte.
         """
-        if command in [constants.UP, constants.LEFT, constants.DOWN, constants.RIGHT]:
-            self.game_board.move_player_on_board(player, command)
-            await self.send_board_to_client(writer)
+        if command in [constants.UP, constants.LEFT, constants.DOWN, constants.RIGHT] and self.config.tick_interval:
+            name = player.get_name()
+            room.submit_move(name, command, frames, room.get_input_delay(name, self.config.tick_interval))
+            await frames.drain_if_needed()
+        elif command in [constants.UP, constants.LEFT, constants.DOWN, constants.RIGHT]:
+            version = room.board.version
+            room.board.move_player(player, command)
+            if room.board.version != version:  # Rejected moves change nothing to publish
+                room.schedule_update()
+            await self.send_board_to_client(frames, room, player)
         elif command == constants.GAME:
-            await self.send_board_to_client(writer)
+            await room.wait_for_tick(frames)
+            await self.send_board_to_client(frames, room, player)
+        elif command == constants.CODEC:
+            await room.wait_for_tick(frames)
+            await self.negotiate_codec(frames, option)
         elif command == 'ERROR':
-            writer.write(b"Error in Command. Terminating Connection.")
-            await writer.drain()
+            self.add_strike(frames.writer)
+            frames.writer.close()
+
+    async def answer_ping(self, frames: FrameWriter, room: Room, latency: RttEstimator, request: bytes) -> None:
+        """
+        Asynchronously answers a ping with a PONG frame. The round trip time sample the client reports is added to the
+        connection's estimate first, and kept by the matchmaker for the connection's address. In tick mode a ping sent
+        after moves that wait for the next tick is only answered after them, and the answer tells the client how long
+        it was held back so the client can leave that out of its sample.
+        :param frames: The FrameWriter used for sending data to the specific client.
+        :param room: The Room the client plays in.
+        :param latency: The RttEstimator of the connection.
+        :param request: The PING_REQUEST that followed the command byte.
+        """
+        timestamp, sample = PING_REQUEST.unpack(request)
+        if latency.add_sample(sample / 1e6) and self.matchmaker is not None:
+            self.matchmaker.record_rtt(self.get_host(frames.writer), latency.srtt)
+        if frames in room.waiting:
+            room.hold_pong(frames, timestamp, latency)
+        else:
+            self.write_pong(frames, timestamp, 0.0, latency)
+            await frames.drain_if_needed()
+
+    @staticmethod
+    def write_pong(frames: FrameWriter, timestamp: int, held: float, latency: RttEstimator) -> None:
+        """
+        Writes a PONG frame.
+        :param frames: The FrameWriter of the connection that sent the ping.
+        :param timestamp: The client timestamp to echo.
+        :param held: How long the answer was held back, in seconds.
+        :param latency: The RttEstimator of the connection.
+        """
+        frames.write_frame(PONG.pack(timestamp, int(held * 1e6), int(latency.srtt * 1e6), int(latency.jitter * 1e6)))
+
+    def add_strike(self, writer: StreamWriter) -> None:
+        """
+        Counts a strike against the address of a connection that sent an invalid command. The strikes of an address
+        are a token bucket of max_strikes tokens, each strike taking one, that refills over STRIKE_DECAY seconds, so
+        strikes are forgiven over time and a ban lasts until the address has gone quiet for a while. Only the
+        MAX_STRIKE_HOSTS addresses struck most recently are remembered.
+        :param writer: The StreamWriter of the connection.
+        """
+        host = self.get_host(writer)
+        bucket = self.strikes.pop(host, None)
+        if bucket is None:
+            bucket = TokenBucket(self.config.max_strikes / constants.STRIKE_DECAY, self.config.max_strikes)
+            if len(self.strikes) >= constants.MAX_STRIKE_HOSTS:
+                self.strikes.popitem(last=False)
+        bucket.take()
+        self.strikes[host] = bucket
+
+    def is_banned(self, host: str) -> bool:
+        """
+        :param host: An address.
+        :return: Whether the address has max_strikes strikes that are not forgiven yet.
+        """
+        bucket = self.strikes.get(host)
+        if bucket is None:
+            return False
+        tokens = bucket.get_tokens()
+        if tokens >= bucket.burst:
+            del self.strikes[host]  # Every strike is forgiven
+        return tokens < 1
+
+    @staticmethod
+    def get_host(writer: StreamWriter) -> str:
+        """
+        :param writer: The StreamWriter of a connection.
+        :return: The address the connection comes from.
+        """
+        peer = writer.get_extra_info('peername')
+        return peer[0] if isinstance(peer, tuple) else str(peer)
+
+    @staticmethod
+    def get_rtt(writer: StreamWriter) -> float:
+        """
+        Reads the round trip time the kernel measured for a connection, from TCP_INFO where the platform has it.
+        :param writer: The StreamWriter of a connection.
+        :return: The smoothed round trip time in seconds, 0 if it is not available.
+        """
+        sock = writer.get_extra_info('socket')
+        if sock is None or TCP_INFO is None:
+            return 0.0
+        try:
+            return unpack_from('I', sock.getsockopt(IPPROTO_TCP, TCP_INFO, 104), 68)[0] / 1e6  # tcpi_rtt, in us
+        except (OSError, ValueError):
+            return 0.0
+
+    def tune_socket(self, writer: StreamWriter) -> None:
+        """
+        Applies the configured socket options to a client connection. Commands and board updates are small frames, so
+        TCP_NODELAY is set to stop Nagle's algorithm from holding them back.
+        :param writer: The StreamWriter of the client connection.
+        """
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(IPPROTO_TCP, TCP_NODELAY, int(self.config.tcp_nodelay))
+
+    async def watch_room(self, reader: StreamReader, writer: StreamWriter, room: Room = None) -> None:
+        """
+        Asynchronously streams a room's updates to a read-only spectator connection. The spectator receives the current
+        board straight away and then every update, in the same frame format as the board sent to players. Commands
+        from a spectator are ignored until it sends Quit or disconnects.
+        :param reader: The StreamReader used for reading data from the spectator.
+        :param writer: The StreamWriter used for sending data to the spectator.
+        :param room: The Room to watch, the first room by default.
+        """
+        room = room if room is not None else self.room
+        stream = create_task(room.spectators.serve(writer, room.get_update_frame()))
+        try:
+            while not stream.done():
+                client_byte = await reader.read(1)
+                if client_byte == b'' or self.get_command_from_byte(client_byte) == constants.QUIT:
+                    break
+        finally:
+            stream.cancel()
             writer.close()
-            await writer.wait_closed()
+
+    async def watch_instead_of_playing(self, reader: StreamReader, writer: StreamWriter) -> None:
+        """
+        Asynchronously gives a rejected connection the chance to become a spectator. If its first byte, sent within
+        SPECTATE_WAIT seconds, is the Spectate command it watches the room; otherwise the connection is closed.
+        :param reader: The StreamReader used for reading data from the client.
+        :param writer: The StreamWriter used for sending data to the client.
+        """
+        try:
+            client_byte = await wait_for(reader.readexactly(1), constants.SPECTATE_WAIT)
+        except (IncompleteReadError, TimeoutError):
+            writer.close()
+            return
+        if self.get_command_from_byte(client_byte) == constants.SPECTATE:
+            await self.watch_room(reader, writer)
+        else:
+            writer.close()
+
+    def leave_seat(self, room: Room, player: str) -> None:
+        """
+        Frees a player's seat once its connection quits, spectates or is lost, and journals the player quitting. A match
+        made by the matchmaker ends once its last player has left. When draining, the server stops once the last player
+        has left.
+        :param room: The Room the player plays in.
+        :param player: The name of the player.
+        """
+        if room.leave_seat(player):
+            journal = room.board.journal
+            if journal is not None:
+                quitter = room.board.find_player_by_name(player)
+                journal.append(Journal.QUIT, player, *quitter.get_coordinates(), quitter.get_score())
+            self.num_connections -= 1
+            if not room.connections and room.room_id in self.match_keys:
+                self.end_match(room)
+            if self.draining and self.num_connections == 0:
+                self.stopped.set()
+
+    """--------------------------- MATCHMAKING --------------------------"""
+
+    def start_match(self, group: list[Ticket]) -> None:
+        """
+        Gives a group of matched tickets a new room, one seat each in the order they started waiting. A room whose
+        players are all gone before MATCH_SEAT_TIMEOUT, e.g. lost before taking their seats, is abandoned then.
+        :param group: The matched Tickets.
+        """
+        room = self.create_room()
+        self.match_keys[room.room_id] = {}
+        for ticket, seat in zip(group, room.seats):
+            self.match_keys[room.room_id][seat] = ticket.key
+            if not ticket.future.done():
+                ticket.future.set_result((room, seat))
+        get_running_loop().call_later(constants.MATCH_SEAT_TIMEOUT, self.abandon_match, room)
+
+    def abandon_match(self, room: Room) -> None:
+        """
+        Closes and removes the room of a match nobody is seated in, without recording a result. A match that has
+        already ended, or has players seated, is left alone.
+        :param room: The Room of the match.
+        """
+        if room.room_id in self.match_keys and not room.connections:
+            del self.match_keys[room.room_id]
+            self.close_room(room)
+            del self.rooms[room.room_id]
+
+    async def wait_for_match(self, reader: StreamReader, writer: StreamWriter) -> Optional[tuple[Room, str]]:
+        """
+        Asynchronously queues a connection with the matchmaker until it is matched. The connection is rated by its
+        address, and its round trip time is the one last measured by the pings of its address, or else the one the
+        kernel measured. A connection that sends a byte before it is
+        matched leaves the queue: to spectate the first room if it is the Spectate command, otherwise it is closed.
+        :param reader: The StreamReader used for reading data from the client.
+        :param writer: The StreamWriter used for sending data to the client.
+        :return: (The Room, the seat) the connection was given, with no seat if the server started draining, None if it
+                 left the queue.
+        """
+        host = self.get_host(writer)
+        ticket = Ticket(host, self.matchmaker.get_rating(host), self.matchmaker.get_rtt(host, self.get_rtt(writer)),
+                        future=get_running_loop().create_future())
+        group = self.matchmaker.add(ticket)
+        if group is not None:
+            self.start_match(group)
+        first_byte = create_task(reader.readexactly(1))
+        try:
+            await wait({ticket.future, first_byte}, return_when=FIRST_COMPLETED)
+        finally:
+            first_byte.cancel()
+            self.matchmaker.remove(ticket)
+        await wait({first_byte})  # The reader is only free for commands once the cancelled read has finished
+        if ticket.future.done():
+            return ticket.future.result()
+        ticket.future.cancel()
+        if first_byte.done() and not first_byte.cancelled() and first_byte.exception() is None and \
+                self.get_command_from_byte(first_byte.result()) == constants.SPECTATE:
+            await self.watch_room(reader, writer)
+        else:
+            writer.close()
+        return None
+
+    async def run_matchmaking(self) -> None:
+        """Asynchronously retries the waiting tickets every match interval, forever, so waiting widens their search."""
+        while True:
+            await sleep(constants.MATCH_INTERVAL)
+            for group in self.matchmaker.sweep():
+                self.start_match(group)
+
+    """------------------------ CLIENT CONNECTIONS ----------------------"""
 
     async def manage_game_client(self, reader: StreamReader, writer: StreamWriter):
         """
         Asynchronous coroutine to manage a single client connection and handle game interactions between the client
-        and the server. If the number of connections is 2 or greater the server rejects the connection by sending a
-        0 as an unsigned short and closing the connection. If the server accepts the connection it then continuously
-        waits for commands from the client and returns the results until the client enters the quit command.
+        and the server. If every seat is taken, or the server is draining, the server rejects the connection by sending
+        a 0 as an unsigned short and closing the connection, unless the client asks to spectate instead. If the server
+        accepts the connection the client gets the first free seat, and the server then continuously waits for
+        commands from the client and returns the results until the client enters the quit command. With matchmaking,
+        the connection is queued instead until it is matched, and then gets its seat in the room of its match.
+        A connection that sends the Spectate command, either as a player or straight after being rejected, gives up
+        its seat and becomes a read-only spectator of the room. A connection that is lost, or closed by an admin, gives
+        up its seat too.
+        Commands are paced by a per-connection token bucket: a connection sending faster than the command rate is not
+        read from until it is back under the rate. Connections from an address with max_strikes invalid commands are
+        closed straight away, until the strikes decay.
+        Each connection is bound to its player when it takes a seat: a command whose player bits are not that player's
+        is treated as an invalid command, so one connection cannot move another connection's player. Only Spectate,
+        which moves no player, may leave the player bits at 0.
+        Each seated connection has a round trip time estimate, seeded with the kernel's measurement and updated by the
+        samples its pings report. In tick mode the answers to Quit, Game and Codec wait for the tick answering the
+        connection's earlier moves, so the client gets every answer in the order it asked.
 
         :param reader: The StreamReader used for reading data from the specific client.
         :param writer: The StreamWriter used for sending data to the specific client.
         """
-        if self.num_connections >= self.max_connections:
+        if self.is_banned(self.get_host(writer)):
+            writer.close()
+            return
+        room, seat = self.room, None
+        if not self.draining and self.matchmaker is not None:
+            match = await self.wait_for_match(reader, writer)
+            if match is None:
+                return
+            room, seat = match
+            if seat is not None:
+                room.take_seat(writer, seat)
+        elif not self.draining:
+            seat = self.room.take_seat(writer)
+        if seat is None:
             writer.write(pack('!H', 0))  # Reject the Connection
+            await self.watch_instead_of_playing(reader, writer)
             return
 
+        self.tune_socket(writer)
         self.num_connections += 1
-        client_id = self.num_connections
-        writer.write(pack('!HB', 1, client_id))  # Send the Client their ID
-        await writer.drain()
+        latency = RttEstimator()
+        latency.add_sample(self.get_rtt(writer))
+        room.latency[seat] = latency
+        client_id = room.seats.index(seat) + 1
+        player = room.board.find_player_by_name(seat)  # Bind the connection to its player once
+        player_bits = client_id << 2  # The PP bits every command from this connection must carry
+        try:
+            writer.write(pack('!HB', 1, client_id))  # Send the Client their ID
+            await writer.drain()
+
+            frames = FrameWriter(writer)
+            bucket = None
+            if self.config.command_rate:
+                bucket = TokenBucket(self.config.command_rate, self.config.command_burst)
+            while not writer.is_closing():
+                client_byte = await reader.readexactly(1)  # Wait for a command as a byte from the client
+                if bucket is not None and (wait := bucket.take()):
+                    await sleep(wait)
+                command = self.get_command_from_byte(client_byte)
+                if client_byte[0] & constants.PLAYER_MASK != player_bits and command != constants.SPECTATE:
+                    command = 'ERROR'  # Spoofed: the byte claims another player's bits
+                if command == constants.SPECTATE:
+                    self.leave_seat(room, seat)  # Give up the seat
+                    await self.watch_room(reader, writer, room)
+                    break
+                elif command == constants.PING:
+                    await self.answer_ping(frames, room, latency, await reader.readexactly(PING_REQUEST.size))
+                elif command != constants.QUIT:
+                    option = self.get_option_from_byte(client_byte)
+                    await self.execute_client_command(frames, room, player, command, option)  # Execute the byte
+                else:
+                    await room.wait_for_tick(frames)  # The moves waiting for the next tick are answered first
+                    await self.send_results_to_client(frames, room)  # Quit the game
+                    self.leave_seat(room, seat)
+                    if room is self.room and not room.connections:
+                        self.end_match(room)
+                    break
+        except (IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.leave_seat(room, seat)
+
+    async def drain(self) -> None:
+        """
+        Asynchronously starts draining the server for a restart: new connections are no longer accepted, matches in
+        progress continue, and start() returns once every player has left. Connections still waiting for a match are
+        refused.
+        """
+        self.draining = True
+        if self.server is not None:
+            self.server.close()
+        if self.matchmaker is not None:
+            for ticket in self.matchmaker.clear():
+                if ticket.future is not None and not ticket.future.done():
+                    ticket.future.set_result((self.room, None))  # No seat: refused like a connection to a full server
+        if self.num_connections == 0:
+            self.stopped.set()
+
+    """--------------------------- TICK MODE ----------------------------"""
 
+    def run_tick(self) -> list[str]:
+        """
+        Resolves one tick: the bots submit their moves, and the moves submitted in every room since the last tick are
+        resolved together on the room's board.
+        :return: The names of the players that moved in the first room.
+        """
+        self.bot_runner.submit_moves(self.room.submit_move)
+        moved = []
+        for room in list(self.rooms.values()):
+            if room is self.room:
+                moved = self.run_room_tick(room)
+                self.bot_runner.advance(moved)
+            elif room.pending_moves or room.waiting:
+                self.run_room_tick(room)
+        return moved
+
+    @staticmethod
+    def run_room_tick(room: Room) -> list[str]:
+        """
+        Resolves one tick of a room and sends the resulting state once. The board is rendered once for the tick; every
+        move a player submitted is answered with it and the spectators get one update. In fog of war mode each player's
+        answer hides what the player cannot see. Frames are only written here, each connection waits for its own
+        transport to drain before submitting more moves. Pings held back behind moves are answered once every move
+        before them has been.
+        :param room: The Room.
+        :return: The names of the players that moved.
+        """
+        moved, waiting = room.resolve_tick()
+        if moved:
+            room.publish_update()
+        if waiting:
+            player_1_score, player_2_score, board = room.get_board_payload()
+            seated = {writer: name for name, writer in room.connections.items()}
+            for frames, count in waiting.items():
+                if room.visibility is not None and frames.writer in seated:
+                    player = room.board.find_player_by_name(seated[frames.writer])
+                    player_1_score, player_2_score, board = room.get_player_payload(player)
+                for _ in range(count):
+                    frames.write_frame(board, BOARD_PREFIX, player_1_score, player_2_score)
+        if room.pending_pongs:
+            now = monotonic()
+            for frames in [frames for frames in room.pending_pongs if frames not in room.waiting]:
+                for timestamp, held_at, latency in room.pending_pongs.pop(frames):
+                    Game.write_pong(frames, timestamp, now - held_at, latency)
+        return moved
+
+    async def run_ticks(self) -> None:
+        """
+        Asynchronously runs a tick every tick interval, forever. Ticks are scheduled from a fixed start time so the
+        tick rate does not drift with the time each tick takes.
+        """
+        loop = get_running_loop()
+        next_tick = loop.time()
         while True:
-            client_byte = await reader.readexactly(1)  # Wait for a command as a byte from the client
-            player, command = self.parse_command_byte(client_byte)
-            if command != constants.QUIT:
-                await self.execute_client_command(writer, player, command)  # Execute the byte from the client
-            else:
-                await self.send_results_to_client(writer)  # Quit the game
-                self.num_connections -= 1
-                break
+            next_tick += self.config.tick_interval
+            await sleep(max(0.0, next_tick - loop.time()))
+            self.run_tick()
 
     """-------------------------- GAME DRIVER ---------------------------"""
 
@@ -167,16 +730,56 @@ class Game:
         managed by the 'manage_game_client' coroutine. If the maximum allowed number of connections is reached
         (2 players), the server will reject the connection and notify the client with a 0-length packet.
 
+        The address, listen backlog and SO_REUSEPORT come from the server's ServerConfig. If checkpointing is
+        configured, the live boards are checkpointed in the background while the server runs, and likewise finished
+        matches are written to the match history. Bots, if any, are stepped by a background task. In tick mode a
+        single background task runs the ticks, which also step the bots. Respawns of every room share one task. If an
+        admin socket is configured, the admin interface listens on it. If a replica prefix is configured, every room
+        publishes its board to a shared memory segment for read replicas in worker processes, removed once the server
+        has stopped. If a journal directory is configured, every room journals its events to a file there. With
+        matchmaking, a background task retries the waiting players every match interval.
+
         This method is the entry point for starting and running the game server using asynchronous coroutines.
+        It returns once the server has been drained, after writing any match results still queued.
         If an error occurs during server setup or while serving clients, it is caught and an error message is printed,
         but the server continues serving.
         """
         try:
-            server = await start_server(self.manage_game_client, constants.HOST, constants.PORT)
-            await server.serve_forever()
+            if self.checkpointer is not None:
+                self.checkpoint_task = create_task(self.checkpointer.run())
+            if self.history is not None:
+                self.history_task = create_task(self.history.run())
+            if self.respawner is not None:
+                self.respawn_task = create_task(self.respawner.run())
+            if self.config.tick_interval:
+                self.tick_task = create_task(self.run_ticks())
+            elif self.bot_runner.bots:
+                self.bot_task = create_task(self.bot_runner.run())
+            if self.matchmaker is not None:
+                self.match_task = create_task(self.run_matchmaking())
+            if self.config.admin_path is not None:
+                self.admin = await AdminServer(self).start(self.config.admin_path)
+            if self.config.journal_dir is not None:
+                for room in self.rooms.values():
+                    self.open_journal(room)
+            if self.config.replica_prefix is not None:
+                for room in self.rooms.values():
+                    room.replica = SharedBoard(self.config.replica_prefix, room.room_id, room.board)
+                    room.publish_update()
+            self.server = await start_server(self.manage_game_client, self.config.host, self.config.port,
+                                             backlog=self.config.backlog, reuse_port=self.config.reuse_port or None)
+            await self.stopped.wait()
+            if self.admin is not None:
+                self.admin.close()
+            for room in self.rooms.values():
+                self.close_room(room)
+            for task in [self.checkpoint_task, self.respawn_task, self.tick_task, self.bot_task, self.match_task]:
+                if task is not None:
+                    task.cancel()
+            if self.history is not None:
+                self.history.stop()
+                await self.history_task  # Writes the batch it holds before returning
+                await self.history.flush()
         except Exception as e:
             print("An unexpected error has occured occurred.")
             print(e)
-
-
-
@@ -0,0 +1,211 @@
+from asyncio import create_task, get_running_loop, open_connection, Queue, StreamReader, StreamReaderProtocol
+from collections import deque
+from struct import unpack
+from time import perf_counter_ns
+from typing import AsyncIterator, Iterable, Optional
+import sys
+from RttEstimator import RttEstimator
+from protocol import FrameReader, PING_REQUEST, PONG
+import constants
+
+
+class GameClient:
+    """
+    The GameClient class is a client library for the game server, shared by the command line client, bots and load
+    tests. Commands are written as soon as they are sent, without waiting for the answer to the previous command, and
+    a background task reads the server's answers as they arrive. Board updates are available from the updates()
+    async iterator and the results are returned by quit().
+    The server answers every command with exactly one frame, so the client keeps a queue of the kind of answer each
+    command in flight expects and routes every frame it reads accordingly.
+    Pings measure the round trip time to the server, kept in an RttEstimator; each ping reports the previous sample to
+    the server, which keeps its own estimate for the connection and sends it back with the answer.
+    """
+    COMMAND_BITS = {
+        constants.UP: 0b0010,
+        constants.LEFT: 0b0100,
+        constants.RIGHT: 0b0110,
+        constants.DOWN: 0b0011,
+        constants.QUIT: 0b0000,
+        constants.GAME: 0b1111,
+        constants.PING: 0b0111,
+    }
+
+    def __init__(self, host: str = '127.0.0.1', port: int = constants.PORT, codec_name: str = None):
+        """
+        Initialize a GameClient that is not connected yet.
+        :param host: The address of the game server.
+        :param port: The port of the game server.
+        :param codec_name: The codec to negotiate after connecting (raw, zlib or rle), None to keep the short header.
+        """
+        if codec_name is not None and codec_name not in constants.CODEC_NAMES:
+            raise ValueError(f"Codec must be one of {', '.join(constants.CODEC_NAMES)}")
+        self.host = host
+        self.port = port
+        self.codec_name = codec_name
+        self.frames = None
+        self.writer = None
+        self.player_id = None
+        self.expected = deque()
+        self.updates_queue = Queue()
+        self.results = None
+        self.read_task = None
+        self.pings = deque()
+        self.latency = RttEstimator()
+        self.server_latency = (0.0, 0.0)
+
+    async def connect(self) -> int:
+        """
+        Asynchronously connects to the server, receives the player id, negotiates the codec if one was requested and
+        starts reading the server's answers in the background.
+        :return: The player id assigned by the server.
+        :raises ConnectionError: If the game is full.
+        """
+        reader, self.writer = await open_connection(self.host, self.port)
+        self.frames = FrameReader(reader)
+        initial_response = await self.frames.read_frame()
+        if initial_response == b'':
+            self.writer.close()
+            raise ConnectionError("Error, the game is full")
+        self.player_id = unpack('!B', initial_response)[0]
+        if self.codec_name is not None:
+            self.writer.write(bytes([0x80 | (self.player_id << 2) | constants.CODEC_NAMES[self.codec_name]]))
+            self.frames.set_codec(unpack('!B', await self.frames.read_frame())[0])
+        self.results = get_running_loop().create_future()
+        self.read_task = create_task(self.read_answers())
+        return self.player_id
+
+    def get_command_byte(self, command: str) -> int:
+        """
+        Command Name ----> Byte
+        :param command: The name of the command.
+        :return: The command byte for this client's player: CCCC PP 00.
+        """
+        return (self.COMMAND_BITS[command] << 4) | (self.player_id << 2)
+
+    async def send_moves(self, commands: Iterable[str]) -> int:
+        """
+        Asynchronously sends a batch of movement or Game commands in a single write, without waiting for their
+        answers. The answers arrive as board updates.
+        :param commands: The commands to send, e.g. "UURDG".
+        :return: The number of commands sent.
+        :raises ValueError: If a command is not a movement or the Game command.
+        """
+        data = bytearray()
+        for command in commands:
+            if command in (constants.QUIT, constants.PING) or command not in self.COMMAND_BITS:
+                raise ValueError(f"Invalid command: {command}")
+            data.append(self.get_command_byte(command))
+        self.expected.extend([constants.GAME] * len(data))
+        self.writer.write(data)
+        await self.writer.drain()
+        return len(data)
+
+    async def ping(self) -> float:
+        """
+        Asynchronously measures the round trip time to the server with the PING command, and reports the previous
+        sample to the server with it. The time the server held the answer back, behind moves waiting for a tick, is
+        left out of the sample. The server's own estimate is kept in server_latency as (round trip time, jitter).
+        :return: The round trip time, in seconds.
+        """
+        answer = get_running_loop().create_future()
+        self.pings.append(answer)
+        self.expected.append(constants.PING)
+        request = PING_REQUEST.pack(perf_counter_ns() // 1000, int(self.latency.last * 1e6))
+        self.writer.write(bytes([self.get_command_byte(constants.PING)]) + request)
+        timestamp, held, srtt, jitter = PONG.unpack(await answer)
+        rtt = (perf_counter_ns() // 1000 - timestamp - held) / 1e6
+        self.latency.add_sample(rtt)
+        self.server_latency = (srtt / 1e6, jitter / 1e6)
+        return rtt
+
+    async def read_answers(self) -> None:
+        """
+        Asynchronously reads the server's answers until the results arrive or the connection closes. Board updates are
+        queued for updates(); the results complete the future returned by quit() and the answers to pings complete the
+        futures ping() waits for. Every frame that arrived with the same read is routed before reading again.
+        """
+        try:
+            while not self.results.done():
+                for payload in await self.frames.read_frames():
+                    expected = self.expected.popleft() if self.expected else constants.GAME
+                    if expected == constants.QUIT:
+                        self.results.set_result(payload.decode())
+                        break
+                    if expected == constants.PING:
+                        self.pings.popleft().set_result(payload)
+                        continue
+                    score_1, score_2 = unpack('!HH', payload[:4])
+                    self.updates_queue.put_nowait((score_1, score_2, payload[4:].decode()))
+        except (ConnectionError, EOFError) as e:
+            if not self.results.done():
+                self.results.set_exception(ConnectionError(f"Connection to the server was lost: {e}"))
+                self.results.exception()  # Only raised to a caller awaiting quit(), not logged as unhandled
+            while self.pings:
+                self.pings.popleft().set_exception(ConnectionError(f"Connection to the server was lost: {e}"))
+        finally:
+            self.updates_queue.put_nowait(None)
+
+    async def updates(self) -> AsyncIterator[tuple[int, int, str]]:
+        """
+        Asynchronously iterates over the board updates in the order the server sent them, until the client quits or
+        the connection closes.
+        :return: An async iterator of (Player 1 score, Player 2 score, board).
+        """
+        while True:
+            update = await self.updates_queue.get()
+            if update is None:
+                self.updates_queue.put_nowait(None)  # Let any other iterator finish too
+                return
+            yield update
+
+    async def quit(self) -> str:
+        """
+        Asynchronously quits the game. Answers to commands still in flight are read first and remain available from
+        updates().
+        :return: The results sent by the server.
+        """
+        self.expected.append(constants.QUIT)
+        self.writer.write(bytes([self.get_command_byte(constants.QUIT)]))
+        try:
+            return await self.results
+        finally:
+            self.writer.close()
+
+    async def print_updates(self) -> None:
+        """Asynchronously prints every board update as it arrives."""
+        async for score_1, score_2, board in self.updates():
+            print(f'Player 1: {score_1}, Player 2: {score_2}')
+            print(board)
+
+    async def play_from_stdin(self) -> Optional[str]:
+        """
+        Asynchronously plays the game from the command line. Standard input is read through the event loop, so commands
+        are sent as soon as a line is entered while updates are printed concurrently. Every character on a line is a
+        command, so "UUR" moves three times; a line holding Q quits and one holding P prints the round trip time once
+        the line's moves are sent.
+        :return: The results sent by the server, None if standard input was closed first.
+        """
+        loop = get_running_loop()
+        stdin = StreamReader()
+        await loop.connect_read_pipe(lambda: StreamReaderProtocol(stdin), sys.stdin)
+        printer = create_task(self.print_updates())
+        print(f"Welcome, your id is {self.player_id}")
+        print("Enter commands, (Q)uit, (G)ame, (U)p, (L)eft, (R)ight, (D)own, (P)ing: ")
+        try:
+            while line := await stdin.readline():
+                commands = [command for command in line.decode().strip().upper() if command in self.COMMAND_BITS]
+                if constants.QUIT in commands:
+                    results = await self.quit()
+                    await printer
+                    print(results)
+                    return results
+                moves = [command for command in commands if command != constants.PING]
+                if moves:
+                    await self.send_moves(moves)
+                if constants.PING in commands:
+                    rtt = await self.ping()
+                    print(f"Round trip: {rtt * 1000:.2f} ms, server estimate: {self.server_latency[0] * 1000:.2f} ms "
+                          f"(jitter {self.server_latency[1] * 1000:.2f} ms)")
+            return None
+        finally:
+            printer.cancel()
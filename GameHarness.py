@@ -0,0 +1,151 @@
+from asyncio import run_coroutine_threadsafe, sleep, Runner
+from socket import create_connection, socket
+from struct import unpack
+from threading import Thread
+from typing import Any, Callable
+from Game import Game
+from GameClient import GameClient
+from ServerConfig import ServerConfig
+import constants
+
+
+class GameHarness:
+    """
+    The GameHarness class runs a Game server inside the current process, for tests. The server listens on an ephemeral
+    port of 127.0.0.1 and runs its event loop on a background thread, so tests can talk to it with blocking sockets as
+    well as with a GameClient on their own event loop. Every harness has its own port and its own Game, so any number
+    of them can run at the same time, in one process or in parallel test processes.
+    The board is seeded, so a harness started with the same seed always deals the same board and player positions.
+    Commands are not rate limited unless the config given says so.
+    """
+    def __init__(self, seed: int = 0, **options):
+        """
+        Initialize a GameHarness that is not started yet.
+        :param seed: The seed of the board's treasure and player positions.
+        :param options: Further ServerConfig options, e.g. tick_interval or bot_seats.
+        """
+        options.setdefault("command_rate", 0)
+        self.config = ServerConfig(host='127.0.0.1', port=0, treasure_seed=seed, **options)
+        self.game = None
+        self.runner = None
+        self.loop = None
+        self.thread = None
+        self.port = None
+
+    def __enter__(self) -> 'GameHarness':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> 'GameHarness':
+        """
+        Starts the server on a background thread and waits until it accepts connections.
+        :return: The harness itself.
+        :raises RuntimeError: If the server did not start.
+        """
+        self.runner = Runner()
+        self.loop = self.runner.get_loop()
+        self.game = Game(self.config)
+        self.thread = Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        self.port = self.call(self.get_port).result(timeout=5)
+        return self
+
+    def serve(self) -> None:
+        """Runs the server on the harness' event loop until it stops, then cancels the connections still open."""
+        with self.runner:
+            self.runner.run(self.game.start())
+
+    async def get_port(self) -> int:
+        """
+        Asynchronously waits for the server to listen.
+        :return: The port the server listens on.
+        :raises RuntimeError: If the server stopped without listening.
+        """
+        while self.game.server is None:
+            if self.game.stopped.is_set():
+                raise RuntimeError("Server did not start")
+            await sleep(0.001)
+        return self.game.server.sockets[0].getsockname()[1]
+
+    def stop(self) -> None:
+        """Closes the server and every player connection, and waits for the server thread to finish."""
+        if self.thread is None:
+            return
+        self.call(self.shutdown).result(timeout=5)
+        self.thread.join(timeout=5)
+        self.thread = None
+
+    async def shutdown(self) -> None:
+        """Asynchronously closes the server and every player connection, so start() returns."""
+        if self.game.server is not None:
+            self.game.server.close()
+        for room in list(self.game.rooms.values()):
+            for writer in list(room.connections.values()):
+                writer.close()
+        self.game.stopped.set()
+
+    def call(self, function: Callable[..., Any], *args):
+        """
+        Runs a coroutine function on the server's event loop, the only safe place to touch the Game while it runs.
+        :param function: The coroutine function.
+        :param args: The arguments of the function.
+        :return: A concurrent.futures.Future of the result.
+        """
+        return run_coroutine_threadsafe(function(*args), self.loop)
+
+    # -------------------------------------------------- RAW SOCKETS ---------------------------------------------------
+    def connect(self) -> tuple[socket, int]:
+        """
+        Connects a blocking socket and receives the player id the server assigned.
+        :return: (The socket, the player id). The player id is 0 if the game is full.
+        """
+        sock = create_connection(('127.0.0.1', self.port), timeout=5)
+        payload = self.get_frame(sock)
+        return sock, payload[0] if payload else 0
+
+    @staticmethod
+    def get_bytes(sock: socket, num_bytes: int) -> bytes:
+        """
+        Receives a number of bytes, or fewer if the connection is closed first.
+        :param sock: The socket to receive from.
+        :param num_bytes: The number of bytes to receive.
+        :return: The bytes received.
+        """
+        data = bytearray()
+        while len(data) < num_bytes:
+            chunk = sock.recv(num_bytes - len(data))
+            if chunk == b'':
+                break
+            data += chunk
+        return bytes(data)
+
+    def get_frame(self, sock: socket) -> bytes:
+        """
+        Receives a short header frame.
+        :param sock: The socket to receive from.
+        :return: The payload, b'' if the connection was closed.
+        """
+        header = self.get_bytes(sock, constants.HEADER_LENGTH)
+        if len(header) < constants.HEADER_LENGTH:
+            return b''
+        return self.get_bytes(sock, unpack('!H', header)[0])
+
+    def send_command(self, sock: socket, command: int) -> bytes:
+        """
+        Sends a command byte and receives the answer.
+        :param sock: The socket of a player.
+        :param command: The command byte.
+        :return: The payload of the answer, b'' if the connection was closed.
+        """
+        sock.sendall(bytes([command]))
+        return self.get_frame(sock)
+
+    # -------------------------------------------------- GAME CLIENTS --------------------------------------------------
+    def client(self, codec_name: str = None) -> GameClient:
+        """
+        :param codec_name: The codec the client negotiates, None to keep the short header.
+        :return: A GameClient for this server, to be connected from the test's own event loop.
+        """
+        return GameClient('127.0.0.1', self.port, codec_name)
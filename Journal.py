@@ -0,0 +1,171 @@
+from mmap import mmap, ACCESS_READ
+from struct import Struct
+from time import time
+import os
+import constants
+
+"""
+Append-only journals of what happens in each room, one file per room. A journal file is laid out as follows (all
+integers little-endian):
+  - Header (HEADER_SIZE bytes): magic b'TRJL', format version (unsigned short), record size (unsigned short),
+                                room id (unsigned int), number of committed records (unsigned long long), padding.
+  - Records (24 bytes each): time (double, seconds since the epoch), kind (unsigned char), player name (7 bytes, zero
+             padded and truncated, empty for a respawn), row and col (unsigned shorts), value (unsigned int: the
+             treasure value for a collect or respawn, the player's score for a join or quit, 0 for a move).
+The file is preallocated and memory-mapped, so appending a record is two stores into the mapping and no system call.
+The committed count is stored after the record, so a reader never sees a record that is not completely written.
+A Board given a Journal appends every player joining, move, collected treasure and respawn to it.
+"""
+
+MAGIC = b'TRJL'
+VERSION = 1
+HEADER = Struct('<4sHHIQ')
+COMMITTED = Struct('<Q')
+COMMITTED_OFFSET = 12
+HEADER_SIZE = 32
+RECORD = Struct('<dB7sHHI')
+pack_record = RECORD.pack_into
+pack_committed = COMMITTED.pack_into
+
+
+def read_header(data) -> tuple[int, int]:
+    """
+    Validates the header of a journal.
+    :param data: The beginning of the journal file.
+    :return: (The room id, the number of committed records)
+    :raises ValueError: If the file is not a journal or was written by an unsupported format version.
+    """
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Error: Unsupported journal file")
+    magic, version, record_size, room_id, committed = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError("Error: Unsupported journal file")
+    return room_id, committed
+
+
+class Journal:
+    """
+    The Journal class appends the events of a room to its journal file: players joining, moving, collecting treasure
+    and quitting, and treasure respawning. Events are fixed-size records written straight into a preallocated memory
+    mapping of the file; the operating system writes them back to disk. When the preallocated records run out the file
+    is doubled, so the rare resize is the only system call on the write path.
+    """
+    JOIN = 1
+    MOVE = 2
+    COLLECT = 3
+    QUIT = 4
+    RESPAWN = 5
+    KINDS = {JOIN: "join", MOVE: "move", COLLECT: "collect", QUIT: "quit", RESPAWN: "respawn"}
+
+    def __init__(self, path: str, room_id: int, capacity: int = constants.JOURNAL_CAPACITY):
+        """
+        Initialize a Journal, creating the file or appending to the records already in it.
+        :param path: The path of the journal file.
+        :param room_id: The id of the room the journal records.
+        :param capacity: The number of records preallocated in a new file.
+        :raises ValueError: If the file exists but is not the journal of the room.
+        """
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, 'wb') as file:
+                file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, room_id, 0).ljust(HEADER_SIZE, b'\x00'))
+                file.truncate(HEADER_SIZE + max(1, capacity) * RECORD.size)
+        self.path = path
+        self.file = open(path, 'r+b')
+        self.mapped = mmap(self.file.fileno(), 0)
+        journal_room, self.committed = read_header(self.mapped)
+        if journal_room != room_id:
+            self.close()
+            raise ValueError(f"Error: Journal belongs to room {journal_room}")
+        self.capacity = (len(self.mapped) - HEADER_SIZE) // RECORD.size
+
+    def __len__(self) -> int:
+        """
+        :return: The number of records in the journal.
+        """
+        return self.committed
+
+    def append(self, kind: int, player_name: str, row: int, col: int, value: int = 0) -> None:
+        """
+        Appends an event to the journal.
+        :param kind: The kind of event: JOIN, MOVE, COLLECT, QUIT or RESPAWN.
+        :param player_name: The name of the player, '' for a respawn.
+        :param row: The row of the player or treasure.
+        :param col: The column of the player or treasure.
+        :param value: The treasure value, or the player's score for a join or quit.
+        """
+        committed = self.committed
+        if committed == self.capacity:
+            self.grow()
+        mapped = self.mapped
+        pack_record(mapped, HEADER_SIZE + RECORD.size * committed, time(), kind, player_name.encode(), row, col, value)
+        self.committed = committed = committed + 1
+        pack_committed(mapped, COMMITTED_OFFSET, committed)
+
+    def grow(self) -> None:
+        """Doubles the records preallocated in the file."""
+        self.capacity *= 2
+        self.mapped.resize(HEADER_SIZE + self.capacity * RECORD.size)
+
+    def flush(self) -> None:
+        """Writes the mapped records back to the file now rather than when the operating system chooses to."""
+        self.mapped.flush()
+
+    def close(self) -> None:
+        """Flushes and closes the journal."""
+        self.mapped.flush()
+        self.mapped.close()
+        self.file.close()
+
+
+class JournalReader:
+    """
+    The JournalReader class reads a journal while it is being written, from any process. It maps the file read-only
+    and remaps it only when the writer has grown the file past the mapping, so tailing the journal is a read of the
+    committed count and a slice of the mapping.
+    """
+    def __init__(self, path: str):
+        """
+        Initialize a JournalReader positioned at the first record.
+        :param path: The path of the journal file.
+        :raises ValueError: If the file is not a journal or was written by an unsupported format version.
+        """
+        self.file = open(path, 'rb')
+        self.mapped = mmap(self.file.fileno(), 0, access=ACCESS_READ)
+        self.room_id, _ = read_header(self.mapped)
+        self.position = 0
+
+    def get_committed(self) -> int:
+        """
+        :return: The number of records the writer has committed.
+        """
+        return COMMITTED.unpack_from(self.mapped, COMMITTED_OFFSET)[0]
+
+    def read(self, start: int = 0, stop: int = None) -> list[tuple[float, int, str, int, int, int]]:
+        """
+        Reads committed records.
+        :param start: The index of the first record.
+        :param stop: The index after the last record, the number of committed records by default.
+        :return: The (time, kind, player name, row, col, value) of each record.
+        """
+        committed = self.get_committed()
+        stop = committed if stop is None else min(stop, committed)
+        if HEADER_SIZE + stop * RECORD.size > len(self.mapped):  # The writer grew the file
+            self.mapped.close()
+            self.mapped = mmap(self.file.fileno(), 0, access=ACCESS_READ)
+        data = self.mapped[HEADER_SIZE + start * RECORD.size:HEADER_SIZE + stop * RECORD.size]
+        return [(at, kind, name.rstrip(b'\x00').decode(), row, col, value)
+                for at, kind, name, row, col, value in RECORD.iter_unpack(data)]
+
+    def tail(self) -> list[tuple[float, int, str, int, int, int]]:
+        """
+        Reads the records committed since the last tail.
+        :return: The (time, kind, player name, row, col, value) of each new record.
+        """
+        records = self.read(self.position)
+        self.position += len(records)
+        return records
+
+    def close(self) -> None:
+        """Closes the reader."""
+        self.mapped.close()
+        self.file.close()
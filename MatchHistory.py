@@ -0,0 +1,173 @@
+from asyncio import get_running_loop, Queue, QueueEmpty, wait_for, TimeoutError
+from concurrent.futures import ThreadPoolExecutor
+import sqlite3
+import time
+from Board import Board
+
+
+class MatchHistory:
+    """
+    The MatchHistory class stores the results of finished matches in a local SQLite database and answers leaderboard
+    and per-player history queries. Recording a match only puts a row on a queue; a background task writes the queued
+    rows in batches, one transaction per batch, on a dedicated thread so the game loop never waits on the disk.
+    The background task is stopped with stop(), which it only sees after every result recorded before it, so nothing
+    recorded is lost.
+    """
+    STOP = None  # Queued by stop: the background task writes what it holds and returns
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS matches (
+            id INTEGER PRIMARY KEY,
+            ended_at REAL NOT NULL,
+            duration REAL NOT NULL,
+            moves INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS match_players (
+            match_id INTEGER NOT NULL REFERENCES matches(id),
+            player TEXT NOT NULL,
+            score INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS match_players_by_score ON match_players (score DESC, match_id);
+        CREATE INDEX IF NOT EXISTS match_players_by_player ON match_players (player, match_id DESC);
+    """
+
+    def __init__(self, path: str, batch_size: int = 512, flush_interval: float = 1.0):
+        """
+        Initialize a MatchHistory backed by the database at path, creating the tables and indexes if needed.
+        :param path: The path of the SQLite database file.
+        :param batch_size: The maximum number of matches written in one transaction.
+        :param flush_interval: The maximum number of seconds a recorded match waits before it is written.
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = Queue()
+        self.batch = []  # The results the background task has taken off the queue and not yet handed to the thread
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='match-history')
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA cache_size=-65536")
+        self.connection.executescript(self.SCHEMA)
+        self.next_match_id = self.connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM matches").fetchone()[0]
+
+    def record(self, board: Board) -> None:
+        """
+        Queues the result of a finished match on the given board. Never blocks.
+        :param board: The Board the match was played on.
+        """
+        scores = [(player.get_name(), player.get_score()) for player in board.players]
+        self.pending.put_nowait((time.time(), board.get_duration(), board.num_moves, scores))
+
+    def write_batch(self, batch: list[tuple[float, float, int, list[tuple[str, int]]]]) -> None:
+        """
+        Writes a batch of match results in a single transaction. Runs on the history thread, which is the only writer,
+        so match ids are assigned here and both tables are filled with one executemany each.
+        :param batch: The queued (ended at, duration, moves, [(player, score)]) results.
+        """
+        matches = []
+        match_players = []
+        for match_id, (ended_at, duration, moves, scores) in enumerate(batch, self.next_match_id):
+            matches.append((match_id, ended_at, duration, moves))
+            match_players.extend((match_id, player, score) for player, score in scores)
+        with self.connection:
+            self.connection.executemany("INSERT INTO matches (id, ended_at, duration, moves) VALUES (?, ?, ?, ?)",
+                                        matches)
+            self.connection.executemany("INSERT INTO match_players (match_id, player, score) VALUES (?, ?, ?)",
+                                        match_players)
+        self.next_match_id += len(batch)
+
+    def stop(self) -> None:
+        """Asks the background task to write every result recorded so far and return."""
+        self.pending.put_nowait(self.STOP)
+
+    async def flush(self) -> None:
+        """
+        Asynchronously writes every recorded match result: the batch the background task is holding and everything
+        still queued. Batches are written in order on the history thread, so a batch the background task handed to the
+        thread before is written before these.
+        """
+        batch, self.batch = self.batch, []
+        if batch:
+            await get_running_loop().run_in_executor(self.executor, self.write_batch, batch)
+        while not self.pending.empty():
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    result = self.pending.get_nowait()
+                except QueueEmpty:
+                    break
+                if result is not self.STOP:
+                    batch.append(result)
+            await get_running_loop().run_in_executor(self.executor, self.write_batch, batch)
+
+    async def run(self) -> None:
+        """
+        Asynchronously writes queued match results until stopped. A batch is written as soon as it is full, or once
+        the oldest queued result has waited flush_interval seconds, or straight away when stop is called. The batch
+        being gathered is kept on the instance, so flush writes it too.
+        """
+        loop = get_running_loop()
+        stopping = False
+        while not stopping:
+            result = await self.pending.get()
+            if result is self.STOP:
+                break
+            self.batch = [result]
+            deadline = loop.time() + self.flush_interval
+            while len(self.batch) < self.batch_size:
+                try:
+                    result = self.pending.get_nowait()
+                except QueueEmpty:
+                    if loop.time() >= deadline:
+                        break
+                    try:
+                        result = await wait_for(self.pending.get(), deadline - loop.time())
+                    except TimeoutError:
+                        break
+                if result is self.STOP:
+                    stopping = True
+                    break
+                self.batch.append(result)
+            batch, self.batch = self.batch, []
+            if not batch:  # Taken by flush
+                continue
+            try:
+                await loop.run_in_executor(self.executor, self.write_batch, batch)
+            except sqlite3.Error as e:
+                print("Writing match history failed.")
+                print(e)
+
+    def query(self, sql: str, parameters: tuple) -> list[tuple]:
+        """
+        Runs a read query on the history thread's connection.
+        :param sql: The SELECT statement.
+        :param parameters: The statement's parameters.
+        :return: The rows of the result.
+        """
+        return self.connection.execute(sql, parameters).fetchall()
+
+    async def get_leaderboard(self, limit: int = 10) -> list[tuple[str, int, int]]:
+        """
+        Asynchronously retrieves the highest scores ever recorded, using the score index.
+        :param limit: The number of entries to return.
+        :return: A list of (player, score, match id), highest score first.
+        """
+        return await get_running_loop().run_in_executor(
+            self.executor, self.query,
+            "SELECT player, score, match_id FROM match_players ORDER BY score DESC, match_id LIMIT ?", (limit,))
+
+    async def get_player_history(self, player: str, limit: int = 10) -> list[tuple[int, int, float, float, int]]:
+        """
+        Asynchronously retrieves a player's most recent matches, using the player index.
+        :param player: The name of the player.
+        :param limit: The number of matches to return.
+        :return: A list of (match id, score, ended at, duration, moves), most recent first.
+        """
+        return await get_running_loop().run_in_executor(
+            self.executor, self.query,
+            "SELECT m.id, p.score, m.ended_at, m.duration, m.moves FROM match_players p "
+            "JOIN matches m ON m.id = p.match_id WHERE p.player = ? ORDER BY p.match_id DESC LIMIT ?", (player, limit))
+
+    def close(self) -> None:
+        """Closes the database connection and stops the history thread."""
+        self.executor.shutdown()
+        self.connection.close()
@@ -0,0 +1,273 @@
+from asyncio import Future
+from collections import deque
+from time import monotonic, perf_counter
+from typing import Optional
+import constants
+
+OFFSETS = {}
+
+
+class Ticket:
+    """
+    The Ticket class is one connection waiting to be matched: who it is, its skill rating and round trip time, and
+    when it started waiting.
+    """
+    def __init__(self, key: str, rating: float, rtt: float, enqueued_at: float = None, future: Future = None):
+        """
+        Initialize a Ticket.
+        :param key: The identity the rating belongs to, e.g. the client's address.
+        :param rating: The skill rating of the player.
+        :param rtt: The measured round trip time to the player, in seconds.
+        :param enqueued_at: The monotonic time the player started waiting, now by default.
+        :param future: Completed with the seat the player is given once matched, if anyone waits for it.
+        """
+        self.key = key
+        self.rating = rating
+        self.rtt = rtt
+        self.enqueued_at = enqueued_at if enqueued_at is not None else monotonic()
+        self.future = future
+        self.bucket = None
+
+
+class Matchmaker:
+    """
+    The Matchmaker class groups waiting players into matches of players with a similar skill rating and round trip
+    time. Waiting tickets are indexed by bucket, a cell of a grid of rating_bucket rating points by rtt_bucket seconds,
+    oldest first within a bucket. A match decision only looks at the buckets around a ticket, nearest first, so its cost
+    depends on how far the ticket may look rather than on how many players wait. A new ticket only matches within its
+    own bucket; the longer a ticket waits the more rings of buckets around it it accepts, one more every widen_interval,
+    and after max_wait it accepts anybody.
+    Ratings are Elo ratings kept per key and updated from the scores of every finished match. Round trip times measured
+    while a key plays are kept too, so the next ticket of the key starts from the measured time.
+    """
+    def __init__(self, group_size: int = constants.MAX_PLAYERS, rating_bucket: float = constants.RATING_BUCKET,
+                 rtt_bucket: float = constants.RTT_BUCKET, widen_interval: float = constants.MATCH_WIDEN_INTERVAL,
+                 max_wait: float = constants.MATCH_MAX_WAIT):
+        """
+        Initialize a Matchmaker with nobody waiting.
+        :param group_size: The number of players in a match.
+        :param rating_bucket: The rating points covered by a bucket.
+        :param rtt_bucket: The seconds of round trip time covered by a bucket.
+        :param widen_interval: The seconds of waiting after which a ticket accepts one more ring of buckets.
+        :param max_wait: The seconds of waiting after which a ticket accepts any other ticket.
+        :raises ValueError: If the group size is less than 2 or a bucket size or interval is not positive.
+        """
+        if group_size < 2:
+            raise ValueError("Group size must be at least 2")
+        if min(rating_bucket, rtt_bucket, widen_interval, max_wait) <= 0:
+            raise ValueError("Bucket sizes, widen interval and max wait must be greater than 0")
+        self.group_size = group_size
+        self.rating_bucket = rating_bucket
+        self.rtt_bucket = rtt_bucket
+        self.widen_interval = widen_interval
+        self.max_wait = max_wait
+        self.buckets = {}
+        self.waiting = 0
+        self.ratings = {}
+        self.rtts = {}
+        self.waits = deque(maxlen=1024)
+        self.matched = 0
+        self.decisions = 0
+        self.decision_time = 0.0
+
+    def __len__(self) -> int:
+        """
+        :return: The number of tickets waiting.
+        """
+        return self.waiting
+
+    def get_rating(self, key: str) -> float:
+        """
+        :param key: The identity of a player.
+        :return: The player's rating, INITIAL_RATING for a player without a finished match.
+        """
+        return self.ratings.get(key, constants.INITIAL_RATING)
+
+    def record_result(self, scores: list[tuple[str, int]]) -> None:
+        """
+        Updates the ratings of the players of a finished match: every pair of players is an Elo game won by the higher
+        score, a draw if the scores are equal. Players with the same key, e.g. two clients behind one address, are one
+        identity and do not play against each other.
+        :param scores: (key, score) of every player of the match.
+        """
+        ratings = {key: self.get_rating(key) for key, _ in scores}
+        changes = dict.fromkeys(ratings, 0.0)
+        for index, (key, score) in enumerate(scores):
+            for other, other_score in scores[index + 1:]:
+                if other == key:
+                    continue
+                expected = 1 / (1 + 10 ** ((ratings[other] - ratings[key]) / 400))
+                actual = 1.0 if score > other_score else 0.5 if score == other_score else 0.0
+                changes[key] += constants.RATING_K * (actual - expected)
+                changes[other] -= constants.RATING_K * (actual - expected)
+        for key, change in changes.items():
+            self.ratings[key] = ratings[key] + change
+
+    def get_rtt(self, key: str, default: float = 0.0) -> float:
+        """
+        :param key: The identity of a player.
+        :param default: The round trip time to use for a player that has not been measured yet.
+        :return: The player's last measured smoothed round trip time, in seconds.
+        """
+        return self.rtts.get(key, default)
+
+    def record_rtt(self, key: str, rtt: float) -> None:
+        """
+        Keeps a player's measured round trip time for their next ticket.
+        :param key: The identity of a player.
+        :param rtt: The smoothed round trip time, in seconds.
+        """
+        self.rtts[key] = rtt
+
+    def get_bucket(self, ticket: Ticket) -> tuple[int, int]:
+        """
+        :param ticket: A Ticket.
+        :return: The (rating, rtt) bucket of the ticket.
+        """
+        return int(ticket.rating // self.rating_bucket), int(ticket.rtt // self.rtt_bucket)
+
+    def get_radius(self, ticket: Ticket, now: float) -> Optional[int]:
+        """
+        :param ticket: A waiting Ticket.
+        :param now: The current monotonic time.
+        :return: How many rings of buckets around its own the ticket accepts, None for any bucket.
+        """
+        waited = now - ticket.enqueued_at
+        if waited >= self.max_wait:
+            return None
+        return int(waited // self.widen_interval)
+
+    @staticmethod
+    def get_offsets(radius: int) -> list[tuple[int, int]]:
+        """
+        Computes the bucket offsets within a radius, nearest ring first, or retrieves them if already computed.
+        :param radius: The radius, in buckets.
+        :return: The (rating, rtt) offsets of every bucket within the radius.
+        """
+        offsets = OFFSETS.get(radius)
+        if offsets is None:
+            offsets = sorted(((d_rating, d_rtt) for d_rating in range(-radius, radius + 1)
+                              for d_rtt in range(-radius, radius + 1)),
+                             key=lambda offset: (max(abs(offset[0]), abs(offset[1])), abs(offset[0]) + abs(offset[1])))
+            OFFSETS[radius] = offsets
+        return offsets
+
+    def get_candidate_buckets(self, bucket: tuple[int, int], radius: Optional[int]) -> list[tuple[int, int]]:
+        """
+        :param bucket: The bucket of a ticket.
+        :param radius: The rings of buckets the ticket accepts, None for any bucket.
+        :return: The occupied buckets within the radius, nearest first. When the radius covers more buckets than are
+                 occupied, the occupied buckets are filtered instead of every bucket in the radius being looked up.
+        """
+        rating, rtt = bucket
+        if radius is not None and (2 * radius + 1) ** 2 <= len(self.buckets):
+            candidates = [(rating + d_rating, rtt + d_rtt) for d_rating, d_rtt in self.get_offsets(radius)]
+            return [candidate for candidate in candidates if candidate in self.buckets]
+
+        def distance(other: tuple[int, int]) -> tuple[int, int]:
+            return max(abs(other[0] - rating), abs(other[1] - rtt)), abs(other[0] - rating) + abs(other[1] - rtt)
+
+        candidates = sorted(self.buckets, key=distance)
+        return [candidate for candidate in candidates if radius is None or distance(candidate)[0] <= radius]
+
+    def add(self, ticket: Ticket, now: float = None) -> Optional[list[Ticket]]:
+        """
+        Queues a ticket and tries to match it straight away.
+        :param ticket: The Ticket.
+        :param now: The current monotonic time, read from the clock if not given.
+        :return: The group of tickets matched, oldest first, None if the ticket is waiting.
+        """
+        ticket.bucket = self.get_bucket(ticket)
+        self.buckets.setdefault(ticket.bucket, {})[ticket] = None
+        self.waiting += 1
+        return self.match(ticket, monotonic() if now is None else now)
+
+    def remove(self, ticket: Ticket) -> bool:
+        """
+        Takes a ticket out of the queue, e.g. when its connection is lost while waiting.
+        :param ticket: The Ticket.
+        :return: True if the ticket was waiting, False if it was already matched or removed.
+        """
+        bucket = self.buckets.get(ticket.bucket)
+        if bucket is None or ticket not in bucket:
+            return False
+        del bucket[ticket]
+        if not bucket:
+            del self.buckets[ticket.bucket]
+        self.waiting -= 1
+        return True
+
+    def clear(self) -> list[Ticket]:
+        """
+        Takes every waiting ticket out of the queue, e.g. when the server stops matching players.
+        :return: The tickets that were waiting.
+        """
+        tickets = [ticket for bucket in self.buckets.values() for ticket in bucket]
+        self.buckets = {}
+        self.waiting = 0
+        return tickets
+
+    def match(self, ticket: Ticket, now: float) -> Optional[list[Ticket]]:
+        """
+        Makes one match decision: looks for enough partners for a waiting ticket in the buckets it accepts, oldest
+        tickets first within the nearest buckets, and takes the group out of the queue if there are enough.
+        :param ticket: A waiting Ticket.
+        :param now: The current monotonic time.
+        :return: The group of tickets matched, oldest first, None if there are not enough partners yet.
+        """
+        started = perf_counter()
+        partners = []
+        for bucket in self.get_candidate_buckets(ticket.bucket, self.get_radius(ticket, now)):
+            for other in self.buckets[bucket]:
+                if other is not ticket:
+                    partners.append(other)
+                    if len(partners) == self.group_size - 1:
+                        break
+            if len(partners) == self.group_size - 1:
+                break
+        group = None
+        if len(partners) == self.group_size - 1:
+            group = sorted([ticket] + partners, key=lambda member: member.enqueued_at)
+            for member in group:
+                self.remove(member)
+                self.waits.append(now - member.enqueued_at)
+            self.matched += 1
+        self.decisions += 1
+        self.decision_time += perf_counter() - started
+        return group
+
+    def sweep(self, now: float = None) -> list[list[Ticket]]:
+        """
+        Retries the oldest ticket of every occupied bucket, oldest first, with the radius its wait allows by now. Every
+        other ticket of a bucket is younger than its oldest, so it accepts no more buckets than the oldest does.
+        :param now: The current monotonic time, read from the clock if not given.
+        :return: The groups of tickets matched.
+        """
+        now = monotonic() if now is None else now
+        oldest = sorted((next(iter(bucket)) for bucket in self.buckets.values()), key=lambda ticket: ticket.enqueued_at)
+        groups = []
+        for ticket in oldest:
+            if ticket.bucket in self.buckets and ticket in self.buckets[ticket.bucket]:
+                group = self.match(ticket, now)
+                if group is not None:
+                    groups.append(group)
+        return groups
+
+    def get_metrics(self, now: float = None) -> dict:
+        """
+        :param now: The current monotonic time, read from the clock if not given.
+        :return: The queue depth, the longest current wait, the median and 99th percentile wait of recent matches, the
+                 number of matches made and the average time of a match decision in microseconds.
+        """
+        now = monotonic() if now is None else now
+        waits = sorted(self.waits)
+        longest = max((now - next(iter(bucket)).enqueued_at for bucket in self.buckets.values()), default=0.0)
+        return {
+            "waiting": self.waiting,
+            "buckets": len(self.buckets),
+            "longest_wait": longest,
+            "wait_p50": waits[len(waits) // 2] if waits else 0.0,
+            "wait_p99": waits[min(len(waits) - 1, len(waits) * 99 // 100)] if waits else 0.0,
+            "matched": self.matched,
+            "decision_us": self.decision_time / self.decisions * 1e6 if self.decisions else 0.0,
+        }
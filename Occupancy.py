@@ -0,0 +1,136 @@
+import constants
+
+MASKS = {}  # Movement masks of boards without walls, by length
+
+
+class Occupancy:
+    """
+    The Occupancy class keeps two bitsets of a board's cells, one of the cells holding a player and one of the cells
+    holding treasure. Cell row * length + col is bit row * length + col of each bitset, so checking whether a cell is
+    free, which neighbours of a cell are free, or which cells are empty is a handful of integer operations instead of a
+    walk over Tile objects.
+    The Tiles of a board update the bitsets whenever a player or treasure is added to or removed from them. The board's
+    edges and walls never change, so the cells each cell leads to are precomputed as masks.
+    """
+    def __init__(self, length: int, walls: int = 0, masks: tuple[dict[str, list[int]], list[int]] = None):
+        """
+        Initialize the bitsets of an empty board and precompute its movement masks.
+        :param length: The length of the board.
+        :param walls: The bitset of the cells that are walls.
+        :param masks: The movement masks of the board if already computed, e.g. kept by its Terrain.
+        :raises ValueError: If the length is less than 1.
+        """
+        if length < 1:
+            raise ValueError("Length of board must be at least 1")
+        self.length = length
+        self.full = (1 << (length * length)) - 1
+        self.walls = walls & self.full
+        self.players = 0
+        self.treasure = 0
+        self.steps, self.adjacent = masks if masks is not None else self.get_masks(length, self.walls)
+
+    @staticmethod
+    def get_masks(length: int, walls: int) -> tuple[dict[str, list[int]], list[int]]:
+        """
+        Computes the movement masks of a board, or retrieves them if a board of the same length without walls already
+        did. The masks are never modified, so boards share them. Only boards without walls share this cache: generated
+        terrain gives nearly every board different walls, so a Terrain keeps the masks of its walls itself and they
+        are freed with it.
+        :param length: The length of the board.
+        :param walls: The bitset of the cells that are walls.
+        :return: (For each direction, the bit of the cell a move from each cell leads to, 0 if it leads off the board or
+                 into a wall; for each cell, the bitset of every cell a move from it leads to)
+        """
+        masks = MASKS.get(length) if not walls else None
+        if masks is None:
+            steps = {direction: [0] * (length * length) for direction in constants.DIRECTIONS}
+            adjacent = [0] * (length * length)
+            for row in range(length):
+                for col in range(length):
+                    cell = row * length + col
+                    for direction, (d_row, d_col) in constants.DIRECTIONS.items():
+                        n_row, n_col = row + d_row, col + d_col
+                        if 0 <= n_row < length and 0 <= n_col < length and not walls >> (n_row * length + n_col) & 1:
+                            steps[direction][cell] = 1 << (n_row * length + n_col)
+                            adjacent[cell] |= steps[direction][cell]
+            masks = (steps, adjacent)
+            if not walls:
+                MASKS[length] = masks
+        return masks
+
+    def get_cell(self, row: int, col: int) -> int:
+        """
+        :param row: The row of a tile.
+        :param col: The column of a tile.
+        :return: The index of the tile's cell and bit.
+        """
+        return row * self.length + col
+
+    def add_player(self, cell: int) -> None:
+        """:param cell: The cell a player was added to."""
+        self.players |= 1 << cell
+
+    def remove_player(self, cell: int) -> None:
+        """:param cell: The cell a player was removed from."""
+        self.players &= ~(1 << cell)
+
+    def add_treasure(self, cell: int) -> None:
+        """:param cell: The cell a treasure was added to."""
+        self.treasure |= 1 << cell
+
+    def remove_treasure(self, cell: int) -> None:
+        """:param cell: The cell a treasure was removed from."""
+        self.treasure &= ~(1 << cell)
+
+    def can_move(self, cell: int, direction: str) -> bool:
+        """
+        Checks whether a player on a cell can move in a direction: the neighbouring cell is on the board, not a wall
+        and free of players. Bounds and walls are already folded into the cell's step mask.
+        :param cell: The cell of the player.
+        :param direction: The direction of the move.
+        :return: True if the move is possible, False otherwise, including for an invalid direction.
+        """
+        steps = self.steps.get(direction)
+        return steps is not None and bool(steps[cell] & ~self.players)
+
+    def get_step(self, cell: int, direction: str) -> int:
+        """
+        :param cell: A cell of the board.
+        :param direction: The direction of a move.
+        :return: The cell a move from the cell leads to, ignoring players; -1 if it leads off the board or into a wall.
+        """
+        return self.steps[direction][cell].bit_length() - 1
+
+    def get_free_neighbours(self, cell: int) -> int:
+        """
+        :param cell: A cell of the board.
+        :return: The bitset of the cells next to the cell that are neither walls nor hold a player.
+        """
+        return self.adjacent[cell] & ~self.players
+
+    def get_free_moves(self, cell: int) -> list[str]:
+        """
+        :param cell: The cell of a player.
+        :return: The directions the player can move in.
+        """
+        return [direction for direction in self.steps if self.can_move(cell, direction)]
+
+    def get_empty(self) -> int:
+        """
+        :return: The bitset of the cells, walls excepted, free of both players and treasure.
+        """
+        return self.full & ~(self.players | self.treasure | self.walls)
+
+    @staticmethod
+    def get_cells(bits: int) -> list[int]:
+        """
+        Bitset ----> Cells
+        :param bits: A bitset of cells.
+        :return: The cells in the bitset, in increasing order.
+        """
+        cells = []
+        while bits:
+            lowest = bits & -bits
+            cells.append(lowest.bit_length() - 1)
+            bits ^= lowest
+        return cells
@@ -0,0 +1,75 @@
+from asyncio import get_running_loop, sleep
+from typing import Callable
+from Board import Board
+from Tile import Tile
+from TimerWheel import TimerWheel
+from Treasure import Treasure
+import constants
+
+
+class Respawner:
+    """
+    The Respawner class puts collected treasure back on the board after a delay. Pending respawns of every board are
+    kept in a single TimerWheel driven by a single task, so the cost of a tick does not grow with the number of
+    pending respawns, only with the number that are due. A treasure respawns on the tile it was collected from if that
+    tile is empty by then, otherwise on a random empty tile.
+    """
+    def __init__(self, delay: float, resolution: float = constants.RESPAWN_RESOLUTION,
+                 on_respawn: Callable[[Board], None] = None):
+        """
+        Initialize a Respawner with no pending respawns.
+        :param delay: The number of seconds before a collected treasure respawns.
+        :param resolution: The number of seconds per tick of the timer wheel.
+        :param on_respawn: Called once per tick with every board that had treasure respawn, e.g. to publish the update.
+        :raises ValueError: If the delay is not positive.
+        """
+        if delay <= 0:
+            raise ValueError("Respawn delay must be greater than 0")
+        self.delay = delay
+        self.wheel = TimerWheel(resolution)
+        self.on_respawn = on_respawn
+
+    def watch(self, board: Board) -> None:
+        """
+        Starts respawning the treasure collected on a board.
+        :param board: The Board to watch.
+        """
+        board.add_collect_observer(self.treasure_collected)
+
+    def treasure_collected(self, board: Board, tile: Tile, treasure: Treasure) -> None:
+        """
+        Schedules a collected treasure to respawn. Called by the board.
+        :param board: The Board the treasure was collected on.
+        :param tile: The Tile the treasure was collected from.
+        :param treasure: The collected Treasure.
+        """
+        self.wheel.schedule(self.delay, (board, tile, treasure))
+
+    def advance(self, ticks: int) -> int:
+        """
+        Advances the timer wheel and respawns every treasure that is due.
+        :param ticks: The number of ticks to advance.
+        :return: The number of treasures that respawned.
+        """
+        respawned = 0
+        changed = {}
+        for board, tile, treasure in self.wheel.advance(ticks):
+            if board.respawn_treasure(treasure, tile):
+                respawned += 1
+                changed[id(board)] = board
+        if self.on_respawn is not None:
+            for board in changed.values():
+                self.on_respawn(board)
+        return respawned
+
+    async def run(self) -> None:
+        """
+        Asynchronously advances the timer wheel every tick, forever. Ticks are counted from a fixed start time, so
+        ticks missed while the event loop was busy are caught up on the next wake-up.
+        """
+        loop = get_running_loop()
+        start = loop.time()
+        while True:
+            await sleep(self.wheel.resolution)
+            due_tick = int((loop.time() - start) / self.wheel.resolution)
+            self.advance(due_tick - self.wheel.current_tick)
@@ -0,0 +1,222 @@
+from asyncio import get_running_loop, shield, Future, StreamWriter
+from struct import pack
+from time import monotonic
+from typing import Optional
+from Board import Board
+from Player import Player
+from RttEstimator import RttEstimator
+from SpectatorHub import SpectatorHub
+from Visibility import Visibility
+from protocol import FrameWriter
+import view
+import constants
+
+
+class Room:
+    """
+    The Room class is a single match: the Board it is played on and the spectators watching it. The room renders its
+    board at most once per change, and the rendered board is shared by every player response and spectator update.
+    In tick mode the room also collects the moves submitted for each tick, so they can be resolved together, and
+    holds back the answers to pings sent after them so they are not answered out of order. Other answers to a
+    connection with moves waiting wait for the tick too. A move from a connection with less delay than the room's
+    slowest connection joins a later tick, so that moves sent at the same time are resolved in the same tick.
+    The room keeps an index of its seats and the connection holding each, so it can be summarised without walking
+    its board, and the round trip time estimate of each seated connection. In fog of war mode each player is sent the
+    shared rendered board with what they cannot see hidden; spectators see the whole board. A room with a SharedBoard
+    publishes every update to its read replicas as well. Updates outside of ticks are scheduled rather than published
+    straight away, so every change made in one iteration of the event loop is published once.
+    """
+    def __init__(self, room_id: int, board: Board, seats: list[str] = None, fog_radius: int = 0):
+        """
+        Initialize a Room for the given board with no spectators and every seat free.
+        :param room_id: The id of the room.
+        :param board: The Board the match is played on.
+        :param seats: The names of the players connections can play as, both players by default.
+        :param fog_radius: How many cells away players can see, 0 to show players the whole board.
+        """
+        self.room_id = room_id
+        self.board = board
+        self.seats = seats if seats is not None else [constants.PLAYER_ONE_NAME, constants.PLAYER_TWO_NAME]
+        self.connections = {}
+        self.spectators = SpectatorHub()
+        self.rendered_version = -1
+        self.rendered = None
+        self.update_frame = None
+        self.tick = 0  # The number of ticks resolved
+        self.pending_moves = {}  # Tick ----> {Player name: direction}
+        self.answers = {}  # Tick ----> {FrameWriter: number of moves answered by the tick}
+        self.last_ticks = {}  # Player name ----> the tick of the player's latest move
+        self.waiting = {}  # FrameWriter ----> number of moves not answered yet
+        self.pending_pongs = {}
+        self.resolved: Optional[Future] = None  # Done once the next tick is resolved, created by the first waiter
+        self.latency = {}
+        self.visibility = Visibility(board.length, fog_radius) if fog_radius else None
+        self.replica = None
+        self.update_scheduled = False
+
+    def take_seat(self, writer: StreamWriter, seat: str = None) -> Optional[str]:
+        """
+        Gives a connection the first free seat, or the given seat if it is free.
+        :param writer: The StreamWriter of the connection.
+        :param seat: The name of the player whose seat the connection takes, None for the first free seat.
+        :return: The name of the player the connection plays as, None if the seat or every seat is taken.
+        """
+        for player in self.seats if seat is None else [seat]:
+            if player not in self.connections:
+                self.connections[player] = writer
+                return player
+        return None
+
+    def leave_seat(self, player: str) -> bool:
+        """
+        Frees a player's seat.
+        :param player: The name of the player.
+        :return: True if the seat was taken, False if it was already free.
+        """
+        self.latency.pop(player, None)
+        return self.connections.pop(player, None) is not None
+
+    def get_summary(self) -> dict:
+        """
+        Summarises the room from its index: connected players, spectators and scores.
+        :return: A dict describing the room.
+        """
+        return {
+            "room": self.room_id,
+            "players": sorted(self.connections),
+            "free_seats": len(self.seats) - len(self.connections),
+            "spectators": len(self.spectators),
+            "scores": {player.get_name(): player.get_score() for player in self.board.players},
+            "treasures": self.board.num_treasures,
+            "moves": self.board.num_moves,
+        }
+
+    def get_input_delay(self, player: str, tick_interval: float) -> int:
+        """
+        Retrieves how many ticks a player's moves are held back: the whole number of ticks by which the player's
+        connection is faster than the room's slowest connection.
+        :param player: The name of the player.
+        :param tick_interval: The number of seconds between ticks.
+        :return: The number of ticks, 0 for the slowest connection or a player without a connection.
+        """
+        latency = self.latency.get(player)
+        if latency is None or tick_interval <= 0:
+            return 0
+        slowest = max(estimate.get_delay() for estimate in self.latency.values())
+        return int((slowest - latency.get_delay()) / tick_interval)
+
+    def submit_move(self, player: str, direction: str, frames: FrameWriter = None, delay: int = 0) -> None:
+        """
+        Queues a player's move for the next tick, or delay ticks later, but never for a tick before the player's
+        previous move. A later move from the same player in the same tick replaces the earlier one. Every submitted
+        move is answered with one board update once its tick is resolved.
+        :param player: The name of the player moving.
+        :param direction: The direction the player wants to move in.
+        :param frames: The FrameWriter of the player's connection, None for a player without a connection (a bot).
+        :param delay: The number of ticks the move is held back, see get_input_delay.
+        """
+        tick = max(self.tick + 1 + delay, self.last_ticks.get(player, 0))
+        self.last_ticks[player] = tick
+        self.pending_moves.setdefault(tick, {})[player] = direction
+        if frames is not None:
+            answers = self.answers.setdefault(tick, {})
+            answers[frames] = answers.get(frames, 0) + 1
+            self.waiting[frames] = self.waiting.get(frames, 0) + 1
+
+    def hold_pong(self, frames: FrameWriter, timestamp: int, latency: RttEstimator) -> None:
+        """
+        Holds back the answer to a ping until the ticks answering the connection's earlier moves have been resolved.
+        :param frames: The FrameWriter of the connection that sent the ping.
+        :param timestamp: The client timestamp to echo.
+        :param latency: The RttEstimator of the connection.
+        """
+        self.pending_pongs.setdefault(frames, []).append((timestamp, monotonic(), latency))
+
+    async def wait_for_tick(self, frames: FrameWriter) -> None:
+        """
+        Asynchronously waits until the ticks answering a connection's waiting moves have been resolved, so an answer
+        written afterwards follows theirs. Returns straight away if the connection has no moves waiting.
+        :param frames: The FrameWriter of the connection.
+        """
+        while frames in self.waiting:
+            if self.resolved is None:
+                self.resolved = get_running_loop().create_future()
+            await shield(self.resolved)
+
+    def resolve_tick(self) -> tuple[list[str], dict[FrameWriter, int]]:
+        """
+        Resolves every move submitted for the next tick together on the board and starts a new tick.
+        :return: (The names of the players that moved, the connections waiting for an update with how many each)
+        """
+        self.tick += 1
+        moves = self.pending_moves.pop(self.tick, None)
+        moved = self.board.resolve_moves(moves) if moves else []
+        waiting = self.answers.pop(self.tick, {})
+        for frames, count in waiting.items():
+            if self.waiting[frames] == count:
+                del self.waiting[frames]
+            else:
+                self.waiting[frames] -= count
+        if self.resolved is not None:
+            self.resolved.set_result(None)  # The waiters resume after the tick's answers are written
+            self.resolved = None
+        return moved, waiting
+
+    def get_board_payload(self) -> tuple[int, int, bytes]:
+        """
+        Retrieves the scores of both players and the encoded board, rendering the board only if it changed since the
+        last call.
+        :return: (Player 1 score, Player 2 score, board as a binary string)
+        """
+        if self.rendered_version != self.board.version:
+            board = view.render(self.board)
+            player_1_score = self.board.find_player_by_name(constants.PLAYER_ONE_NAME).get_score()
+            player_2_score = self.board.find_player_by_name(constants.PLAYER_TWO_NAME).get_score()
+            self.rendered = (player_1_score, player_2_score, board)
+            self.rendered_version = self.board.version
+            self.update_frame = None
+        return self.rendered
+
+    def get_player_payload(self, player: Player) -> tuple[int, int, bytes]:
+        """
+        Retrieves the scores of both players and the encoded board as one player sees it: with fog of war, the cells out
+        of the player's sight are hidden.
+        :param player: The Player the payload is for.
+        :return: (Player 1 score, Player 2 score, board as a binary string)
+        """
+        player_1_score, player_2_score, board = self.get_board_payload()
+        if self.visibility is None:
+            return player_1_score, player_2_score, board
+        return player_1_score, player_2_score, self.visibility.render(player, board)
+
+    def get_update_frame(self) -> bytes:
+        """
+        Retrieves the board update as a complete frame (short length header, both scores and the board), built once per
+        change and shared by every spectator.
+        :return: The update frame.
+        """
+        player_1_score, player_2_score, board = self.get_board_payload()
+        if self.update_frame is None:
+            self.update_frame = pack('!HHH', 4 + len(board), player_1_score, player_2_score) + board
+        return self.update_frame
+
+    def schedule_update(self) -> None:
+        """
+        Publishes the board on the next iteration of the event loop, unless that is already scheduled, and only if
+        anyone is watching or the room has a SharedBoard.
+        """
+        if not self.update_scheduled and (self.spectators or self.replica is not None):
+            self.update_scheduled = True
+            get_running_loop().call_soon(self.publish_scheduled_update)
+
+    def publish_scheduled_update(self) -> None:
+        """Publishes the update scheduled by schedule_update."""
+        self.update_scheduled = False
+        self.publish_update()
+
+    def publish_update(self) -> None:
+        """Sends the current board to every spectator, if anyone is watching, and to the room's SharedBoard, if any."""
+        if self.spectators:
+            self.spectators.publish(self.get_update_frame())
+        if self.replica is not None:
+            self.replica.publish(self.board, self.get_board_payload())
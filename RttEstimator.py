@@ -0,0 +1,61 @@
+import constants
+
+
+class RttEstimator:
+    """
+    The RttEstimator class tracks the round trip time of one connection the way TCP does (RFC 6298): the smoothed round
+    trip time is an exponentially weighted moving average of the samples, and the jitter is the moving average of how
+    far each sample falls from it. Adding a sample is O(1) and keeps no history, so every connection can have one.
+    """
+    def __init__(self, alpha: float = constants.RTT_ALPHA, beta: float = constants.RTT_BETA):
+        """
+        Initialize an RttEstimator without samples.
+        :param alpha: The weight of a new sample in the smoothed round trip time.
+        :param beta: The weight of a new sample's deviation in the jitter.
+        :raises ValueError: If a weight is not between 0 and 1.
+        """
+        if not 0 < alpha <= 1 or not 0 < beta <= 1:
+            raise ValueError("Weights must be between 0 and 1")
+        self.alpha = alpha
+        self.beta = beta
+        self.srtt = 0.0
+        self.jitter = 0.0
+        self.last = 0.0
+        self.samples = 0
+
+    def add_sample(self, rtt: float) -> bool:
+        """
+        Adds a round trip time sample. Samples that are not positive or longer than MAX_RTT_SAMPLE are ignored, so a
+        bogus sample cannot skew the estimate for long.
+        :param rtt: The measured round trip time, in seconds.
+        :return: True if the sample was used, False if it was ignored.
+        """
+        if not 0 < rtt <= constants.MAX_RTT_SAMPLE:
+            return False
+        if self.samples == 0:
+            self.srtt = rtt
+            self.jitter = rtt / 2
+        else:
+            self.jitter += self.beta * (abs(self.srtt - rtt) - self.jitter)
+            self.srtt += self.alpha * (rtt - self.srtt)
+        self.last = rtt
+        self.samples += 1
+        return True
+
+    def get_delay(self) -> float:
+        """
+        :return: How long a command may spend on the way to the server, in seconds: half a round trip plus twice the
+                 jitter.
+        """
+        return self.srtt / 2 + 2 * self.jitter
+
+    def get_summary(self) -> dict:
+        """
+        :return: The smoothed round trip time, jitter and last sample in milliseconds, and the number of samples.
+        """
+        return {
+            "srtt_ms": round(self.srtt * 1000, 3),
+            "jitter_ms": round(self.jitter * 1000, 3),
+            "last_ms": round(self.last * 1000, 3),
+            "samples": self.samples,
+        }
@@ -0,0 +1,182 @@
+from argparse import ArgumentParser
+from typing import Callable, Mapping, Optional, Sequence
+import asyncio
+from treasure_generation import DISTRIBUTIONS
+import constants
+
+
+class ServerConfig:
+    """
+    The ServerConfig class holds the network settings of the game server: the address it listens on, the listen
+    backlog, socket options, the event loop implementation, where live boards and match results are stored, how many
+    seats bots fill, the tick interval, how treasure is generated and respawned, where the admin socket is, the
+    abuse protection limits, the terrain of the board, the fog of war, the shared memory read replicas, the event
+    journals and matchmaking. Settings are read from command line arguments, falling back to GAME_* environment
+    variables and then to the defaults in constants.py.
+    """
+    def __init__(self, *, host: str = constants.HOST, port: int = constants.PORT, backlog: int = constants.BACKLOG,
+                 reuse_port: bool = False, tcp_nodelay: bool = True, event_loop: str = constants.LOOP_AUTO,
+                 checkpoint_path: str = None, checkpoint_interval: float = constants.CHECKPOINT_INTERVAL,
+                 history_path: str = None, bot_seats: int = 0, tick_interval: float = 0,
+                 treasure_distribution: str = "uniform", treasure_seed: int = None, respawn_delay: float = 0,
+                 admin_path: str = None, command_rate: float = constants.COMMAND_RATE,
+                 command_burst: int = constants.COMMAND_BURST, max_renders: int = constants.MAX_RENDERS,
+                 max_strikes: int = constants.MAX_STRIKES, terrain_map: str = None, terrain_density: float = 0,
+                 fog_radius: int = 0, replica_prefix: str = None, journal_dir: str = None,
+                 matchmaking: bool = False):
+        """
+        Initialize a ServerConfig with the given settings, which are passed by keyword.
+        :param host: The address the server listens on ('' for all interfaces).
+        :param port: The TCP port the server listens on, 0 for an ephemeral port.
+        :param backlog: The maximum number of queued connections passed to listen().
+        :param reuse_port: Whether to set SO_REUSEPORT so several server processes can share the port.
+        :param tcp_nodelay: Whether to set TCP_NODELAY on client connections so small frames are not delayed.
+        :param event_loop: The event loop to run on: "asyncio", "uvloop" or "auto" (uvloop when installed).
+        :param checkpoint_path: The file live boards are checkpointed to and restored from, None to disable.
+        :param checkpoint_interval: The number of seconds between checkpoints.
+        :param history_path: The SQLite database finished matches are recorded in, None to disable.
+        :param bot_seats: The number of player seats taken by server-side bots, starting from the last seat.
+        :param tick_interval: The number of seconds between ticks, in which moves are collected and resolved together.
+                              0 applies every move as soon as it arrives.
+        :param treasure_distribution: The treasure distribution: "uniform", "weighted", "clustered" or "hotspot".
+        :param treasure_seed: The seed of the treasure generator, None for different boards on every start.
+        :param respawn_delay: The number of seconds before collected treasure respawns, 0 to never respawn.
+        :param admin_path: The Unix socket the admin interface listens on, None to disable.
+        :param command_rate: The number of commands per second each connection may send, 0 for no limit.
+        :param command_burst: The number of commands a connection may send at once before being paced.
+        :param max_renders: The maximum number of board responses being built and sent at the same time.
+        :param max_strikes: The number of invalid commands from an address after which its connections are refused.
+        :param terrain_map: The map file the board's terrain is loaded from, None for generated or open terrain.
+        :param terrain_density: Without a map file, the fraction of cells generated as walls or mud, 0 for open ground.
+        :param fog_radius: How many cells away players can see in fog of war mode, 0 to show players the whole board.
+        :param replica_prefix: The name prefix of the shared memory segments rooms publish their boards to for read
+                               replicas, None to disable.
+        :param journal_dir: The directory each room's event journal is written to, None to disable.
+        :param matchmaking: Whether to queue connecting players and give every match a room of its own, rather than
+                            seating the first players to connect and rejecting the others.
+        :raises ValueError: If the port is outside 0 to 65535, the backlog is less than 1, the event loop is unknown,
+                            the checkpoint interval is not positive, the bot seats are not between 0 and MAX_PLAYERS,
+                            the tick interval, respawn delay or command rate is negative, the treasure distribution
+                            is unknown, the command burst, max renders or max strikes is less than 1, the terrain
+                            density is not between 0 and TERRAIN_MAX_DENSITY or the fog radius is negative.
+        """
+        if port < 0 or port > 65535:
+            raise ValueError("Port must be between 0 and 65535")
+        if backlog < 1:
+            raise ValueError("Backlog must be at least 1")
+        if event_loop not in constants.EVENT_LOOPS:
+            raise ValueError(f"Event loop must be one of {', '.join(constants.EVENT_LOOPS)}")
+        if checkpoint_interval <= 0:
+            raise ValueError("Checkpoint interval must be greater than 0")
+        if bot_seats < 0 or bot_seats > constants.MAX_PLAYERS:
+            raise ValueError(f"Bot seats must be between 0 and {constants.MAX_PLAYERS}")
+        if tick_interval < 0:
+            raise ValueError("Tick interval must be at least 0")
+        if respawn_delay < 0:
+            raise ValueError("Respawn delay must be at least 0")
+        if command_rate < 0:
+            raise ValueError("Command rate must be at least 0")
+        if command_burst < 1 or max_renders < 1 or max_strikes < 1:
+            raise ValueError("Command burst, max renders and max strikes must be at least 1")
+        if terrain_density < 0 or terrain_density > constants.TERRAIN_MAX_DENSITY:
+            raise ValueError(f"Terrain density must be between 0 and {constants.TERRAIN_MAX_DENSITY}")
+        if fog_radius < 0:
+            raise ValueError("Fog radius must be at least 0")
+        if treasure_distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Treasure distribution must be one of {', '.join(DISTRIBUTIONS)}")
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.reuse_port = reuse_port
+        self.tcp_nodelay = tcp_nodelay
+        self.event_loop = event_loop
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.history_path = history_path
+        self.bot_seats = bot_seats
+        self.tick_interval = tick_interval
+        self.treasure_distribution = treasure_distribution
+        self.treasure_seed = treasure_seed
+        self.respawn_delay = respawn_delay
+        self.admin_path = admin_path
+        self.command_rate = command_rate
+        self.command_burst = command_burst
+        self.max_renders = max_renders
+        self.max_strikes = max_strikes
+        self.terrain_map = terrain_map
+        self.terrain_density = terrain_density
+        self.fog_radius = fog_radius
+        self.replica_prefix = replica_prefix
+        self.journal_dir = journal_dir
+        self.matchmaking = matchmaking
+
+    @classmethod
+    def from_sources(cls, args: Sequence[str], environ: Mapping[str, str]) -> 'ServerConfig':
+        """
+        Builds a ServerConfig from command line arguments and environment variables. Arguments take priority over the
+        GAME_HOST, GAME_PORT, GAME_BACKLOG, GAME_REUSE_PORT, GAME_TCP_NODELAY, GAME_EVENT_LOOP, GAME_CHECKPOINT_PATH,
+        GAME_CHECKPOINT_INTERVAL, GAME_HISTORY_PATH, GAME_BOT_SEATS, GAME_TICK_INTERVAL,
+        GAME_TREASURE_DISTRIBUTION, GAME_TREASURE_SEED, GAME_RESPAWN_DELAY,
+        GAME_ADMIN_PATH, GAME_COMMAND_RATE, GAME_COMMAND_BURST, GAME_MAX_RENDERS, GAME_MAX_STRIKES,
+        GAME_TERRAIN_MAP, GAME_TERRAIN_DENSITY, GAME_FOG_RADIUS, GAME_REPLICA_PREFIX,
+        GAME_JOURNAL_DIR and GAME_MATCHMAKING variables.
+        :param args: The command line arguments, without the program name.
+        :param environ: The environment variables.
+        :return: The ServerConfig described by the arguments and environment.
+        """
+        def env_flag(name: str, default: bool) -> bool:
+            return environ.get(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+        parser = ArgumentParser(description="Treasure hunting game server")
+        parser.add_argument("--host", default=environ.get("GAME_HOST", constants.HOST))
+        parser.add_argument("--port", type=int, default=int(environ.get("GAME_PORT", constants.PORT)))
+        parser.add_argument("--backlog", type=int, default=int(environ.get("GAME_BACKLOG", constants.BACKLOG)))
+        parser.add_argument("--reuse-port", action="store_true", default=env_flag("GAME_REUSE_PORT", False))
+        parser.add_argument("--no-tcp-nodelay", dest="tcp_nodelay", action="store_false",
+                            default=env_flag("GAME_TCP_NODELAY", True))
+        parser.add_argument("--event-loop", choices=constants.EVENT_LOOPS,
+                            default=environ.get("GAME_EVENT_LOOP", constants.LOOP_AUTO))
+        parser.add_argument("--checkpoint-path", default=environ.get("GAME_CHECKPOINT_PATH"))
+        parser.add_argument("--checkpoint-interval", type=float,
+                            default=float(environ.get("GAME_CHECKPOINT_INTERVAL", constants.CHECKPOINT_INTERVAL)))
+        parser.add_argument("--history-path", default=environ.get("GAME_HISTORY_PATH"))
+        parser.add_argument("--bot-seats", type=int, default=int(environ.get("GAME_BOT_SEATS", 0)))
+        parser.add_argument("--tick-interval", type=float, default=float(environ.get("GAME_TICK_INTERVAL", 0)))
+        parser.add_argument("--treasure-distribution", choices=list(DISTRIBUTIONS),
+                            default=environ.get("GAME_TREASURE_DISTRIBUTION", "uniform"))
+        treasure_seed = environ.get("GAME_TREASURE_SEED")
+        parser.add_argument("--treasure-seed", type=int, default=int(treasure_seed) if treasure_seed else None)
+        parser.add_argument("--respawn-delay", type=float, default=float(environ.get("GAME_RESPAWN_DELAY", 0)))
+        parser.add_argument("--admin-path", default=environ.get("GAME_ADMIN_PATH"))
+        parser.add_argument("--command-rate", type=float,
+                            default=float(environ.get("GAME_COMMAND_RATE", constants.COMMAND_RATE)))
+        parser.add_argument("--command-burst", type=int,
+                            default=int(environ.get("GAME_COMMAND_BURST", constants.COMMAND_BURST)))
+        parser.add_argument("--max-renders", type=int,
+                            default=int(environ.get("GAME_MAX_RENDERS", constants.MAX_RENDERS)))
+        parser.add_argument("--max-strikes", type=int,
+                            default=int(environ.get("GAME_MAX_STRIKES", constants.MAX_STRIKES)))
+        parser.add_argument("--terrain-map", default=environ.get("GAME_TERRAIN_MAP"))
+        parser.add_argument("--terrain-density", type=float, default=float(environ.get("GAME_TERRAIN_DENSITY", 0)))
+        parser.add_argument("--fog-radius", type=int, default=int(environ.get("GAME_FOG_RADIUS", 0)))
+        parser.add_argument("--replica-prefix", default=environ.get("GAME_REPLICA_PREFIX"))
+        parser.add_argument("--journal-dir", default=environ.get("GAME_JOURNAL_DIR"))
+        parser.add_argument("--matchmaking", action="store_true", default=env_flag("GAME_MATCHMAKING", False))
+        parsed = parser.parse_args(args)
+        return cls(**vars(parsed))
+
+    def get_loop_factory(self) -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+        """
+        Retrieves the factory for the configured event loop, for use with asyncio.Runner. When uvloop is requested (or
+        "auto" is configured) but uvloop is not installed, the stock asyncio loop is used instead.
+        :return: uvloop.new_event_loop, or None for the default asyncio event loop.
+        """
+        if self.event_loop == constants.LOOP_ASYNCIO:
+            return None
+        try:
+            import uvloop
+        except ImportError:
+            if self.event_loop == constants.LOOP_UVLOOP:
+                print("uvloop is not installed, falling back to asyncio")
+            return None
+        return uvloop.new_event_loop
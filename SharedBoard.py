@@ -0,0 +1,174 @@
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from struct import pack, Struct
+from time import sleep
+from Board import Board
+from checkpoint import BOARD_HEADER, PLAYER_RECORD, decode_board, encode_board
+import constants
+
+"""
+Read replicas of live boards in shared memory. The game process is the single writer of one segment per room; worker
+processes map the segment and read consistent snapshots of the board from it without asking the game process, so
+spectators, admin queries and analytics can be served off the game's event loop. A segment is laid out as follows
+(all integers little-endian):
+  - Header:   sequence (unsigned long long), board version (unsigned long long), payload length and record length
+              (unsigned ints).
+  - Payload:  both scores (network order unsigned shorts) followed by the rendered board, as sent to clients.
+  - Record:   the board's checkpoint record, as written by checkpoint.encode_board.
+The sequence is a seqlock: the writer makes it odd before changing the segment, rest of the header included, and
+stores the even sequence on its own once everything else is written. A reader copies the snapshot out and only keeps it
+if the sequence was the same even number before and after the copy.
+"""
+
+HEADER = Struct('<QQII')
+SEQUENCE = Struct('<Q')
+CONTENTS = Struct('<QII')  # The rest of the header: board version, payload length and record length
+CREATED = set()  # Names of the segments created by this process
+
+
+def get_segment_name(prefix: str, room_id: int) -> str:
+    """
+    :param prefix: The name prefix of the replica segments, from the server config.
+    :param room_id: The id of a room.
+    :return: The name of the room's shared memory segment.
+    """
+    return f"{prefix}_{room_id}"
+
+
+class SharedBoard:
+    """
+    The SharedBoard class publishes a room's board into a shared memory segment, for BoardReplica readers in other
+    processes. Publishing copies the rendered board and the encoded board into the segment under the seqlock; it never
+    waits for readers, and a board that has not changed since the last publish is not copied again.
+    """
+    def __init__(self, prefix: str, room_id: int, board: Board, capacity: int = None):
+        """
+        Initialize a SharedBoard, creating the room's segment, and replacing a stale segment of the same name left by a
+        previous run.
+        :param prefix: The name prefix of the replica segments.
+        :param room_id: The id of the room.
+        :param board: The Board of the room, used to size the segment.
+        :param capacity: The number of bytes of the segment, large enough for any state of the board by default.
+        """
+        self.name = get_segment_name(prefix, room_id)
+        self.room_id = room_id
+        size = HEADER.size + (capacity if capacity is not None else self.get_capacity(board))
+        try:
+            self.memory = SharedMemory(self.name, create=True, size=size)
+        except FileExistsError:
+            SharedMemory(self.name).unlink()
+            self.memory = SharedMemory(self.name, create=True, size=size)
+        CREATED.add(self.name)
+        self.sequence = 0
+        self.version = None
+
+    @staticmethod
+    def get_capacity(board: Board) -> int:
+        """
+        :param board: A Board.
+        :return: The number of bytes the board's payload and record can take, whatever treasure and players it holds.
+        """
+        names = [len(player.get_name().encode()) for player in board.players]
+        cell = max([len(str(board.max_treasure)), len(constants.WALL_DESCRIPTION)] + names) + 1
+        num_players = max(len(board.players), constants.MAX_PLAYERS)
+        payload = 4 + board.length * (board.length * cell + 1)
+        record = BOARD_HEADER.size + 3 * board.length * board.length + 1 + num_players * (PLAYER_RECORD.size + 255)
+        return payload + record
+
+    def publish(self, board: Board, payload: tuple[int, int, bytes]) -> bool:
+        """
+        Writes the board into the segment, unless it has not changed since the last publish.
+        :param board: The Board of the room.
+        :param payload: (Player 1 score, Player 2 score, rendered board), as built by the room.
+        :return: True if the segment was written, False if it was already up to date.
+        :raises ValueError: If the board does not fit in the segment.
+        """
+        if board.version == self.version:
+            return False
+        player_1_score, player_2_score, rendered = payload
+        scores = pack('!HH', player_1_score, player_2_score)
+        record = encode_board(self.room_id, board)
+        payload_length = len(scores) + len(rendered)
+        end = HEADER.size + payload_length + len(record)
+        if end > self.memory.size:
+            raise ValueError(f"Board of room {self.room_id} does not fit in its replica segment")
+
+        buffer = self.memory.buf
+        self.store_sequence(self.sequence + 1)  # Odd: readers retry until the write is done
+        buffer[HEADER.size:HEADER.size + len(scores)] = scores
+        buffer[HEADER.size + len(scores):HEADER.size + payload_length] = rendered
+        buffer[HEADER.size + payload_length:end] = record
+        CONTENTS.pack_into(buffer, SEQUENCE.size, board.version, payload_length, len(record))
+        self.store_sequence(self.sequence + 1)  # Even again, and only once the lengths match the contents
+        self.version = board.version
+        return True
+
+    def store_sequence(self, sequence: int) -> None:
+        """
+        Stores the sequence at the start of the segment, on its own.
+        :param sequence: The new sequence, odd while a write is in progress.
+        """
+        SEQUENCE.pack_into(self.memory.buf, 0, sequence)
+        self.sequence = sequence
+
+    def close(self) -> None:
+        """Closes and removes the segment. Readers still attached keep their mapping until they close it."""
+        self.memory.close()
+        self.memory.unlink()
+        CREATED.discard(self.name)
+
+
+class BoardReplica:
+    """
+    The BoardReplica class is the read side of a SharedBoard, for worker processes: it maps a room's segment read-only
+    by convention and reads consistent snapshots from it. Reading takes one copy out of shared memory and no system
+    call, and decoding the board is left to the callers that need a Board rather than the rendered payload.
+    """
+    def __init__(self, prefix: str, room_id: int):
+        """
+        Initialize a BoardReplica attached to a room's segment.
+        :param prefix: The name prefix of the replica segments.
+        :param room_id: The id of the room.
+        :raises FileNotFoundError: If the game process has not created the segment.
+        """
+        name = get_segment_name(prefix, room_id)
+        self.memory = SharedMemory(name)
+        if name not in CREATED:  # Attaching registers the segment to be removed when this process exits
+            resource_tracker.unregister(self.memory._name, "shared_memory")
+        self.retries = 0
+
+    def read(self) -> tuple[int, bytes, memoryview]:
+        """
+        Reads a consistent snapshot, retrying while the writer is changing the segment.
+        :return: (Board version, payload, record), or (0, b'', an empty view) if nothing was published yet.
+                 The record is a view of the private copy, ready for checkpoint.decode_board.
+        """
+        buffer = self.memory.buf
+        while True:
+            sequence, version, payload_length, record_length = HEADER.unpack_from(buffer, 0)
+            if sequence % 2 == 0:
+                end = HEADER.size + payload_length + record_length
+                snapshot = bytes(buffer[HEADER.size:end]) if end <= len(buffer) else b''
+                if int.from_bytes(buffer[:8], 'little') == sequence and len(snapshot) == end - HEADER.size:
+                    data = memoryview(snapshot)
+                    return version, bytes(data[:payload_length]), data[payload_length:]
+            self.retries += 1
+            sleep(0)
+
+    def get_board_payload(self) -> tuple[int, int, bytes]:
+        """
+        :return: (Player 1 score, Player 2 score, board as a binary string), as Room.get_board_payload returns it.
+        """
+        _, payload, _ = self.read()
+        return int.from_bytes(payload[0:2], 'big'), int.from_bytes(payload[2:4], 'big'), payload[4:]
+
+    def get_board(self) -> Board:
+        """
+        :return: A private copy of the board, decoded from the snapshot's checkpoint record.
+        """
+        _, _, record = self.read()
+        return decode_board(record, 0)[1]
+
+    def close(self) -> None:
+        """Detaches from the segment."""
+        self.memory.close()
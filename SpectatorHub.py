@@ -0,0 +1,70 @@
+from asyncio import Event, StreamWriter
+
+
+class Spectator:
+    """
+    The Spectator class is the state of one read-only connection watching a room: the most recent update frame that
+    has not been written to it yet, and an Event that is set when such a frame is waiting.
+    """
+    def __init__(self, writer: StreamWriter):
+        """
+        Initialize a Spectator with nothing waiting to be sent.
+        :param writer: The StreamWriter used for sending data to the spectator.
+        """
+        self.writer = writer
+        self.latest = None
+        self.ready = Event()
+        self.dropped = 0
+
+
+class SpectatorHub:
+    """
+    The SpectatorHub class fans a room's update stream out to its spectators. Each update frame is encoded once by the
+    room and the same bytes object is handed to every spectator. A spectator only ever holds the latest frame: if a
+    new update arrives before the previous one was written (because the spectator's connection is backed up), the older
+    frame is dropped. A slow spectator therefore costs its own socket buffer and a single pending frame, and never
+    delays the game or the other spectators.
+    """
+    def __init__(self):
+        """Initialize a SpectatorHub with no spectators."""
+        self.spectators = set()
+
+    def __len__(self) -> int:
+        """
+        :return: The number of spectators watching.
+        """
+        return len(self.spectators)
+
+    def publish(self, frame: bytes) -> None:
+        """
+        Hands an update frame to every spectator, replacing any frame still waiting to be written. O(1) per spectator.
+        :param frame: The complete update frame, header included.
+        """
+        for spectator in self.spectators:
+            if spectator.latest is not None:
+                spectator.dropped += 1
+            spectator.latest = frame
+            spectator.ready.set()
+
+    async def serve(self, writer: StreamWriter, first_frame: bytes) -> None:
+        """
+        Asynchronously streams updates to a spectator until the task is cancelled or the connection fails. Only this
+        spectator's task waits on its connection draining.
+        :param writer: The StreamWriter used for sending data to the spectator.
+        :param first_frame: The frame describing the room when the spectator joined.
+        """
+        spectator = Spectator(writer)
+        spectator.latest = first_frame
+        spectator.ready.set()
+        self.spectators.add(spectator)
+        try:
+            while True:
+                await spectator.ready.wait()
+                spectator.ready.clear()
+                frame, spectator.latest = spectator.latest, None
+                writer.write(frame)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.spectators.discard(spectator)
@@ -0,0 +1,140 @@
+from collections import deque
+import random
+from Occupancy import Occupancy
+import constants
+
+
+class Terrain:
+    """
+    The Terrain class is the terrain layer of a board: every cell is open ground, a wall or mud. Walls cannot be
+    entered and never hold a player or treasure. Entering mud takes two moves in a row towards the mud cell.
+    A terrain is loaded from a map file, one line per row and one character per cell (. open, # wall, ~ mud), or
+    generated procedurally. It never changes during a match, so boards precompute their movement masks from it once.
+    The Tiles of a board take their descriptions from its terrain.
+    """
+    OPEN = 0
+    WALL = 1
+    MUD = 2
+    SYMBOLS = {constants.TILE_DESCRIPTION: OPEN, constants.WALL_DESCRIPTION: WALL, constants.MUD_DESCRIPTION: MUD}
+    DESCRIPTIONS = {kind: symbol for symbol, kind in SYMBOLS.items()}
+
+    def __init__(self, length: int, cells: bytes = None):
+        """
+        Initialize a Terrain.
+        :param length: The length of the board the terrain covers.
+        :param cells: The kind of every cell, row by row, all open by default.
+        :raises ValueError: If the number of cells does not match the length, or a cell is not a known kind.
+        """
+        cells = bytes(length * length) if cells is None else bytes(cells)
+        if len(cells) != length * length:
+            raise ValueError("Terrain must have length x length cells")
+        if any(kind not in self.DESCRIPTIONS for kind in set(cells)):
+            raise ValueError("Unknown terrain kind")
+        self.length = length
+        self.cells = cells
+        self.walls = self.get_bits(self.WALL)
+        self.mud = self.get_bits(self.MUD)
+        self.masks = None
+        self.template = None  # The board rendered without treasure or players, set by view.get_template
+
+    def get_masks(self) -> tuple[dict[str, list[int]], list[int]]:
+        """
+        Computes the movement masks of the terrain's walls the first time a board needs them; every board on the
+        terrain shares them afterwards.
+        :return: The masks, as Occupancy.get_masks returns them.
+        """
+        if self.masks is None:
+            self.masks = Occupancy.get_masks(self.length, self.walls)
+        return self.masks
+
+    def get_bits(self, kind: int) -> int:
+        """
+        :param kind: A terrain kind.
+        :return: The bitset of the cells of that kind.
+        """
+        return int(''.join('1' if cell == kind else '0' for cell in reversed(self.cells)) or '0', 2)
+
+    def get_description(self, row: int, col: int) -> str:
+        """
+        :param row: The row of a cell.
+        :param col: The column of a cell.
+        :return: The description of the cell's terrain, used as the description of its Tile.
+        """
+        return self.DESCRIPTIONS[self.cells[row * self.length + col]]
+
+    def to_map(self) -> str:
+        """
+        Terrain ----> Map
+        :return: The terrain in the map file format.
+        """
+        rows = [self.cells[start:start + self.length] for start in range(0, len(self.cells), self.length)]
+        return ''.join(''.join(self.DESCRIPTIONS[kind] for kind in row) + '\n' for row in rows)
+
+    @classmethod
+    def from_map(cls, text: str) -> 'Terrain':
+        """
+        Map ----> Terrain
+        :param text: The map, one line per row. Blank lines are ignored.
+        :return: The Terrain.
+        :raises ValueError: If the map is not square or holds an unknown character.
+        """
+        rows = [line.strip() for line in text.splitlines() if line.strip()]
+        if any(len(row) != len(rows) for row in rows):
+            raise ValueError("Terrain map must be square")
+        try:
+            return cls(len(rows), bytes(cls.SYMBOLS[symbol] for row in rows for symbol in row))
+        except KeyError as e:
+            raise ValueError(f"Unknown terrain symbol {e}") from None
+
+    @classmethod
+    def load(cls, path: str) -> 'Terrain':
+        """
+        Loads a map file.
+        :param path: The path of the map file.
+        :return: The Terrain.
+        :raises ValueError: If the map is not valid.
+        """
+        with open(path) as file:
+            return cls.from_map(file.read())
+
+    @classmethod
+    def generate(cls, length: int, density: float, seed: int = None) -> 'Terrain':
+        """
+        Generates a terrain: density of the cells, at random, are walls or mud in equal parts. Open ground or mud cut
+        off from the largest connected area by walls is walled in too, so every cell a player can stand on is reachable.
+        :param length: The length of the board.
+        :param density: The fraction of cells that are walls or mud.
+        :param seed: The seed of the random number generator, None for a different terrain every time.
+        :return: The Terrain.
+        :raises ValueError: If density is not between 0 and TERRAIN_MAX_DENSITY.
+        """
+        if density < 0 or density > constants.TERRAIN_MAX_DENSITY:
+            raise ValueError(f"Terrain density must be between 0 and {constants.TERRAIN_MAX_DENSITY}")
+        rng = random.Random(seed)
+        cells = bytearray(length * length)
+        rough = rng.sample(range(length * length), round(density * length * length))
+        for index, cell in enumerate(rough):
+            cells[cell] = cls.WALL if index % 2 == 0 else cls.MUD
+
+        areas = []
+        seen = set()
+        for start in range(length * length):
+            if cells[start] == cls.WALL or start in seen:
+                continue
+            area = [start]
+            seen.add(start)
+            queue = deque([start])
+            while queue:
+                row, col = divmod(queue.popleft(), length)
+                for n_row, n_col in [(row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)]:
+                    neighbour = n_row * length + n_col
+                    if (0 <= n_row < length and 0 <= n_col < length and cells[neighbour] != cls.WALL
+                            and neighbour not in seen):
+                        seen.add(neighbour)
+                        area.append(neighbour)
+                        queue.append(neighbour)
+            areas.append(area)
+        for area in sorted(areas, key=len)[:-1]:
+            for cell in area:
+                cells[cell] = cls.WALL
+        return cls(length, cells)
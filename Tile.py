@@ -7,13 +7,15 @@ class Tile:
     """
     The Tile class represents a tile on the game board. A tile can contain a player or a treasure.
     """
-    def __init__(self, row, col, description=constants.TILE_DESCRIPTION):
+    def __init__(self, row, col, description=constants.TILE_DESCRIPTION, occupancy=None):
         """
         Initialize a Tile object with the given coordinates and description.
-        A Tile is initialized with no treasure and no player.
+        A Tile is initialized with no treasure and no player. A Tile of a Board keeps the board's Occupancy bitsets up
+        to date as players and treasure are added and removed.
         :param row: The Y-coordinate of the Tile.
         :param col: The X-coordinate of the Tile.
         :param description: The Description of the Tile.
+        :param occupancy: The Occupancy of the board the Tile belongs to, None for a Tile outside a board.
         :raises ValueError: If either row or col are less than 0 of the description is an empty string.
         """
         if len(description) < 1:
@@ -24,6 +26,8 @@ class Tile:
         self.coordinates = (row, col)
         self.treasure = None
         self.player = None
+        self.occupancy = occupancy
+        self.cell = None if occupancy is None else occupancy.get_cell(row, col)
 
     def __str__(self) -> str:
         """
@@ -43,10 +47,14 @@ class Tile:
         :param treasure: The Treasure Object to be added onto the Tile.
         """
         self.treasure = treasure
+        if self.occupancy is not None:
+            self.occupancy.add_treasure(self.cell)
 
     def remove_treasure(self) -> None:
         """Remove a treasure on the tile, if any."""
         self.treasure = None
+        if self.occupancy is not None:
+            self.occupancy.remove_treasure(self.cell)
 
     def get_treasure(self) -> Treasure:
         """
@@ -61,10 +69,14 @@ class Tile:
         :param player: A Player object ot be added onto the Tile.
         """
         self.player = player
+        if self.occupancy is not None:
+            self.occupancy.add_player(self.cell)
 
     def remove_player(self) -> None:
         """Remove a player on the tile, if any."""
         self.player = None
+        if self.occupancy is not None:
+            self.occupancy.remove_player(self.cell)
 
     def get_player(self) -> Player:
         """
@@ -0,0 +1,100 @@
+from math import ceil
+from typing import Any
+
+
+class TimerWheel:
+    """
+    The TimerWheel class is a hierarchical timer wheel: a fixed number of wheels of slots, where each slot of a wheel
+    spans a whole turn of the wheel below it. A timer is filed in the lowest wheel whose turn reaches its expiry, and
+    is moved down a wheel each time the wheel below comes round to it, until it expires from the lowest wheel.
+    Scheduling a timer and advancing one tick are O(1), independent of the number of pending timers; each timer is
+    moved at most once per wheel.
+    """
+    def __init__(self, resolution: float = 0.1, slots: int = 64, levels: int = 4):
+        """
+        Initialize an empty TimerWheel at tick 0.
+        :param resolution: The number of seconds per tick.
+        :param slots: The number of slots per wheel.
+        :param levels: The number of wheels. Timers further away than slots ** levels ticks wait in the top wheel.
+        :raises ValueError: If the resolution is not positive, or there are fewer than 2 slots or 1 level.
+        """
+        if resolution <= 0:
+            raise ValueError("Resolution must be greater than 0")
+        if slots < 2 or levels < 1:
+            raise ValueError("A timer wheel needs at least 2 slots and 1 level")
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.current_tick = 0
+        self.num_timers = 0
+
+    def __len__(self) -> int:
+        """
+        :return: The number of pending timers.
+        """
+        return self.num_timers
+
+    def schedule(self, delay: float, item: Any) -> int:
+        """
+        Schedules an item to expire after a delay, rounded up to whole ticks (at least one).
+        :param delay: The delay in seconds.
+        :param item: The item returned by advance() once the timer expires.
+        :return: The tick the timer expires at.
+        """
+        expiry = self.current_tick + max(1, ceil(delay / self.resolution))
+        self.file(expiry, item)
+        self.num_timers += 1
+        return expiry
+
+    def file(self, expiry: int, item: Any) -> None:
+        """
+        Files a timer in the lowest wheel whose turn reaches its expiry.
+        :param expiry: The tick the timer expires at, after the current tick.
+        :param item: The item of the timer.
+        """
+        distance = expiry - self.current_tick
+        span = 1
+        for level in range(self.levels):
+            if distance < span * self.slots or level == self.levels - 1:
+                slot = (min(expiry, self.current_tick + span * self.slots - 1) // span) % self.slots
+                self.wheels[level][slot].append((expiry, item))
+                return
+            span *= self.slots
+
+    def tick(self) -> list[Any]:
+        """
+        Advances the wheel by one tick, moving the timers of every wheel that came round down a wheel.
+        :return: The items of the timers that expired on this tick.
+        """
+        self.current_tick += 1
+        span = self.slots
+        for level in range(1, self.levels):
+            if self.current_tick % span:
+                break
+            index = (self.current_tick // span) % self.slots
+            timers, self.wheels[level][index] = self.wheels[level][index], []
+            for expiry, item in timers:
+                self.file(max(expiry, self.current_tick), item)
+            span *= self.slots
+        index = self.current_tick % self.slots
+        timers, self.wheels[0][index] = self.wheels[0][index], []
+        expired = []
+        for expiry, item in timers:
+            if expiry <= self.current_tick:
+                expired.append(item)
+            else:  # Only with a single wheel: a timer beyond its turn comes round before it expires
+                self.file(expiry, item)
+        self.num_timers -= len(expired)
+        return expired
+
+    def advance(self, ticks: int) -> list[Any]:
+        """
+        Advances the wheel by several ticks.
+        :param ticks: The number of ticks to advance.
+        :return: The items of the timers that expired, in expiry order.
+        """
+        expired = []
+        for _ in range(ticks):
+            expired.extend(self.tick())
+        return expired
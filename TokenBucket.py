@@ -0,0 +1,46 @@
+from time import monotonic
+
+
+class TokenBucket:
+    """
+    The TokenBucket class limits the rate of an event: the bucket holds up to burst tokens, refills at rate tokens per
+    second, and each event takes a token. Refilling is computed from the time since the last event, so taking a token
+    is O(1) and needs no timer. When the bucket is empty the token is still taken, leaving the bucket in debt, and the
+    caller is told how long to wait; back-to-back events are therefore paced at exactly rate per second.
+    """
+    def __init__(self, rate: float, burst: int):
+        """
+        Initialize a full TokenBucket.
+        :param rate: The number of tokens added per second.
+        :param burst: The maximum number of tokens the bucket holds.
+        :raises ValueError: If the rate is not positive or the burst is less than 1.
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be greater than 0")
+        if burst < 1:
+            raise ValueError("Burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = monotonic()
+
+    def take(self, now: float = None) -> float:
+        """
+        Takes a token for an event.
+        :param now: The current monotonic time, read from the clock if not given.
+        :return: 0 if a token was available, otherwise the number of seconds to wait before the event may proceed.
+        """
+        self.tokens = self.get_tokens(now) - 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def get_tokens(self, now: float = None) -> float:
+        """
+        Refills the bucket up to the current time without taking a token.
+        :param now: The current monotonic time, read from the clock if not given.
+        :return: The number of tokens in the bucket, negative while it is in debt.
+        """
+        if now is None:
+            now = monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        return self.tokens
@@ -0,0 +1,158 @@
+from Player import Player
+import constants
+
+MASKS = {}
+
+
+class Visibility:
+    """
+    The Visibility class is the fog of war of a board: each player only sees the cells within a radius of their
+    position (a square of 2 * radius + 1 cells a side), and every other cell is shown as fog.
+    Each player's view is kept as two bitsets: the visible cells (bit row * length + col) and a byte mask of the
+    visible characters of the rendered board. When a player moves one step only the strip of cells that came into view
+    and the strip that went out of view are updated, using row and column masks precomputed for the board. The fogged
+    board is then built from the board rendered once for everybody with a few integer operations, so hundreds of
+    players can share a board.
+    The rendered board must be laid out as view.display does: one character and a space per cell, a newline per row.
+    """
+    def __init__(self, length: int, radius: int):
+        """
+        Initialize the fog of war of a board, with no player views yet.
+        :param length: The length of the board.
+        :param radius: How many cells away from their position players can see.
+        :raises ValueError: If the radius is less than 1.
+        """
+        if radius < 1:
+            raise ValueError("Fog radius must be at least 1")
+        self.length = length
+        self.radius = radius
+        self.masks = self.get_masks(length, radius)
+        self.fog = int.from_bytes(constants.FOG_DESCRIPTION.encode() * (length * (2 * length + 1)), 'little')
+        self.views = {}
+
+    @staticmethod
+    def get_masks(length: int, radius: int) -> dict:
+        """
+        Computes the row, column and band masks of a board, or retrieves them if a board of the same length and radius
+        already did. Masks prefixed with r_ are byte masks of the rendered board, the others are cell bitsets.
+        :param length: The length of the board.
+        :param radius: The radius players see.
+        :return: A dict of mask lists indexed by row or column (row, col, row_band and col_band, and their r_ masks),
+                 and r_separators, the byte mask of the spaces and newlines of the rendered board.
+        """
+        masks = MASKS.get((length, radius))
+        if masks is None:
+            width = 2 * length + 1  # Characters per rendered row
+
+            def char(row: int, col: int) -> int:
+                return 0xFF << (8 * (row * width + 2 * col))
+
+            masks = {
+                "row": [((1 << length) - 1) << (row * length) for row in range(length)],
+                "col": [sum(1 << (row * length + col) for row in range(length)) for col in range(length)],
+                "r_row": [sum(char(row, col) for col in range(length)) for row in range(length)],
+                "r_col": [sum(char(row, col) for row in range(length)) for col in range(length)],
+            }
+            for name in list(masks):
+                masks[name + "_band"] = [sum(masks[name][max(0, centre - radius):centre + radius + 1])
+                                         for centre in range(length)]
+            masks["r_separators"] = ((1 << (8 * length * width)) - 1) & ~sum(masks["r_row"])
+            MASKS[(length, radius)] = masks
+        return masks
+
+    def get_window(self, row: int, col: int, prefix: str = "") -> int:
+        """
+        :param row: The row of a player.
+        :param col: The column of a player.
+        :param prefix: "" for the cell bitset, "r_" for the byte mask of the rendered board.
+        :return: Everything a player at (row, col) can see.
+        """
+        return self.masks[prefix + "row_band"][row] & self.masks[prefix + "col_band"][col]
+
+    def get_strip(self, line: int, centre: int, vertical: bool, prefix: str = "") -> int:
+        """
+        :param line: The row (or column, if vertical) of the strip.
+        :param centre: The column (or row, if vertical) the strip is centred on.
+        :param vertical: Whether the strip is a column rather than a row.
+        :param prefix: "" for the cell bitset, "r_" for the byte mask of the rendered board.
+        :return: The part of a row or column within the radius of the centre, 0 if the line is off the board.
+        """
+        if line < 0 or line >= self.length:
+            return 0
+        if vertical:
+            return self.masks[prefix + "col"][line] & self.masks[prefix + "row_band"][centre]
+        return self.masks[prefix + "row"][line] & self.masks[prefix + "col_band"][centre]
+
+    def update(self, player: Player) -> tuple[int, int]:
+        """
+        Brings a player's view up to date with their position. A move of one step only updates the strip that came
+        into view and the strip that went out of view; any other change of position recomputes the whole view.
+        :param player: The Player.
+        :return: (The cells that came into view, the cells that went out of view) as bitsets.
+        """
+        row, col = player.get_coordinates()
+        view = self.views.get(player.get_name())
+        if view is not None and (view[0], view[1]) == (row, col):
+            return 0, 0
+        if view is None or abs(row - view[0]) + abs(col - view[1]) != 1:
+            visible = self.get_window(row, col)
+            previous = 0 if view is None else view[2]
+            self.views[player.get_name()] = [row, col, visible, self.get_window(row, col, "r_")]
+            return visible & ~previous, previous & ~visible
+
+        if col != view[1]:  # A sideways step brings a column into view
+            vertical, centre, step, position, old_position = True, row, col - view[1], col, view[1]
+        else:
+            vertical, centre, step, position, old_position = False, col, row - view[0], row, view[0]
+        entering, leaving = position + step * self.radius, old_position - step * self.radius
+        came, went = self.get_strip(entering, centre, vertical), self.get_strip(leaving, centre, vertical)
+        view[0], view[1] = row, col
+        view[2] = (view[2] | came) & ~went
+        view[3] = (view[3] | self.get_strip(entering, centre, vertical, "r_")) & \
+            ~self.get_strip(leaving, centre, vertical, "r_")
+        return came, went
+
+    def get_visible(self, player: Player) -> int:
+        """
+        :param player: The Player.
+        :return: The bitset of the cells the player can see.
+        """
+        self.update(player)
+        return self.views[player.get_name()][2]
+
+    def remove(self, player_name: str) -> None:
+        """
+        Forgets a player's view, e.g. when the player leaves the board.
+        :param player_name: The name of the player.
+        """
+        self.views.pop(player_name, None)
+
+    def render(self, player: Player, rendered: bytes) -> bytes:
+        """
+        Hides what a player cannot see on a rendered board.
+        :param player: The Player.
+        :param rendered: The board as rendered by view.display.
+        :return: The rendered board with every cell the player cannot see replaced by fog.
+        """
+        self.update(player)
+        view = self.views[player.get_name()]
+        if len(rendered) != self.length * (2 * self.length + 1):  # A cell wider than one character
+            return self.render_cells(view[2], rendered)
+        shown = view[3] | self.masks["r_separators"]
+        board = int.from_bytes(rendered, 'little')
+        return ((board & shown) | (self.fog & ~shown)).to_bytes(len(rendered), 'little')
+
+    def render_cells(self, visible: int, rendered: bytes) -> bytes:
+        """
+        Hides the cells that are not visible on a rendered board cell by cell, for boards whose cells are not all one
+        character wide.
+        :param visible: The bitset of the visible cells.
+        :param rendered: The board as rendered by view.display.
+        :return: The rendered board with every cell that is not visible replaced by fog.
+        """
+        rows = []
+        for row, line in enumerate(rendered.decode().split('\n')[:self.length]):
+            cells = line.split(' ')[:self.length]
+            rows.append(''.join((cell if visible >> (row * self.length + col) & 1 else constants.FOG_DESCRIPTION) + ' '
+                                for col, cell in enumerate(cells)) + '\n')
+        return ''.join(rows).encode()
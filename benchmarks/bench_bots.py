@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+"""
+Measures how many bots one event loop can drive: a single BotRunner steps every bot on many boards, and the time of
+each runner step (one move per bot) is reported along with how often bots had to re-plan their path.
+
+Usage: python benchmarks/bench_bots.py [num_boards] [board_length] [num_steps]
+"""
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Board import Board  # noqa: E402
+from Bot import Bot, BotRunner  # noqa: E402
+
+
+def main() -> None:
+    num_boards = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    length = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    num_steps = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    runner = BotRunner()
+    with redirect_stdout(io.StringIO()):
+        for _ in range(num_boards):
+            board = Board(length, length * length // 10, 1, 5)
+            runner.add_bot(Bot(board, "1"))
+            runner.add_bot(Bot(board, "2"))
+        durations = []
+        moves = 0
+        for _ in range(num_steps):
+            start = time.perf_counter()
+            moves += runner.step()
+            durations.append(time.perf_counter() - start)
+    plans = sum(bot.num_plans for bot in runner.bots)
+    num_bots = len(runner.bots)
+    print(f"{num_bots} bots on {num_boards} boards of {length}x{length}, {num_steps} steps")
+    print(f"runner step: mean {sum(durations) / num_steps * 1e3:.1f} ms, max {max(durations) * 1e3:.1f} ms "
+          f"({sum(durations) / num_steps / num_bots * 1e6:.1f} us per bot)")
+    print(f"{moves} moves, {plans} path plans ({plans / max(moves, 1):.2f} plans per move)")
+
+
+if __name__ == '__main__':
+    main()
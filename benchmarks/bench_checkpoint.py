@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""
+Measures checkpointing of many live boards: total checkpoint time, the longest stall of the event loop while a
+checkpoint runs (measured by a ticker task that should wake every millisecond), file size and restore time.
+
+Usage: python benchmarks/bench_checkpoint.py [num_boards] [board_length]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Board import Board  # noqa: E402
+from checkpoint import Checkpointer, read_checkpoint  # noqa: E402
+
+
+async def checkpoint_with_ticker(checkpointer: Checkpointer) -> tuple[float, float]:
+    stalls = []
+    running = True
+
+    async def ticker():
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append(time.perf_counter() - start - 0.001)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await checkpointer.checkpoint()
+    elapsed = time.perf_counter() - start
+    running = False
+    await task
+    return elapsed, max(stalls)
+
+
+def main() -> None:
+    num_boards = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    length = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    boards = {}
+    for room_id in range(num_boards):
+        board = Board(length, length * length // 10, 1, 5)
+        board.add_player_to_game_board("1")
+        board.add_player_to_game_board("2")
+        boards[room_id] = board
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "boards.ckpt")
+        checkpointer = Checkpointer(path, 1.0, lambda: boards)
+        elapsed, stall = asyncio.run(checkpoint_with_ticker(checkpointer))
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        restored = read_checkpoint(path)
+        restore = time.perf_counter() - start
+
+    assert len(restored) == num_boards
+    print(f"{num_boards} boards of {length}x{length}, file {size / 1024:.0f} KiB")
+    print(f"checkpoint {elapsed * 1e3:.1f} ms, longest event loop stall {stall * 1e3:.2f} ms")
+    print(f"restore    {restore * 1e3:.1f} ms ({restore / num_boards * 1e6:.1f} us per board)")
+
+
+if __name__ == '__main__':
+    main()
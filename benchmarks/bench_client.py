@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""
+Compares command throughput of a client that waits for every answer before sending the next command (the old
+interactive client) with a GameClient that pipelines batches of commands while reading the answers concurrently.
+
+Usage: python benchmarks/bench_client.py [num_commands] [batch_size]
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GameClient import GameClient  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 23457
+
+
+async def connect() -> GameClient:
+    for _ in range(100):
+        game_client = GameClient('127.0.0.1', PORT)
+        try:
+            await game_client.connect()
+            return game_client
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError("Server did not start")
+
+
+async def lockstep(num_commands: int) -> float:
+    game_client = await connect()
+    game_client.read_task.cancel()  # Read the answers inline instead
+    command = bytes([game_client.get_command_byte("G")])
+    start = time.perf_counter()
+    for _ in range(num_commands):
+        game_client.writer.write(command)
+        await game_client.frames.read_frame()
+    elapsed = time.perf_counter() - start
+    game_client.writer.close()
+    return elapsed
+
+
+async def pipelined(num_commands: int, batch_size: int) -> float:
+    game_client = await connect()
+    start = time.perf_counter()
+    updates = game_client.updates()
+    for _ in range(num_commands // batch_size):
+        await game_client.send_moves("G" * batch_size)
+        for _ in range(batch_size):
+            await anext(updates)
+    elapsed = time.perf_counter() - start
+    await game_client.quit()
+    return elapsed
+
+
+def main() -> None:
+    num_commands = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py"), "--port", str(PORT),
+                               "--command-rate", "0"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        lockstep_time = asyncio.run(lockstep(num_commands))
+        pipelined_time = asyncio.run(pipelined(num_commands, batch_size))
+    finally:
+        server.terminate()
+        server.wait()
+    print(f"{num_commands} GAME commands")
+    print(f"lockstep:  {num_commands / lockstep_time:>9.0f} commands/s")
+    print(f"pipelined: {num_commands / pipelined_time:>9.0f} commands/s (batches of {batch_size})")
+
+
+if __name__ == '__main__':
+    main()
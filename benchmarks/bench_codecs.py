@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""
+Compares the negotiated codecs on board payloads: CPU time to encode and decode a frame against the bytes it puts on
+the wire. Each codec encodes a sequence of boards from a game in progress (one player walking the board), so the zlib
+codec's cross-message history is exercised the way it is on a real connection. The run-length codec is reported
+alongside zlib even where it loses on CPU: it keeps no state across messages.
+
+Usage: python benchmarks/bench_codecs.py [num_frames]
+"""
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from struct import pack
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Board import Board  # noqa: E402
+from protocol import create_codec  # noqa: E402
+import constants  # noqa: E402
+
+
+def render(board: Board) -> bytes:
+    return "".join("".join(str(tile) + " " for tile in row) + "\n" for row in board.game_board).encode()
+
+
+def game_frames(length: int, num_frames: int) -> list[bytes]:
+    board = Board(length, length * length // 10, 1, 5)
+    board.add_player_to_game_board(constants.PLAYER_ONE_NAME)
+    board.add_player_to_game_board(constants.PLAYER_TWO_NAME)
+    directions = [constants.RIGHT] * (length - 1) + [constants.DOWN] + [constants.LEFT] * (length - 1) + [constants.DOWN]
+    frames = []
+    for index in range(num_frames):
+        board.move_player_on_board(constants.PLAYER_ONE_NAME, directions[index % len(directions)])
+        score = board.find_player_by_name(constants.PLAYER_ONE_NAME).get_score()
+        frames.append(pack('!HH', score, 0) + render(board))
+    return frames
+
+
+def measure(codec_id: int, frames: list[bytes]) -> tuple[float, float, float]:
+    encoder = create_codec(codec_id)
+    decoder = create_codec(codec_id)
+    start = time.process_time()
+    encoded = [encoder.encode(frame[:4], frame[4:]) for frame in frames]
+    encode_time = time.process_time() - start
+    start = time.process_time()
+    for message in encoded:
+        decoder.decode(message)
+    decode_time = time.process_time() - start
+    return (sum(len(message) for message in encoded) / len(frames),
+            encode_time / len(frames), decode_time / len(frames))
+
+
+def main() -> None:
+    num_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{'board':>6} {'codec':>6} {'bytes/frame':>12} {'encode us':>10} {'decode us':>10}")
+    for length in [10, 25, 50]:
+        with redirect_stdout(io.StringIO()):
+            frames = game_frames(length, num_frames)
+        for name, codec_id in constants.CODEC_NAMES.items():
+            wire_bytes, encode_time, decode_time = measure(codec_id, frames)
+            print(f"{length:>4}^2 {name:>6} {wire_bytes:>12.0f} {encode_time * 1e6:>10.1f} {decode_time * 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""
+Measures fog of war on a 50x50 board with hundreds of players: the cost of bringing a player's view up to date after
+one step (incrementally, and recomputed cell by cell), and of hiding what the player cannot see on the shared rendered
+board (with the view's byte mask, and cell by cell).
+
+Usage: python benchmarks/bench_fog.py [num_players] [radius]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Board import Board  # noqa: E402
+from Visibility import Visibility  # noqa: E402
+import view  # noqa: E402
+
+LENGTH = 50
+
+
+def cell_by_cell_view(row: int, col: int, radius: int) -> set:
+    return {(r, c) for r in range(max(0, row - radius), min(LENGTH, row + radius + 1))
+            for c in range(max(0, col - radius), min(LENGTH, col + radius + 1))}
+
+
+def main() -> None:
+    num_players = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    radius = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    board = Board(LENGTH, 200, 1, 5)
+    for index in range(num_players):
+        board.add_player_to_game_board(chr(0x21 + index % 90))  # One-character names, as the renderer expects
+    visibility = Visibility(LENGTH, radius)
+    rng = random.Random(1)
+    for player in board.players:
+        visibility.update(player)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for player in board.players:
+            board.move_player(player, rng.choice("UDLR"))
+        rendered = view.display(board).encode()
+
+    start = time.perf_counter()
+    for player in board.players:
+        visibility.update(player)
+    incremental = (time.perf_counter() - start) / num_players
+    start = time.perf_counter()
+    for player in board.players:
+        cell_by_cell_view(*player.get_coordinates(), radius)
+    recomputed = (time.perf_counter() - start) / num_players
+
+    start = time.perf_counter()
+    for player in board.players:
+        visibility.render(player, rendered)
+    masked = (time.perf_counter() - start) / num_players
+    start = time.perf_counter()
+    for player in board.players:
+        visibility.render_cells(visibility.get_visible(player), rendered)
+    by_cell = (time.perf_counter() - start) / num_players
+
+    print(f"{num_players} players, radius {radius}, {LENGTH}x{LENGTH} board")
+    print(f"view update: incremental {incremental * 1e6:.1f} us, cell by cell {recomputed * 1e6:.1f} us per player")
+    print(f"fogged render: byte mask {masked * 1e6:.1f} us, cell by cell {by_cell * 1e6:.1f} us per player")
+
+
+if __name__ == '__main__':
+    main()
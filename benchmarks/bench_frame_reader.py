@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""
+Compares reading frames with one readexactly call per header and payload, the way the client read them before it had
+the FrameReader, with the FrameReader, which parses every frame that arrived with a read from a single reusable buffer.
+The frames are fed to a StreamReader in socket-sized chunks, so only the parsing cost is measured.
+
+Usage: python benchmarks/bench_frame_reader.py [num_frames] [payload_size]
+"""
+import asyncio
+import os
+import sys
+import time
+from struct import pack, unpack
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from protocol import FrameReader  # noqa: E402
+import constants  # noqa: E402
+
+
+async def get_bytes_from_server(reader: asyncio.StreamReader, num_bytes: int) -> bytes:
+    try:
+        return await reader.readexactly(num_bytes)
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+
+
+async def get_payload_from_server(reader: asyncio.StreamReader) -> bytes:
+    header = await get_bytes_from_server(reader, constants.HEADER_LENGTH)
+    return await get_bytes_from_server(reader, unpack('!H', header)[0])
+
+
+def create_reader(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader(limit=len(data) + 1)
+    for start in range(0, len(data), 65536):
+        reader.feed_data(data[start:start + 65536])
+    reader.feed_eof()
+    return reader
+
+
+async def read_with_readexactly(data: bytes, num_frames: int) -> float:
+    reader = create_reader(data)
+    start = time.perf_counter()
+    for _ in range(num_frames):
+        await get_payload_from_server(reader)
+    return time.perf_counter() - start
+
+
+async def read_with_frame_reader(data: bytes, num_frames: int) -> float:
+    frames = FrameReader(create_reader(data))
+    start = time.perf_counter()
+    count = 0
+    while count < num_frames:
+        count += len(await frames.read_frames())
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    num_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    payload_size = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    data = (pack('!H', payload_size) + b'x' * payload_size) * num_frames
+    readexactly = asyncio.run(read_with_readexactly(data, num_frames))
+    frame_reader = asyncio.run(read_with_frame_reader(data, num_frames))
+    print(f"{num_frames} frames of {payload_size} bytes")
+    print(f"readexactly:  {readexactly / num_frames * 1e9:>7.0f} ns per frame")
+    print(f"FrameReader:  {frame_reader / num_frames * 1e9:>7.0f} ns per frame")
+
+
+if __name__ == '__main__':
+    main()
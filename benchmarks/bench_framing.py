@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+"""
+Compares the legacy send path (header + packet concatenation and a drain after every message) with the FrameWriter
+path on a 50x50 board. Reports bytes allocated per frame in user space (a proxy for bytes copied) and the time taken
+to push frames to a client over a loopback connection.
+
+Usage: python benchmarks/bench_framing.py [num_frames]
+"""
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from struct import pack
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Board import Board  # noqa: E402
+from protocol import FrameWriter, BOARD_PREFIX  # noqa: E402
+
+
+class NullTransport(asyncio.WriteTransport):
+    """A transport that accepts and discards writes, used to isolate the user-space cost of framing."""
+    def write(self, data):
+        pass
+
+    def writelines(self, list_of_data):
+        for data in list_of_data:
+            self.write(data)
+
+    def get_write_buffer_size(self):
+        return 0
+
+    def get_write_buffer_limits(self):
+        return 16384, 65536
+
+
+class NullWriter:
+    """The subset of StreamWriter used by the send paths, backed by a NullTransport."""
+    def __init__(self):
+        self.transport = NullTransport()
+
+    def write(self, data):
+        self.transport.write(data)
+
+    def writelines(self, data):
+        self.transport.writelines(data)
+
+    async def drain(self):
+        pass
+
+
+def make_board_bytes() -> bytes:
+    board = Board(50, 500, 1, 5)
+    rows = [" ".join(str(tile) for tile in row) + " \n" for row in board.game_board]
+    return "".join(rows)
+
+
+def legacy_send(writer, board: str) -> None:
+    packet = pack('!HH', 1, 2) + board.encode()
+    packet_header = pack('!H', len(packet))
+    writer.write(packet_header + packet)
+
+
+def framed_send(frames: FrameWriter, board: str) -> None:
+    frames.write_frame(board.encode(), BOARD_PREFIX, 1, 2)
+
+
+def allocated_per_frame(send, target, board: str, num_frames: int) -> float:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    total = 0
+    for _ in range(num_frames):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        send(target, board)
+        total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return total / num_frames
+
+
+async def loopback_latency(board: str, num_frames: int, framed: bool) -> float:
+    frame_size = 6 + len(board.encode())
+    done = asyncio.get_running_loop().create_future()
+
+    async def handle(reader, writer):
+        await reader.readexactly(frame_size * num_frames)
+        done.set_result(time.perf_counter())
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    _, writer = await asyncio.open_connection('127.0.0.1', port)
+    frames = FrameWriter(writer)
+
+    start = time.perf_counter()
+    for _ in range(num_frames):
+        if framed:
+            framed_send(frames, board)
+            await frames.drain_if_needed()
+        else:
+            legacy_send(writer, board)
+            await writer.drain()
+    end = await done
+    writer.close()
+    server.close()
+    await server.wait_closed()
+    return (end - start) / num_frames
+
+
+def main() -> None:
+    num_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    board = make_board_bytes()
+    print(f"50x50 board payload: {len(board)} bytes, {num_frames} frames")
+
+    null_writer = NullWriter()
+    legacy_alloc = allocated_per_frame(legacy_send, null_writer, board, 200)
+    framed_alloc = allocated_per_frame(framed_send, FrameWriter(null_writer), board, 200)
+    print(f"bytes allocated per frame: legacy {legacy_alloc:.0f}, framed {framed_alloc:.0f}")
+
+    legacy = asyncio.run(loopback_latency(board, num_frames, framed=False))
+    framed = asyncio.run(loopback_latency(board, num_frames, framed=True))
+    print(f"loopback time per frame:  legacy {legacy * 1e6:.1f} us, framed {framed * 1e6:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
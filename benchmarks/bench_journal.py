@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""
+Measures the event journal: the cost of appending one event in the game process, against writing the same record to
+a buffered file, and how fast a reader tails the journal.
+
+Usage: python benchmarks/bench_journal.py [num_events]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Journal import Journal, JournalReader, RECORD  # noqa: E402
+
+
+def main() -> None:
+    num_events = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "room_0.journal")
+        journal = Journal(path, 0)
+        append = journal.append
+        start = time.perf_counter()
+        for _ in range(num_events):
+            append(Journal.MOVE, "1", 4, 2)
+        appended = (time.perf_counter() - start) / num_events
+        journal.close()
+
+        with open(os.path.join(directory, "events.bin"), 'wb') as file:
+            start = time.perf_counter()
+            for _ in range(num_events):
+                file.write(RECORD.pack(time.time(), Journal.MOVE, "1".encode(), 4, 2, 0))
+            written = (time.perf_counter() - start) / num_events
+
+        reader = JournalReader(path)
+        start = time.perf_counter()
+        records = len(reader.tail())
+        tailed = time.perf_counter() - start
+        reader.close()
+
+    print(f"{num_events:,} events")
+    print(f"journal append: {appended * 1e9:.0f} ns per event")
+    print(f"file write:     {written * 1e9:.0f} ns per event")
+    print(f"tail:           {records / tailed:,.0f} records/s")
+
+
+if __name__ == '__main__':
+    main()
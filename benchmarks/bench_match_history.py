@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""
+Fills a match history database with synthetic matches through the batched writer, then times the leaderboard and
+per-player history queries, and the longest event loop stall while matches were being recorded.
+
+Usage: python benchmarks/bench_match_history.py [num_matches] [num_players]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MatchHistory import MatchHistory  # noqa: E402
+
+
+async def fill(history: MatchHistory, num_matches: int, num_players: int) -> tuple[float, float]:
+    task = asyncio.create_task(history.run())
+    longest_record = 0.0
+    start = time.perf_counter()
+    for index in range(num_matches):
+        first, second = random.sample(range(num_players), 2)
+        scores = [(f"p{first}", random.randint(0, 5000)), (f"p{second}", random.randint(0, 5000))]
+        record_start = time.perf_counter()
+        history.pending.put_nowait((time.time(), random.uniform(10, 600), random.randint(10, 500), scores))
+        longest_record = max(longest_record, time.perf_counter() - record_start)
+        if index % 1000 == 0:
+            await asyncio.sleep(0)
+    await history.flush()
+    task.cancel()
+    return time.perf_counter() - start, longest_record
+
+
+async def time_queries(history: MatchHistory, num_players: int) -> tuple[float, float]:
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        await history.get_leaderboard(10)
+    leaderboard = (time.perf_counter() - start) / runs
+    start = time.perf_counter()
+    for _ in range(runs):
+        await history.get_player_history(f"p{random.randrange(num_players)}", 10)
+    player_history = (time.perf_counter() - start) / runs
+    return leaderboard, player_history
+
+
+def main() -> None:
+    num_matches = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    num_players = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    with tempfile.TemporaryDirectory() as directory:
+        history = MatchHistory(os.path.join(directory, "history.db"), batch_size=4096)
+        elapsed, longest_record = asyncio.run(fill(history, num_matches, num_players))
+        leaderboard, player_history = asyncio.run(time_queries(history, num_players))
+        history.close()
+    print(f"{num_matches} matches written in {elapsed:.1f} s, longest record() call {longest_record * 1e6:.1f} us")
+    print(f"top-10 leaderboard {leaderboard * 1e3:.3f} ms, player history {player_history * 1e3:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""
+Measures the matchmaker with thousands of players arriving: the cost of a match decision and of a sweep, queue depth
+and waits, against matching each arriving player by scanning every waiting player for the closest one.
+
+Usage: python benchmarks/bench_matchmaking.py [num_players] [arrivals_per_second]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Matchmaker import Matchmaker, Ticket  # noqa: E402
+import constants  # noqa: E402
+
+
+def make_tickets(num_players: int, rate: float) -> list[Ticket]:
+    rng = random.Random(1)
+    return [Ticket(str(index), rng.gauss(1200, 300), rng.uniform(0.005, 0.3), enqueued_at=index / rate)
+            for index in range(num_players)]
+
+
+def run_matchmaker(tickets: list[Ticket]) -> tuple[float, float, dict]:
+    matchmaker = Matchmaker()
+    next_sweep = 0.0
+    sweeps = 0
+    sweep_time = 0.0
+    start = time.perf_counter()
+    for ticket in tickets:
+        now = ticket.enqueued_at
+        matchmaker.add(ticket, now)
+        if now >= next_sweep:
+            started = time.perf_counter()
+            matchmaker.sweep(now)
+            sweep_time += time.perf_counter() - started
+            sweeps += 1
+            next_sweep = now + constants.MATCH_INTERVAL
+    elapsed = time.perf_counter() - start
+    return elapsed / len(tickets), sweep_time / max(1, sweeps), matchmaker.get_metrics(tickets[-1].enqueued_at)
+
+
+def run_linear_scan(tickets: list[Ticket]) -> float:
+    waiting = []
+    start = time.perf_counter()
+    for ticket in tickets:
+        best = None
+        for other in waiting:
+            distance = abs(other.rating - ticket.rating) / constants.RATING_BUCKET + \
+                abs(other.rtt - ticket.rtt) / constants.RTT_BUCKET
+            if distance <= 1 and (best is None or distance < best[0]):
+                best = (distance, other)
+        if best is None:
+            waiting.append(ticket)
+        else:
+            waiting.remove(best[1])
+    return (time.perf_counter() - start) / len(tickets)
+
+
+def main() -> None:
+    num_players = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 2000.0
+    tickets = make_tickets(num_players, rate)
+    per_player, per_sweep, metrics = run_matchmaker(tickets)
+    scan = run_linear_scan(make_tickets(num_players, rate))
+    print(f"{num_players:,} players arriving at {rate:,.0f}/s")
+    print(f"matchmaker:  {per_player * 1e6:.1f} us per player, {per_sweep * 1e3:.2f} ms per sweep, "
+          f"{metrics['decision_us']:.1f} us per decision")
+    print(f"queue:       {metrics['waiting']} waiting in {metrics['buckets']} buckets, "
+          f"wait p50 {metrics['wait_p50']:.2f} s, p99 {metrics['wait_p99']:.2f} s")
+    print(f"linear scan: {scan * 1e6:.1f} us per player")
+
+
+if __name__ == '__main__':
+    main()
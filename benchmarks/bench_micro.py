@@ -0,0 +1,315 @@
+#!/usr/bin/python3
+"""
+Microbenchmarks of the Board, Tile, Player and Treasure operations, with baselines to catch regressions. Every
+operation is timed on boards of length 10, 25 and 50 at several treasure densities, and its memory is measured with
+tracemalloc: the peak allocated while the operation runs and what it leaves allocated (the size of the board, for
+Board.__init__). Results are written as JSON, and compare flags every operation slower or larger than its baseline
+by more than the threshold, exiting with status 1 if there is any. Timings on a shared machine drift by tens of
+percent over minutes, so before compare flags an operation it measures it again, up to --confirm more times, and keeps
+its fastest time. Baselines are only comparable with results from the same machine; on a virtual machine with noisy
+neighbours, raise the threshold.
+
+Usage: python benchmarks/bench_micro.py run [--output results.json] [--quick]
+       python benchmarks/bench_micro.py compare [--baseline benchmarks/baselines/micro.json] [--current results.json]
+                                                [--threshold 0.25] [--confirm 3] [--quick]
+The committed baseline is refreshed with: python benchmarks/bench_micro.py run --output benchmarks/baselines/micro.json
+and is only committed once python benchmarks/bench_micro.py compare, run on the same unchanged tree, reports no
+regressions.
+"""
+import argparse
+import contextlib
+import gc
+from itertools import cycle
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Board import Board  # noqa: E402
+from treasure_generation import TreasureGenerator  # noqa: E402
+import constants  # noqa: E402
+import view  # noqa: E402
+
+LENGTHS = [10, 25, 50]
+DENSITIES = [0.05, 0.2, 0.5]
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "micro.json")
+MIN_BYTES = 1024  # Memory changes smaller than this are noise, not regressions
+OPERATIONS = ["Board.__init__", "Board.find_empty_tile", "Board.move_player_on_board", "Board.get_results",
+              "view.display", "view.render"]
+
+
+def make_board(length: int, density: float) -> Board:
+    board = new_board(length, int(length * length * density))
+    board.add_player_to_game_board(constants.PLAYER_ONE_NAME)
+    board.add_player_to_game_board(constants.PLAYER_TWO_NAME)
+    return board
+
+
+def new_board(length: int, num_treasures: int) -> Board:
+    """
+    :param length: The length of the board.
+    :param num_treasures: The number of treasures on the board.
+    :return: A board without players, seeded so every run builds the same board and runs compare.
+    """
+    return Board(length, num_treasures, constants.MIN_TREASURE, constants.MAX_TREASURE, TreasureGenerator(seed=length))
+
+
+class MoveOperation:
+    """
+    Moves player one through a fixed sequence of directions. Moves collect the treasure they land on, so the board is
+    rebuilt and the sequence restarted before every timing run: each run then makes the same moves on the same board,
+    instead of later runs walking a board the earlier runs emptied.
+    """
+    def __init__(self, length: int, density: float):
+        """
+        Initialize a MoveOperation on a new board.
+        :param length: The length of the board.
+        :param density: The fraction of the cells holding treasure.
+        """
+        self.length = length
+        self.density = density
+        rng = random.Random(length)
+        self.directions = [rng.choice("UDLR") for _ in range(1024)]
+        self.reset()
+
+    def reset(self) -> None:
+        """Rebuilds the board and restarts the sequence of moves."""
+        self.board = make_board(self.length, self.density)
+        self.moves = cycle(self.directions)
+
+    def __call__(self) -> None:
+        self.board.move_player_on_board(constants.PLAYER_ONE_NAME, next(self.moves))
+
+
+def get_operations(length: int, density: float) -> dict[str, Callable[[], object]]:
+    """
+    :param length: The length of the boards.
+    :param density: The fraction of the cells holding treasure.
+    :return: The operations to measure, by name, each run on its own board. An operation with a reset method changes
+             its board, and is reset before every run.
+    """
+    num_treasures = int(length * length * density)
+    boards = {name: make_board(length, density) for name in ["find_empty_tile", "results", "display"]}
+    return {
+        "Board.__init__": lambda: new_board(length, num_treasures),
+        "Board.find_empty_tile": boards["find_empty_tile"].find_empty_tile,
+        "Board.move_player_on_board": MoveOperation(length, density),
+        "Board.get_results": boards["results"].get_results,
+        "view.display": lambda: view.display(boards["display"]),
+        "view.render": lambda: view.render(boards["display"]),
+    }
+
+
+def time_operation(operation: Callable[[], object], min_time: float, repeat: int) -> float:
+    """
+    :param operation: The operation, reset before every run if it has a reset method.
+    :param min_time: The least number of seconds a timing run takes; the operation is repeated until it does.
+    :param repeat: The number of timing runs.
+    :return: The fastest time of one operation over the runs, in nanoseconds. Garbage collection is disabled while
+             timing, as timeit does, so a collection triggered by earlier operations is not charged to this one.
+    """
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return min(time_runs(operation, min_time, repeat)) * 1e9
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def time_runs(operation: Callable[[], object], min_time: float, repeat: int) -> list[float]:
+    """
+    :param operation: The operation, reset before every run if it has a reset method.
+    :param min_time: The least number of seconds a timing run takes; the operation is repeated until it does.
+    :param repeat: The number of timing runs.
+    :return: The time of one operation in each run, in seconds.
+    """
+    reset = getattr(operation, "reset", lambda: None)
+    number = 1
+    while True:
+        reset()
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    timings = [elapsed]
+    for _ in range(repeat - 1):
+        reset()
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        timings.append(time.perf_counter() - start)
+    return [timing / number for timing in timings]
+
+
+def measure_memory(operation: Callable[[], object], repeat: int = 3) -> tuple[int, int]:
+    """
+    :param operation: The operation, reset before every call if it has a reset method.
+    :param repeat: The number of calls measured; buffers flushed by some calls and not others (e.g. when printing)
+                   make single calls vary, so the smallest measurement is kept.
+    :return: (The peak number of bytes allocated while the operation ran, the bytes still held by its result)
+    """
+    reset = getattr(operation, "reset", lambda: None)
+    measurements = []
+    for _ in range(repeat):
+        reset()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            result = operation()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del result
+        measurements.append((peak - before, current - before))
+    return min(measurements)
+
+
+def run_suite(quick: bool = False, only: set[str] = None) -> dict:
+    """
+    Measures every operation on every board size and treasure density.
+    :param quick: Whether to take shorter and fewer timings, for a fast but noisier check.
+    :param only: The names of the results to measure, all of them by default.
+    :return: The results, with the environment they were measured in.
+    """
+    min_time, repeat = (0.02, 3) if quick else (0.1, 5)
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):  # Moves, results and display print
+        for length in LENGTHS:
+            for density in DENSITIES:
+                keys = {f"{name}/{length}x{length}/{density}": name for name in OPERATIONS}
+                if only is not None and not only.intersection(keys):
+                    continue
+                operations = get_operations(length, density)
+                for key, name in keys.items():
+                    if only is not None and key not in only:
+                        continue
+                    operation = operations[name]
+                    peak, retained = measure_memory(operation)
+                    results[key] = {
+                        "ns_per_op": round(time_operation(operation, min_time, repeat), 1),
+                        "peak_bytes": peak,
+                        "retained_bytes": retained,
+                    }
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def get_regressions(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    :param baseline: The baseline results.
+    :param current: The current results.
+    :param threshold: The fraction by which an operation may be slower or larger than its baseline.
+    :return: The names of the operations slower or larger than their baseline by more than the threshold.
+    """
+    regressions = []
+    for name, before in baseline["results"].items():
+        after = current["results"].get(name)
+        if after is not None and is_regression(before, after, threshold):
+            regressions.append(name)
+    return regressions
+
+
+def is_regression(before: dict, after: dict, threshold: float) -> bool:
+    """
+    :param before: The baseline result of an operation.
+    :param after: The current result of the operation.
+    :param threshold: The fraction by which the operation may be slower or larger than its baseline.
+    :return: Whether the operation is slower, or its peak memory larger, by more than the threshold.
+    """
+    growth = after["peak_bytes"] - before["peak_bytes"]
+    return after["ns_per_op"] > before["ns_per_op"] * (1 + threshold) or \
+        growth > max(MIN_BYTES, threshold * before["peak_bytes"])
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    Prints every operation's time and peak memory against its baseline.
+    :param baseline: The baseline results.
+    :param current: The current results.
+    :param threshold: The fraction by which an operation may be slower or larger than its baseline.
+    :return: The names of the operations that regressed.
+    """
+    regressions = []
+    print(f"{'operation':<40} {'baseline ns':>12} {'current ns':>12} {'change':>8} {'peak change':>12}")
+    for name, before in baseline["results"].items():
+        after = current["results"].get(name)
+        if after is None:
+            print(f"{name:<40} {before['ns_per_op']:>12.0f} {'missing':>12}")
+            continue
+        change = after["ns_per_op"] / before["ns_per_op"] - 1
+        growth = after["peak_bytes"] - before["peak_bytes"]
+        regressed = is_regression(before, after, threshold)
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<40} {before['ns_per_op']:>12.0f} {after['ns_per_op']:>12.0f} {change:>+8.1%} "
+              f"{growth:>+11}B{flag}")
+        if regressed:
+            regressions.append(name)
+    for name in sorted(current["results"].keys() - baseline["results"].keys()):
+        print(f"{name:<40} {'new':>12} {current['results'][name]['ns_per_op']:>12.0f}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the board operations, with regression tracking.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Measure every operation and print or save the results.")
+    run.add_argument("--output", help="The JSON file to write the results to.")
+    run.add_argument("--quick", action="store_true", help="Take shorter, noisier timings.")
+    check = commands.add_parser("compare", help="Compare results against a baseline and flag regressions.")
+    check.add_argument("--baseline", default=BASELINE, help="The baseline JSON file.")
+    check.add_argument("--current", help="The JSON file of the results to check, measured now if not given.")
+    check.add_argument("--threshold", type=float, default=0.25,
+                       help="The fraction an operation may be slower or larger than its baseline.")
+    check.add_argument("--confirm", type=int, default=3,
+                       help="How many more times an operation that looks slower is measured before it is flagged.")
+    check.add_argument("--quick", action="store_true", help="Take shorter, noisier timings.")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_suite(args.quick)
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w") as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+                file.write("\n")
+        for name, result in results["results"].items():
+            print(f"{name:<40} {result['ns_per_op']:>12.0f} ns {result['peak_bytes']:>10} B peak "
+                  f"{result['retained_bytes']:>10} B retained")
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if args.current:
+        with open(args.current) as file:
+            current = json.load(file)
+    else:
+        current = run_suite(args.quick)
+        for _ in range(args.confirm):
+            suspects = get_regressions(baseline, current, args.threshold)
+            if not suspects:
+                break
+            for name, result in run_suite(args.quick, set(suspects))["results"].items():
+                current["results"][name]["ns_per_op"] = min(current["results"][name]["ns_per_op"], result["ns_per_op"])
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+"""
+Measures the collision and emptiness checks of a Board: a movement validity check, a free-neighbour query and picking
+an empty tile, each through the occupancy bitsets and through the Tile objects the bitsets replace.
+
+Usage: python benchmarks/bench_occupancy.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Board import Board  # noqa: E402
+import constants  # noqa: E402
+
+DIRECTIONS = [constants.UP, constants.DOWN, constants.LEFT, constants.RIGHT]
+
+
+def tile_can_move(board: Board, row: int, col: int, direction: str) -> bool:
+    row += {constants.UP: -1, constants.DOWN: 1}.get(direction, 0)
+    col += {constants.LEFT: -1, constants.RIGHT: 1}.get(direction, 0)
+    return 0 <= row < board.length and 0 <= col < board.length and board.game_board[row][col].get_player() is None
+
+
+def tile_empty_cells(board: Board) -> list:
+    return [tile for row in board.game_board for tile in row if tile.treasure is None and tile.player is None]
+
+
+def main() -> None:
+    print(f"{'length':>6} {'move tiles':>11} {'move bits':>10} {'free tiles':>11} {'free bits':>10} "
+          f"{'empty tiles':>12} {'empty bits':>11}")
+    for length in [10, 25, 50]:
+        board = Board(length, length * length // 4, 1, 5)
+        for name in ["1", "2", "3", "4"]:
+            board.add_player_to_game_board(name)
+        row, col = board.find_player_by_name("1").get_coordinates()
+        cell = row * length + col
+        occupancy = board.occupancy
+        number = 20000
+        results = [
+            timeit.timeit(lambda: [tile_can_move(board, row, col, d) for d in DIRECTIONS], number=number),
+            timeit.timeit(lambda: [occupancy.can_move(cell, d) for d in DIRECTIONS], number=number),
+            timeit.timeit(lambda: [d for d in DIRECTIONS if tile_can_move(board, row, col, d)], number=number),
+            timeit.timeit(lambda: occupancy.get_free_neighbours(cell), number=number),
+            timeit.timeit(lambda: tile_empty_cells(board), number=number // 100),
+            timeit.timeit(lambda: occupancy.get_empty(), number=number // 100),
+        ]
+        per_call = [result / number * 1e9 for result in results[:4]] + [r / (number // 100) * 1e6 for r in results[4:]]
+        print(f"{length:>6} {per_call[0]:>8.0f} ns {per_call[1]:>7.0f} ns {per_call[2]:>8.0f} ns "
+              f"{per_call[3]:>7.0f} ns {per_call[4]:>9.1f} us {per_call[5]:>8.2f} us")
+
+
+if __name__ == '__main__':
+    main()
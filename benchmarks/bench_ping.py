@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""
+Measures round trip times with the PING command against an in-process server, with moves answered straight away and
+in tick mode, where a ping sent after a move is held back until the tick and the time it was held is left out. Also
+reports the cost of adding a sample to an RttEstimator.
+
+Usage: python benchmarks/bench_ping.py [num_pings] [tick_interval]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GameHarness import GameHarness  # noqa: E402
+from RttEstimator import RttEstimator  # noqa: E402
+
+
+async def ping(harness: GameHarness, num_pings: int, with_moves: bool) -> tuple[list[float], tuple[float, float]]:
+    player = harness.client()
+    await player.connect()
+    rtts = []
+    for index in range(num_pings):
+        if with_moves:
+            await player.send_moves("UD"[index % 2])
+        rtts.append(await player.ping())
+    server_latency = player.server_latency
+    await player.quit()
+    return sorted(rtts), server_latency
+
+
+def report(name: str, rtts: list[float], server_latency: tuple[float, float]) -> None:
+    print(f"{name:<24} p50 {rtts[len(rtts) // 2] * 1e6:>7.0f} us  p99 {rtts[len(rtts) * 99 // 100] * 1e6:>7.0f} us  "
+          f"server srtt {server_latency[0] * 1e6:>7.0f} us  jitter {server_latency[1] * 1e6:>6.0f} us")
+
+
+def main() -> None:
+    num_pings = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    tick_interval = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    with contextlib.redirect_stdout(io.StringIO()):  # The server prints the board when a match ends
+        with GameHarness(command_rate=0) as harness:
+            results = [("pings", *asyncio.run(ping(harness, num_pings, False))),
+                       ("pings after moves", *asyncio.run(ping(harness, num_pings, True)))]
+        with GameHarness(command_rate=0, tick_interval=tick_interval) as harness:
+            ticks = asyncio.run(ping(harness, num_pings // 10, True))
+            results.append((f"ticks of {tick_interval * 1000:.0f} ms", *ticks))
+    for result in results:
+        report(*result)
+
+    latency = RttEstimator()
+    samples = [0.001 + (index % 7) * 1e-4 for index in range(100000)]
+    start = time.perf_counter()
+    for sample in samples:
+        latency.add_sample(sample)
+    print(f"RttEstimator.add_sample: {(time.perf_counter() - start) / len(samples) * 1e9:.0f} ns per sample")
+
+
+if __name__ == '__main__':
+    main()
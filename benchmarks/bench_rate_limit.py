@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+"""
+Measures how much a flooding client hurts another player. One connection sends GAME commands as fast as it can
+(reading the answers so TCP never pushes back), while the other player sends one GAME command at a time and records
+its round-trip latency. The server runs once without a command rate limit and once with the default limit.
+
+Usage: python benchmarks/bench_rate_limit.py [num_commands]
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GameClient import GameClient  # noqa: E402
+import constants  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 23458
+
+
+async def connect() -> GameClient:
+    for _ in range(100):
+        game_client = GameClient('127.0.0.1', PORT)
+        try:
+            await game_client.connect()
+            return game_client
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError("Server did not start")
+
+
+async def flood(game_client: GameClient, stop: asyncio.Event) -> int:
+    sent = 0
+    updates = game_client.updates()
+    while not stop.is_set():
+        sent += await game_client.send_moves("G" * 256)
+        for _ in range(256):
+            await anext(updates)
+    return sent
+
+
+async def measure(num_commands: int) -> tuple[list[float], float]:
+    flooder = await connect()
+    player = await connect()
+    stop = asyncio.Event()
+    flooding = asyncio.create_task(flood(flooder, stop))
+    await asyncio.sleep(0.2)
+    latencies = []
+    updates = player.updates()
+    start = time.perf_counter()
+    for _ in range(num_commands):
+        sent_at = time.perf_counter()
+        await player.send_moves("G")
+        await anext(updates)
+        latencies.append(time.perf_counter() - sent_at)
+        await asyncio.sleep(1 / constants.COMMAND_RATE)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    flood_rate = await flooding / (elapsed + 0.2)
+    return sorted(latencies), flood_rate
+
+
+def main() -> None:
+    num_commands = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    print(f"{'server':>18} {'p50 us':>8} {'p99 us':>8} {'flooder commands/s':>19}")
+    for name, options in {"no rate limit": ["--command-rate", "0"], "default limit": []}.items():
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py"), "--port", str(PORT)] + options,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            latencies, flood_rate = asyncio.run(measure(num_commands))
+        finally:
+            server.terminate()
+            server.wait()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(f"{name:>18} {p50 * 1e6:>8.0f} {p99 * 1e6:>8.0f} {flood_rate:>19.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""
+Measures how many boards per second can be rendered in the display format: tile by tile, calling __str__ on every
+Tile, against view.render, which copies a template of the board's terrain and writes only the cells holding treasure
+or a player. Both produce the same bytes.
+
+Usage: python benchmarks/bench_render.py [num_boards]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Board import Board  # noqa: E402
+from Terrain import Terrain  # noqa: E402
+import view  # noqa: E402
+
+
+def make_boards(num_boards: int, length: int) -> list[Board]:
+    rng = random.Random(length)
+    terrain = Terrain.generate(length, 0.2, seed=length)
+    boards = []
+    for _ in range(num_boards):
+        board = Board(length, length * length // 10, 1, 5, terrain=terrain)
+        board.add_player_to_game_board("1")
+        board.add_player_to_game_board("2")
+        for _ in range(length):
+            for player in board.players:
+                board.move_player(player, rng.choice("UDLR"))
+        boards.append(board)
+    return boards
+
+
+def boards_per_second(render, boards: list[Board]) -> float:
+    start = time.perf_counter()
+    for board in boards:
+        render(board)
+    return len(boards) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    num_boards = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"{'length':>6}  {'tile by tile':>14}  {'template':>14}  speedup")
+    for length in [10, 25, 50]:
+        with contextlib.redirect_stdout(io.StringIO()):  # Collecting treasure prints the new score
+            boards = make_boards(num_boards, length)
+        assert all(view.render(board) == view.render_tiles(board) for board in boards)
+        tiles = boards_per_second(view.render_tiles, boards)
+        template = boards_per_second(view.render, boards)
+        print(f"{length:>6}  {tiles:>10.0f}/s    {template:>10.0f}/s    {template / tiles:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""
+Measures the shared memory read replicas of a board: the cost of publishing an update in the game process, and how
+many snapshots a worker process reads per second (and how often it retries) while the game keeps publishing, against
+asking the game process for a pickled board over a pipe.
+
+Usage: python benchmarks/bench_replica.py [board_length] [seconds]
+"""
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Board import Board  # noqa: E402
+from SharedBoard import BoardReplica, SharedBoard  # noqa: E402
+
+PREFIX = f"treasure_bench_{os.getpid()}"
+
+
+def get_payload(board: Board) -> tuple[int, int, bytes]:
+    rendered = ''.join(''.join(str(tile) + ' ' for tile in row) + '\n' for row in board.game_board).encode()
+    return board.players[0].get_score(), board.players[1].get_score(), rendered
+
+
+def read_snapshots(seconds: float, results) -> None:
+    replica = BoardReplica(PREFIX, 0)
+    reads = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        replica.get_board_payload()
+        reads += 1
+    replica.close()
+    results.put((reads / seconds, replica.retries))
+
+
+def serve_pickles(connection, payload: tuple[int, int, bytes]) -> None:
+    while connection.recv():
+        connection.send(pickle.dumps(payload))
+
+
+def main() -> None:
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    board = Board(length, length, 1, 5)
+    board.add_player_to_game_board("1")
+    board.add_player_to_game_board("2")
+    payload = get_payload(board)
+    shared = SharedBoard(PREFIX, 0, board)
+    try:
+        publishes = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds / 4:
+            board.version += 1
+            shared.publish(board, payload)
+            publishes += 1
+        publish = (time.perf_counter() - start) / publishes
+
+        results = multiprocessing.Queue()
+        worker = multiprocessing.Process(target=read_snapshots, args=(seconds, results))
+        worker.start()
+        while worker.is_alive() and results.empty():
+            board.version += 1
+            shared.publish(board, payload)
+        reads, retries = results.get()
+        worker.join()
+    finally:
+        shared.close()
+
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=serve_pickles, args=(child, payload))
+    server.start()
+    requests = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        parent.send(True)
+        pickle.loads(parent.recv())
+        requests += 1
+    parent.send(False)
+    server.join()
+
+    print(f"{length}x{length} board")
+    print(f"publish: {publish * 1e6:.1f} us per update")
+    print(f"replica: {reads:,.0f} snapshots/s while publishing, {retries} retries")
+    print(f"pipe:    {requests / seconds:,.0f} pickled payloads/s from the game process")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+"""
+Measures the cost of scheduling treasure respawns in the TimerWheel, and of one tick of the wheel, as the number of
+pending respawns grows. Compares with one asyncio sleep task per respawn, which is what the wheel replaces.
+
+Usage: python benchmarks/bench_respawn.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TimerWheel import TimerWheel  # noqa: E402
+
+
+def wheel_costs(pending: int) -> tuple[float, float]:
+    wheel = TimerWheel(resolution=0.1)
+    start = time.perf_counter()
+    for timer in range(pending):
+        wheel.schedule(30 + (timer % 600) / 10, timer)  # Respawn delays of 30 to 90 seconds
+    schedule = (time.perf_counter() - start) / pending
+    start = time.perf_counter()
+    wheel.advance(100)
+    return schedule, (time.perf_counter() - start) / 100
+
+
+async def task_costs(pending: int) -> tuple[float, float]:
+    async def respawn(delay: float) -> None:
+        await asyncio.sleep(delay)
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(respawn(30 + (timer % 600) / 10)) for timer in range(pending)]
+    schedule = (time.perf_counter() - start) / pending
+    await asyncio.sleep(0)  # Let every task start its sleep
+    start = time.perf_counter()
+    for _ in range(10):
+        await asyncio.sleep(0)
+    tick = (time.perf_counter() - start) / 10
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return schedule, tick
+
+
+def main() -> None:
+    print(f"{'pending':>8} {'wheel schedule':>15} {'wheel tick':>11} {'task schedule':>14} {'loop iteration':>15}")
+    for pending in [1000, 10000, 100000]:
+        wheel_schedule, wheel_tick = wheel_costs(pending)
+        task_schedule, task_tick = asyncio.run(task_costs(pending))
+        print(f"{pending:>8} {wheel_schedule * 1e9:>12.0f} ns {wheel_tick * 1e6:>8.1f} us "
+              f"{task_schedule * 1e9:>11.0f} ns {task_tick * 1e6:>12.1f} us")
+
+
+if __name__ == '__main__':
+    main()
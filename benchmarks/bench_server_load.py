@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+"""
+Load benchmark for the server's network settings. Each variant starts main.py in a subprocess with different
+ServerConfig options, then measures:
+  - command latency: round-trip time of GAME commands sent by both players back to back (p50 / p99),
+  - connection burst: time for a burst of simultaneous connections to be accepted (and rejected, the game is full).
+
+Usage: python benchmarks/bench_server_load.py [num_commands] [burst_size]
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from struct import unpack
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 23456
+
+VARIANTS = {
+    "default": [],
+    "no tcp_nodelay": ["--no-tcp-nodelay"],
+    "backlog 8": ["--backlog", "8"],
+    "backlog 4096": ["--backlog", "4096"],
+    "reuse_port": ["--reuse-port"],
+    "asyncio loop": ["--event-loop", "asyncio"],
+    "uvloop": ["--event-loop", "uvloop"],
+}
+
+
+async def wait_for_server() -> None:
+    """Waits until the server accepts connections, quitting the probe connection so it gives its seat back."""
+    for _ in range(100):
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+        except OSError:
+            await asyncio.sleep(0.05)
+            continue
+        await reader.readexactly(3)
+        writer.write(b'\x04')
+        await reader.readexactly(unpack('!H', await reader.readexactly(2))[0])
+        writer.close()
+        return
+    raise RuntimeError("Server did not start")
+
+
+async def command_latencies(num_commands: int) -> list[float]:
+    connections = []
+    for _ in range(2):
+        reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+        header = await reader.readexactly(2)
+        player_id = (await reader.readexactly(unpack('!H', header)[0]))[0]
+        connections.append((reader, writer, bytes([0xF0 | (player_id << 2)])))
+
+    async def play(reader, writer, command) -> list[float]:
+        latencies = []
+        for _ in range(num_commands):
+            start = time.perf_counter()
+            writer.write(command)
+            length = unpack('!H', await reader.readexactly(2))[0]
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    results = await asyncio.gather(*(play(*connection) for connection in connections))
+    return sorted(results[0] + results[1])
+
+
+async def connection_burst(burst_size: int) -> tuple[float, int]:
+    async def connect() -> bool:
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', PORT), 5)
+            await asyncio.wait_for(reader.readexactly(2), 5)
+            writer.close()
+            return True
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return False
+
+    start = time.perf_counter()
+    answered = await asyncio.gather(*(connect() for _ in range(burst_size)))
+    return time.perf_counter() - start, answered.count(False)
+
+
+async def run_variant(num_commands: int, burst_size: int) -> tuple[list[float], float, int]:
+    await wait_for_server()
+    latencies = await command_latencies(num_commands)
+    burst, failed = await connection_burst(burst_size)
+    return latencies, burst, failed
+
+
+def main() -> None:
+    num_commands = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    burst_size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    print(f"{'variant':>15} {'p50 us':>8} {'p99 us':>8} {'burst ms':>9} {'failed':>7}")
+    for name, options in VARIANTS.items():
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py"), "--port", str(PORT),
+                                   "--command-rate", "0"] + options,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            latencies, burst, failed = asyncio.run(run_variant(num_commands, burst_size))
+        finally:
+            server.terminate()
+            server.wait()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(f"{name:>15} {p50 * 1e6:>8.1f} {p99 * 1e6:>8.1f} {burst * 1e3:>9.1f} {failed:>7}")
+
+
+if __name__ == '__main__':
+    main()
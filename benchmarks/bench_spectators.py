@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+"""
+Streams a match to many spectators while one player moves back and forth. The server and the spectators each run in
+their own process; this process plays and also holds one stalled spectator that stops reading its socket until the
+moves are over. Reports the player's command latency, the updates received by the spectators, and how many updates
+the stalled spectator received once it caught up (the rest were dropped in favour of the latest board).
+
+Usage: python benchmarks/bench_spectators.py [num_spectators] [num_moves]
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from struct import unpack
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 23457
+
+
+async def read_frame(reader) -> bytes:
+    length = unpack('!H', await reader.readexactly(2))[0]
+    return await reader.readexactly(length)
+
+
+async def count_frames(reader, timeout: float) -> int:
+    count = 0
+    try:
+        while True:
+            await asyncio.wait_for(read_frame(reader), timeout)
+            count += 1
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+        return count
+
+
+async def spectate(rcvbuf: int = 0):
+    sock = socket.socket()
+    if rcvbuf:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    sock.connect(('127.0.0.1', PORT))
+    reader, writer = await asyncio.open_connection(sock=sock)
+    await reader.readexactly(2)
+    writer.write(b'\x50')
+    return reader, writer
+
+
+async def run_spectators(num_spectators: int) -> None:
+    connections = [await spectate() for _ in range(num_spectators)]
+    counts = await asyncio.gather(*(count_frames(reader, 5.0) for reader, _ in connections))
+    print(min(counts, default=0), max(counts, default=0))
+
+
+async def play(num_moves: int) -> tuple[list[float], int]:
+    players = []
+    for _ in range(2):
+        reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+        await reader.readexactly(3)
+        players.append((reader, writer))
+    stalled_reader, stalled_writer = await spectate(rcvbuf=4096)
+    stalled_writer.transport.pause_reading()
+    await asyncio.sleep(1.0)
+
+    reader, writer = players[0]
+    latencies = []
+    for index in range(num_moves):
+        start = time.perf_counter()
+        writer.write(b'\x64' if index % 2 == 0 else b'\x44')
+        await read_frame(reader)
+        latencies.append(time.perf_counter() - start)
+    stalled_writer.transport.resume_reading()
+    caught_up = await count_frames(stalled_reader, 0.5)
+    return sorted(latencies), caught_up
+
+
+def wait_for_server() -> None:
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', PORT)).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+
+
+def main() -> None:
+    if sys.argv[1:2] == ["--spectators"]:
+        asyncio.run(run_spectators(int(sys.argv[2])))
+        return
+    num_spectators = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    num_moves = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py"), "--port", str(PORT),
+                               "--command-rate", "0"],
+                              stdout=subprocess.DEVNULL)
+    try:
+        time.sleep(0.5)
+        spectators = subprocess.Popen([sys.executable, __file__, "--spectators", str(num_spectators)],
+                                      stdout=subprocess.PIPE, text=True)
+        time.sleep(1.0)
+        latencies, caught_up = asyncio.run(play(num_moves))
+        received = spectators.communicate()[0].split()
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{num_spectators} spectators + 1 stalled, {num_moves} moves")
+    print(f"move latency p50 {latencies[len(latencies) // 2] * 1e6:.0f} us, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f} us")
+    print(f"updates received per spectator: min {received[0]}, max {received[1]}")
+    print(f"stalled spectator received {caught_up} updates after catching up, {num_moves + 1 - caught_up} dropped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""
+Compares the per-room cost of applying moves as they arrive with resolving them once per tick. Both players flood the
+room with moves; in the immediate mode every move is applied and rendered on its own, in tick mode the moves of one
+tick are resolved together and the board is rendered once.
+
+Usage: python benchmarks/bench_ticks.py [moves_per_tick] [num_ticks]
+"""
+import io
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Board import Board  # noqa: E402
+from Room import Room  # noqa: E402
+import constants  # noqa: E402
+
+
+def create_room() -> Room:
+    board = Board(constants.BOARD_LENGTH, constants.NUM_TREASURES, constants.MIN_TREASURE, constants.MAX_TREASURE)
+    board.add_player_to_game_board(constants.PLAYER_ONE_NAME)
+    board.add_player_to_game_board(constants.PLAYER_TWO_NAME)
+    return Room(constants.DEFAULT_ROOM, board)
+
+
+def main() -> None:
+    moves_per_tick = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    num_ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(0)
+    inputs = [[(rng.choice([constants.PLAYER_ONE_NAME, constants.PLAYER_TWO_NAME]),
+                rng.choice([constants.UP, constants.DOWN, constants.LEFT, constants.RIGHT]))
+               for _ in range(moves_per_tick)] for _ in range(num_ticks)]
+
+    with redirect_stdout(io.StringIO()):
+        room = create_room()
+        start = time.perf_counter()
+        for tick in inputs:
+            for player, direction in tick:
+                room.board.move_player_on_board(player, direction)
+                room.get_board_payload()
+        immediate = time.perf_counter() - start
+
+        room = create_room()
+        start = time.perf_counter()
+        for tick in inputs:
+            for player, direction in tick:
+                room.submit_move(player, direction)
+            room.resolve_tick()
+            room.get_board_payload()
+        ticked = time.perf_counter() - start
+
+    print(f"{moves_per_tick} moves per tick, {num_ticks} ticks")
+    print(f"immediate: {immediate / num_ticks * 1e3:.2f} ms per tick of input")
+    print(f"tick mode: {ticked / num_ticks * 1e3:.2f} ms per tick ({immediate / ticked:.0f}x less work)")
+
+
+if __name__ == "__main__":
+    main()
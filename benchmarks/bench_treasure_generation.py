@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""
+Compares the old treasure placement (retrying random tiles until an empty one is found, and a new Treasure per tile)
+with the bulk TreasureGenerator on a 50x50 board, for each named distribution and several treasure densities.
+
+Usage: python benchmarks/bench_treasure_generation.py [repeats]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Board import Board  # noqa: E402
+from Treasure import Treasure  # noqa: E402
+from treasure_generation import DISTRIBUTIONS, TreasureGenerator, numpy  # noqa: E402
+
+LENGTH = 50
+
+
+def populate_one_by_one(board: Board, count: int) -> None:
+    for _ in range(count):
+        tile = board.find_empty_tile()
+        tile.add_treasure(Treasure(random.randint(board.min_treasure, board.max_treasure)))
+
+
+def time_per_board(populate, repeats: int) -> float:
+    boards = [Board(LENGTH, 0, 1, 100) for _ in range(repeats)]
+    start = time.perf_counter()
+    for board in boards:
+        populate(board)
+    return (time.perf_counter() - start) / repeats
+
+
+def main() -> None:
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{LENGTH}x{LENGTH} board, NumPy {'available' if numpy is not None else 'not installed'}")
+    print(f"{'treasures':>9} {'one by one':>11} " + " ".join(f"{name:>10}" for name in DISTRIBUTIONS))
+    for count in [250, 1250, 2400]:
+        old = time_per_board(lambda board: populate_one_by_one(board, count), repeats)
+        bulk = []
+        for name in DISTRIBUTIONS:
+            generator = TreasureGenerator.from_name(name, seed=0)
+            bulk.append(time_per_board(lambda board: generator.populate(board, count), repeats))
+        print(f"{count:>9} {old * 1e3:>9.2f}ms " + " ".join(f"{t * 1e3:>8.2f}ms" for t in bulk))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+from array import array
+from asyncio import get_running_loop, sleep
+from concurrent.futures import ThreadPoolExecutor
+from mmap import mmap, ACCESS_READ
+from struct import Struct
+from sys import byteorder
+from typing import Callable
+import gc
+import os
+from Board import Board
+from Player import Player
+from Terrain import Terrain
+from Treasure import Treasure
+
+"""
+Binary checkpoints of every live Board, so in-progress matches survive a server restart. A checkpoint file is laid
+out as follows (all integers little-endian):
+  - File header:   magic b'TRCP', format version (unsigned short), number of boards (unsigned int).
+  - Per board:     room id (unsigned int), length (unsigned char), treasures left (unsigned short),
+                   min and max treasure (unsigned shorts), number of players (unsigned char),
+                   then length x length unsigned shorts holding the treasure value of each cell row by row (0 = none),
+                   then (since version 2) a terrain flag (unsigned char), followed if it is 1 by length x length
+                   unsigned chars holding the terrain kind of each cell row by row,
+                   then per player: row, col (unsigned shorts), score (unsigned int), name length (unsigned char), name.
+Version 1 files, written before boards had terrain, are still read.
+"""
+
+MAGIC = b'TRCP'
+VERSION = 2
+FILE_HEADER = Struct('<4sHI')
+BOARD_HEADER = Struct('<IBHHHB')
+PLAYER_RECORD = Struct('<HHIB')
+
+
+def encode_board(room_id: int, board: Board) -> bytes:
+    """
+    Board ----> Checkpoint Record
+    :param room_id: The id of the room the board belongs to.
+    :param board: The Board to encode.
+    :return: The packed record for the board: header, cell array and player table.
+    """
+    cells = array('H', [0 if tile.treasure is None else tile.treasure.value for row in board.game_board for tile in row])
+    if byteorder == 'big':
+        cells.byteswap()
+    parts = [BOARD_HEADER.pack(room_id, board.length, board.num_treasures, board.min_treasure, board.max_treasure,
+                               len(board.players)), cells.tobytes()]
+    if board.terrain is None:
+        parts.append(b'\x00')
+    else:
+        parts.extend([b'\x01', board.terrain.cells])
+    for player in board.players:
+        name = player.get_name().encode()
+        row, col = player.get_coordinates()
+        parts.append(PLAYER_RECORD.pack(row, col, player.get_score(), len(name)))
+        parts.append(name)
+    return b''.join(parts)
+
+
+def decode_board(data: memoryview, offset: int, version: int = VERSION) -> tuple[int, Board, int]:
+    """
+    Checkpoint Record ----> Board
+    :param data: The contents of the checkpoint file.
+    :param offset: The offset of the board record in data.
+    :param version: The format version of the checkpoint file.
+    :return: (room id, restored Board, offset of the next record)
+    """
+    room_id, length, num_treasures, min_treasure, max_treasure, num_players = BOARD_HEADER.unpack_from(data, offset)
+    offset += BOARD_HEADER.size
+    cells = array('H')
+    cells.frombytes(data[offset:offset + 2 * length * length])
+    if byteorder == 'big':
+        cells.byteswap()
+    offset += 2 * length * length
+    terrain = None
+    if version >= 2:
+        if data[offset]:
+            terrain = Terrain(length, data[offset + 1:offset + 1 + length * length])
+            offset += length * length
+        offset += 1
+
+    board = Board(length, 0, min_treasure, max_treasure, terrain=terrain)
+    for index, value in enumerate(cells):
+        if value:
+            board.game_board[index // length][index % length].add_treasure(Treasure(value))
+    board.num_treasures = num_treasures
+
+    for _ in range(num_players):
+        row, col, score, name_length = PLAYER_RECORD.unpack_from(data, offset)
+        offset += PLAYER_RECORD.size
+        player = Player((row, col), bytes(data[offset:offset + name_length]).decode(), score)
+        offset += name_length
+        board.players.append(player)
+        board.game_board[row][col].add_player(player)
+    return room_id, board, offset
+
+
+def write_checkpoint(path: str, records: list[bytes]) -> None:
+    """
+    Writes encoded board records to a checkpoint file atomically: the data is written and synced to a temporary file
+    which then replaces the checkpoint, so a crash mid-write leaves the previous checkpoint intact.
+    :param path: The path of the checkpoint file.
+    :param records: The records produced by encode_board.
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(FILE_HEADER.pack(MAGIC, VERSION, len(records)))
+        file.writelines(records)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def read_checkpoint(path: str) -> dict[int, Board]:
+    """
+    Restores every board in a checkpoint file. The file is memory-mapped and decoded in place. Restoring allocates a
+    Tile per cell, so the garbage collector is paused while decoding rather than scanning the new objects repeatedly.
+    :param path: The path of the checkpoint file.
+    :return: A dict mapping room id to the restored Board.
+    :raises ValueError: If the file is not a checkpoint or was written by an unsupported format version.
+    """
+    boards = {}
+    with open(path, 'rb') as file, mmap(file.fileno(), 0, access=ACCESS_READ) as mapped:
+        data = memoryview(mapped)
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            magic, version, num_boards = FILE_HEADER.unpack_from(data, 0)
+            if magic != MAGIC or version not in (1, VERSION):
+                raise ValueError("Error: Unsupported checkpoint file")
+            offset = FILE_HEADER.size
+            for _ in range(num_boards):
+                room_id, board, offset = decode_board(data, offset, version)
+                boards[room_id] = board
+        finally:
+            data.release()
+            if collecting:
+                gc.enable()
+    return boards
+
+
+class Checkpointer:
+    """
+    The Checkpointer class periodically writes every live board to a checkpoint file. Boards are encoded on the event
+    loop, since that is the only thread that mutates them, in batches separated by yields so command handling keeps
+    running between batches. The file is written by a worker thread.
+    """
+    def __init__(self, path: str, interval: float, get_boards: Callable[[], dict[int, Board]],
+                 batch_cells: int = 8192):
+        """
+        Initialize a Checkpointer.
+        :param path: The path of the checkpoint file.
+        :param interval: The number of seconds between checkpoints.
+        :param get_boards: Returns a dict mapping room id to each live Board.
+        :param batch_cells: The number of board cells encoded between yields to the event loop.
+        """
+        self.path = path
+        self.interval = interval
+        self.get_boards = get_boards
+        self.batch_cells = batch_cells
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint')
+
+    async def checkpoint(self) -> None:
+        """Asynchronously writes one checkpoint of every live board."""
+        records = []
+        cells = 0
+        for room_id, board in list(self.get_boards().items()):
+            records.append(encode_board(room_id, board))
+            cells += board.length * board.length
+            if cells >= self.batch_cells:
+                cells = 0
+                await sleep(0)
+        await get_running_loop().run_in_executor(self.executor, write_checkpoint, self.path, records)
+
+    async def run(self) -> None:
+        """Asynchronously writes a checkpoint every interval seconds, forever."""
+        while True:
+            await sleep(self.interval)
+            try:
+                await self.checkpoint()
+            except OSError as e:
+                print("Checkpoint failed.")
+                print(e)
@@ -2,10 +2,30 @@
 HOST = ''
 PORT = 12345
 HEADER_LENGTH = 2
+WIDE_HEADER_LENGTH = 5
+BACKLOG = 1024
+READ_SIZE = 65536
+
+# Event Loop Constants
+LOOP_AUTO = "auto"
+LOOP_ASYNCIO = "asyncio"
+LOOP_UVLOOP = "uvloop"
+EVENT_LOOPS = (LOOP_AUTO, LOOP_ASYNCIO, LOOP_UVLOOP)
+
+# Codec Constants (negotiated with the CODEC command, sent in the wide frame header)
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_RLE = 2
+CODEC_NAMES = {"raw": CODEC_RAW, "zlib": CODEC_ZLIB, "rle": CODEC_RLE}
+DEFAULT_CODEC = "zlib"  # Negotiated by the command line client unless another codec is named
+ZLIB_LEVEL = 1
 
 # Game Constants
 TREASURE_DESCRIPTION = '$'
 TILE_DESCRIPTION = "."
+WALL_DESCRIPTION = "#"
+MUD_DESCRIPTION = "~"
+FOG_DESCRIPTION = "?"
 PLAYER_ONE_NAME = "1"
 PLAYER_TWO_NAME = "2"
 BOARD_LENGTH = 10
@@ -13,6 +33,36 @@ NUM_TREASURES = 10
 MIN_TREASURE = 1
 MAX_TREASURE = 5
 MAX_PLAYERS = 2
+DEFAULT_ROOM = 0
+SPECTATE_WAIT = 1.0
+BOT_INTERVAL = 0.25
+CHECKPOINT_INTERVAL = 5.0
+RESPAWN_RESOLUTION = 0.1
+TERRAIN_MAX_DENSITY = 0.5
+JOURNAL_CAPACITY = 65536
+
+# Matchmaking Constants
+INITIAL_RATING = 1000.0
+RATING_K = 32.0
+RATING_BUCKET = 100.0
+RTT_BUCKET = 0.02
+MATCH_WIDEN_INTERVAL = 1.0
+MATCH_MAX_WAIT = 10.0
+MATCH_INTERVAL = 0.1
+MATCH_SEAT_TIMEOUT = 5.0
+
+# Latency Constants
+RTT_ALPHA = 0.125
+RTT_BETA = 0.25
+MAX_RTT_SAMPLE = 10.0
+
+# Abuse Protection Constants
+COMMAND_RATE = 100.0
+COMMAND_BURST = 50
+MAX_RENDERS = 256
+MAX_STRIKES = 3
+STRIKE_DECAY = 60.0  # Seconds after which an address's strikes are all forgiven
+MAX_STRIKE_HOSTS = 10000
 
 # Movement Constants
 UP = 'U'
@@ -21,5 +71,12 @@ LEFT = "L"
 RIGHT = "R"
 QUIT = "Q"
 GAME = "G"
+CODEC = "C"
+SPECTATE = "S"
+PING = "P"
+DIRECTIONS = {UP: (-1, 0), DOWN: (1, 0), LEFT: (0, -1), RIGHT: (0, 1)}
+
+# Command Byte Constants (CCCC PP OO)
+PLAYER_MASK = 0x0C
 
 
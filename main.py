@@ -1,10 +1,15 @@
 #!/usr/bin/python3
+from os import environ
+from sys import argv
 from Game import Game
+from ServerConfig import ServerConfig
 import asyncio
 
 
-g = Game()
-asyncio.run(g.start())
+config = ServerConfig.from_sources(argv[1:], environ)
+g = Game(config)
+with asyncio.Runner(loop_factory=config.get_loop_factory()) as runner:
+    runner.run(g.start())
 
 
 
@@ -0,0 +1,365 @@
+from asyncio import IncompleteReadError, StreamReader, StreamWriter
+from itertools import groupby
+from struct import Struct
+from typing import AsyncIterator, Optional
+import zlib
+import constants
+
+"""
+Framing helpers shared by the game server and client. Every message sent to a client is a frame made of a length
+header followed by the payload. The helpers in this module write the header and payload to the transport as separate
+buffers so the (potentially large) board payload never has to be concatenated with its header. Frames are read back
+from a single reusable buffer, so one socket read can yield several frames.
+
+Frames start out with a 2 byte length header. Once a client negotiates a codec with the CODEC command, every frame
+uses the wide header instead: the codec id as an unsigned char followed by a 32-bit length, and the payload is encoded
+with that codec.
+
+The PING command byte is followed by a PING_REQUEST: a client timestamp the server echoes without reading it, and the
+client's last round trip time sample in microseconds (0 before its first). The server answers with a PONG frame: the
+echoed timestamp, how long the server held the answer back in microseconds, and the server's smoothed round trip time
+and jitter for the connection in microseconds.
+"""
+
+SHORT_HEADER = Struct('!H')
+WIDE_HEADER = Struct('!BI')
+BOARD_PREFIX = Struct('!HH')
+NO_PREFIX = Struct('')
+PING_REQUEST = Struct('!QI')
+PONG = Struct('!QIII')
+
+
+# ----------------------------------------------------- CODECS ---------------------------------------------------------
+class RawCodec:
+    """
+    The RawCodec leaves payloads untouched. It is negotiated by clients that only want the 32-bit length header.
+    """
+    codec_id = constants.CODEC_RAW
+
+    def encode(self, *parts: bytes) -> bytes:
+        """
+        Joins the parts of a payload.
+        :param parts: The bytes-like parts of the payload, in order.
+        :return: The payload.
+        """
+        return b''.join(parts)
+
+    def decode(self, data: bytes) -> bytes:
+        """
+        Returns the payload unchanged.
+        :param data: The payload received from the server.
+        :return: The payload.
+        """
+        return data
+
+
+class ZlibCodec:
+    """
+    The ZlibCodec compresses payloads with zlib using one compression context per connection. Every message is
+    sync-flushed rather than finished, so later boards are compressed against the history of earlier ones and repeat
+    boards cost only a few bytes. The matching decoder must see every frame of the connection in order.
+    """
+    codec_id = constants.CODEC_ZLIB
+
+    def __init__(self, level: int = constants.ZLIB_LEVEL):
+        """
+        Initialize the persistent compression and decompression contexts.
+        :param level: The zlib compression level, 0 to 9.
+        """
+        self.compressor = zlib.compressobj(level)
+        self.decompressor = zlib.decompressobj()
+
+    def encode(self, *parts: bytes) -> bytes:
+        """
+        Compresses the parts of a payload as a single message.
+        :param parts: The bytes-like parts of the payload, in order.
+        :return: The compressed message, ending on a sync flush boundary.
+        """
+        compressed = [self.compressor.compress(part) for part in parts]
+        compressed.append(self.compressor.flush(zlib.Z_SYNC_FLUSH))
+        return b''.join(compressed)
+
+    def decode(self, data: bytes) -> bytes:
+        """
+        Decompresses a message produced by encode.
+        :param data: The compressed message received from the server.
+        :return: The original payload.
+        """
+        return self.decompressor.decompress(data)
+
+
+class RunLengthCodec:
+    """
+    The RunLengthCodec is a lightweight run-length encoding tuned for the text board, where a cell is a character
+    followed by a space, so runs are of two byte units (". . . ") rather than single bytes. Each row is split into its
+    cells and one groupby pass turns the cells into (count, cell) runs. It needs no state across messages, but costs
+    more CPU than the zlib codec, which is the default. The encoding is a sequence of tokens:
+      - 0x00 to 0x7F: a literal run of (token + 1) bytes follows.
+      - 0x80 to 0xFF: the following two byte unit is repeated (token - 0x80 + 2) times.
+    """
+    codec_id = constants.CODEC_RLE
+    max_literal = 0x80
+    max_run = 0xFF - 0x80 + 2
+    min_run = 3  # Shorter runs cost as much as their literal bytes
+
+    def encode(self, *parts: bytes) -> bytes:
+        """
+        Run-length encodes the parts of a payload as a single message.
+        :param parts: The bytes-like parts of the payload, in order.
+        :return: The encoded message.
+        """
+        output = bytearray()
+        literal = bytearray()
+        for row_index, row in enumerate(b''.join(parts).split(b'\n')):
+            if row_index:
+                literal += b'\n'
+            for cell, run in groupby(zip(row[0::2], row[1::2])):
+                cell = bytes(cell)
+                count = len(list(run))
+                if count < self.min_run:
+                    literal += cell * count
+                    continue
+                self.encode_literal(output, literal)
+                literal.clear()
+                while count >= 2:
+                    repeats = min(count, self.max_run)
+                    output.append(0x80 + repeats - 2)
+                    output += cell
+                    count -= repeats
+                literal += cell * count
+            if len(row) % 2:
+                literal += row[-1:]  # The byte left over after the last whole cell
+        self.encode_literal(output, literal)
+        return bytes(output)
+
+    def encode_literal(self, output: bytearray, literal: bytearray) -> None:
+        """
+        Appends the literal bytes to the output as literal tokens of at most max_literal bytes.
+        :param output: The encoded message being built.
+        :param literal: The bytes that are not part of a run.
+        """
+        for start in range(0, len(literal), self.max_literal):
+            chunk = literal[start:start + self.max_literal]
+            output.append(len(chunk) - 1)
+            output += chunk
+
+    def decode(self, data: bytes) -> bytes:
+        """
+        Decodes a message produced by encode.
+        :param data: The encoded message received from the server.
+        :return: The original payload.
+        :raises ValueError: If the message ends in the middle of a token.
+        """
+        output = bytearray()
+        index = 0
+        while index < len(data):
+            token = data[index]
+            if token < 0x80:
+                end = index + 1 + token + 1
+                output += data[index + 1:end]
+            else:
+                end = index + 3
+                output += data[index + 1:end] * (token - 0x80 + 2)
+            if end > len(data):
+                raise ValueError("Run-length message is truncated")
+            index = end
+        return bytes(output)
+
+
+def create_codec(codec_id: int):
+    """
+    Codec ID ----> Codec
+    :param codec_id: The id of the codec, one of the CODEC constants.
+    :return: A new codec object with its own (per-connection) state.
+    :raises ValueError: If the id does not map to a known codec.
+    """
+    codecs = {
+        constants.CODEC_RAW: RawCodec,
+        constants.CODEC_ZLIB: ZlibCodec,
+        constants.CODEC_RLE: RunLengthCodec,
+    }
+    if codec_id not in codecs:
+        raise ValueError("Error: Unknown codec")
+    return codecs[codec_id]()
+
+
+# -------------------------------------------------- FRAME WRITER ------------------------------------------------------
+class FrameWriter:
+    """
+    The FrameWriter class writes length-prefixed frames to a single client connection. The header and any fixed-size
+    prefix fields (e.g. the player scores) are packed into a small buffer owned by the connection, and the payload is
+    handed to the transport untouched using writelines. Draining is only awaited once the transport's buffered data
+    crosses its high-water mark instead of after every message.
+    """
+    def __init__(self, writer: StreamWriter):
+        """
+        Initialize a FrameWriter for the given connection. Frames use the short header until a codec is negotiated.
+        :param writer: The StreamWriter used for sending data to the specific client.
+        """
+        self.writer = writer
+        self.transport = writer.transport
+        self.codec = None
+        self.header = SHORT_HEADER
+        self.high_water = self.transport.get_write_buffer_limits()[1]
+        self.buffer = bytearray(WIDE_HEADER.size + BOARD_PREFIX.size)
+
+    def set_codec(self, codec_id: int) -> None:
+        """
+        Switches the connection to the wide header and encodes every following payload with the given codec.
+        :param codec_id: The id of the negotiated codec.
+        :raises ValueError: If the id does not map to a known codec.
+        """
+        self.codec = create_codec(codec_id)
+        self.header = WIDE_HEADER
+
+    def get_prefix_buffer(self, size: int) -> bytearray:
+        """
+        Retrieves the connection's prefix buffer. The buffer is only reused once the transport has flushed everything
+        it was given; otherwise the transport may still hold a reference to it, so a fresh buffer is allocated.
+        :param size: The number of bytes the buffer must be able to hold.
+        :return: A bytearray of at least size bytes that is safe to overwrite.
+        """
+        if len(self.buffer) < size or self.transport.get_write_buffer_size() > 0:
+            self.buffer = bytearray(max(size, len(self.buffer)))
+        return self.buffer
+
+    def write_frame(self, payload: bytes, prefix: Struct = NO_PREFIX, *values) -> None:
+        """
+        Writes a single frame: header, optional packed prefix fields and payload. The header length covers both the
+        prefix fields and the payload. With a compressing codec the prefix fields and payload are encoded together.
+        :param payload: The bytes-like payload of the frame.
+        :param prefix: A Struct describing fixed-size fields sent between the header and the payload.
+        :param values: The values packed with the prefix Struct.
+        """
+        if self.codec is not None and self.codec.codec_id != constants.CODEC_RAW:
+            payload = self.codec.encode(prefix.pack(*values), payload)
+            prefix, values = NO_PREFIX, ()
+
+        head_size = self.header.size + prefix.size
+        buffer = self.get_prefix_buffer(head_size)
+        if self.codec is None:
+            self.header.pack_into(buffer, 0, prefix.size + len(payload))
+        else:
+            self.header.pack_into(buffer, 0, self.codec.codec_id, prefix.size + len(payload))
+        prefix.pack_into(buffer, self.header.size, *values)
+        self.writer.writelines((memoryview(buffer)[:head_size], payload))
+
+    async def drain_if_needed(self) -> None:
+        """
+        Asynchronously waits for the transport to flush, but only when its buffered data exceeds the high-water mark.
+        """
+        if self.transport.get_write_buffer_size() > self.high_water:
+            await self.writer.drain()
+
+    async def drain(self) -> None:
+        """Asynchronously waits for the transport to flush all buffered data."""
+        await self.writer.drain()
+
+
+# -------------------------------------------------- FRAME READER ------------------------------------------------------
+class FrameReader:
+    """
+    The FrameReader class reads length-prefixed frames from a single connection. Data is read in chunks of up to
+    READ_SIZE bytes into a reusable buffer and frames are parsed from it in place, so a single read can yield several
+    frames and a frame split across reads is completed by the following reads. Each payload is copied out of the
+    buffer exactly once.
+    """
+    def __init__(self, reader: StreamReader, read_size: int = constants.READ_SIZE):
+        """
+        Initialize a FrameReader for the given connection. Frames use the short header until a codec is negotiated.
+        :param reader: The StreamReader used for reading data from the connection.
+        :param read_size: The maximum number of bytes requested from the connection per read.
+        """
+        self.reader = reader
+        self.read_size = read_size
+        self.codec = None
+        self.header = SHORT_HEADER
+        self.buffer = bytearray()
+        self.start = 0
+
+    def set_codec(self, codec_id: int) -> None:
+        """
+        Switches the connection to the wide header and decodes every following payload with the given codec.
+        :param codec_id: The id of the negotiated codec.
+        :raises ValueError: If the id does not map to a known codec.
+        """
+        self.codec = create_codec(codec_id)
+        self.header = WIDE_HEADER
+
+    def next_frame(self) -> Optional[bytes]:
+        """
+        Parses the next complete frame from the buffered data, without reading from the connection.
+        :return: The (decoded) payload of the frame, or None if the buffer does not hold a complete frame.
+        :raises ValueError: If the frame's codec does not match the negotiated codec.
+        """
+        body = self.start + self.header.size
+        if len(self.buffer) < body:
+            return None
+        if self.codec is None:
+            codec_id, (length,) = None, self.header.unpack_from(self.buffer, self.start)
+        else:
+            codec_id, length = self.header.unpack_from(self.buffer, self.start)
+        if len(self.buffer) < body + length:
+            return None
+        with memoryview(self.buffer) as view:
+            payload = bytes(view[body:body + length])
+        self.start = body + length
+        if codec_id is None or codec_id == constants.CODEC_RAW:
+            return payload
+        if codec_id != self.codec.codec_id:
+            raise ValueError("Error: Frame codec does not match the negotiated codec")
+        return self.codec.decode(payload)
+
+    async def fill(self) -> None:
+        """
+        Asynchronously reads the next chunk from the connection into the buffer. Parsed frames are dropped from the
+        front of the buffer first.
+        :raises IncompleteReadError: If the connection is closed. The partial attribute holds the bytes of an
+                                     incomplete frame, or is empty if the connection closed between frames.
+        """
+        if self.start == len(self.buffer):
+            self.buffer.clear()
+            self.start = 0
+        elif self.start:
+            del self.buffer[:self.start]
+            self.start = 0
+        data = await self.reader.read(self.read_size)
+        if not data:
+            raise IncompleteReadError(bytes(self.buffer), None)
+        self.buffer += data
+
+    async def read_frame(self) -> bytes:
+        """
+        Asynchronously reads a single frame, reading from the connection only when no complete frame is buffered.
+        :return: The (decoded) payload of the frame.
+        :raises IncompleteReadError: If the connection is closed before a complete frame arrived.
+        """
+        while (payload := self.next_frame()) is None:
+            await self.fill()
+        return payload
+
+    async def read_frames(self) -> list[bytes]:
+        """
+        Asynchronously reads every complete frame that is buffered, reading from the connection once if there is none.
+        :return: The (decoded) payloads of one or more frames, in the order they were sent.
+        :raises IncompleteReadError: If the connection is closed before a complete frame arrived.
+        """
+        frames = [await self.read_frame()]
+        while (payload := self.next_frame()) is not None:
+            frames.append(payload)
+        return frames
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        """
+        Asynchronously iterates over the frames until the connection is closed between two frames.
+        :raises IncompleteReadError: If the connection is closed in the middle of a frame.
+        """
+        while True:
+            try:
+                frames = await self.read_frames()
+            except IncompleteReadError as e:
+                if e.partial:
+                    raise
+                return
+            for payload in frames:
+                yield payload
@@ -3,6 +3,29 @@ from Treasure import Treasure
 from Tile import Tile
 from Player import Player
 from Board import Board
+from ServerConfig import ServerConfig
+from checkpoint import decode_board, encode_board, write_checkpoint, read_checkpoint, BOARD_HEADER, FILE_HEADER, MAGIC
+from MatchHistory import MatchHistory
+from Bot import Bot, BotRunner
+from TimerWheel import TimerWheel
+from TokenBucket import TokenBucket
+from RttEstimator import RttEstimator
+from Respawner import Respawner
+from Occupancy import Occupancy, MASKS as OCCUPANCY_MASKS
+from Terrain import Terrain
+from Visibility import Visibility
+from SharedBoard import BoardReplica, SharedBoard, HEADER
+from Journal import Journal, JournalReader
+from Matchmaker import Matchmaker, Ticket
+from Room import Room
+import view
+from treasure_generation import DISTRIBUTIONS, HotSpotPositions, TreasureGenerator, WeightedValues
+import asyncio
+import multiprocessing
+import os
+import random
+import threading
+import constants
 
 
 # ---------------------------------------- TESTS FOR TREASURE CLASS ----------------------------------------------------
@@ -188,6 +211,32 @@ def test_populate_board_with_treasure():
     assert treasure_in_board_3 == treasure_board_3
 
 
+def test_treasure_generator_is_seeded():
+    def layout(generator: TreasureGenerator) -> list:
+        board = Board(50, 500, 1, 20, generator)
+        return [tile.treasure.value if tile.treasure else 0 for row in board.game_board for tile in row]
+
+    for name in DISTRIBUTIONS:
+        cells = layout(TreasureGenerator.from_name(name, seed=7))
+        assert cells == layout(TreasureGenerator.from_name(name, seed=7))
+        assert sum(1 for value in cells if value) == 500
+        assert all(1 <= value <= 20 for value in cells if value)
+    assert layout(TreasureGenerator(seed=7)) != layout(TreasureGenerator(seed=8))
+
+
+def test_treasure_distributions():
+    generator = TreasureGenerator(HotSpotPositions([(0, 0)], radius=3, heat=1e6), WeightedValues(0.5), seed=1)
+    board = Board(50, 8, 1, 100, generator)
+    treasures = [tile for row in board.game_board for tile in row if tile.treasure is not None]
+    assert sum(1 for tile in treasures if sum(tile.get_coordinates()) <= 3) == 8
+    assert sum(tile.treasure.value for tile in treasures) < 100
+    assert len({id(tile.treasure) for tile in treasures}) == 8  # Every tile has its own Treasure
+    with pytest.raises(ValueError, match="Treasure distribution must be one of"):
+        TreasureGenerator.from_name("everywhere")
+    board.add_player_to_game_board("1")
+    assert generator.populate(board, 5000) == 2500 - 9
+
+
 def test_find_empty_tile():
     board = Board(5, 20, 1, 5)
     board.add_player_to_game_board("1")
@@ -198,6 +247,141 @@ def test_find_empty_tile():
         assert tile.get_player() is None
 
 
+def test_occupancy_moves_and_neighbours():
+    occupancy = Occupancy(3)
+    corner, centre = occupancy.get_cell(0, 0), occupancy.get_cell(1, 1)
+    assert occupancy.get_free_moves(corner) == [constants.DOWN, constants.RIGHT]
+    assert occupancy.get_free_moves(centre) == [constants.UP, constants.DOWN, constants.LEFT, constants.RIGHT]
+    assert occupancy.can_move(occupancy.get_cell(0, 2), constants.RIGHT) is False
+    assert occupancy.can_move(occupancy.get_cell(2, 0), constants.LEFT) is False
+    assert occupancy.can_move(centre, constants.QUIT) is False
+    occupancy.add_player(occupancy.get_cell(0, 1))
+    assert occupancy.get_free_moves(corner) == [constants.DOWN]
+    assert Occupancy.get_cells(occupancy.get_free_neighbours(centre)) == [3, 5, 7]
+    occupancy.add_treasure(8)
+    assert Occupancy.get_cells(occupancy.get_empty()) == [0, 2, 3, 4, 5, 6, 7]
+    occupancy.remove_player(occupancy.get_cell(0, 1))
+    occupancy.remove_treasure(8)
+    assert occupancy.get_empty() == occupancy.full
+
+
+def test_occupancy_follows_tiles():
+    board = Board(6, 12, 1, 5, TreasureGenerator(seed=3))
+    player = Player((0, 0), "1")
+    board.players.append(player)
+    board.game_board[0][0].remove_treasure()
+    board.game_board[0][0].add_player(player)
+    board.add_player_to_game_board("2")
+    rng = random.Random(3)
+    for _ in range(200):
+        board.move_player_on_board(rng.choice(["1", "2"]), rng.choice("UDLR"))
+        if rng.random() < 0.1:
+            board.respawn_treasure(Treasure(1))
+        tiles = [tile for row in board.game_board for tile in row]
+        assert Occupancy.get_cells(board.occupancy.players) == [t.cell for t in tiles if t.player is not None]
+        assert Occupancy.get_cells(board.occupancy.treasure) == [t.cell for t in tiles if t.treasure is not None]
+
+
+def test_terrain_maps():
+    terrain = Terrain.from_map("..#\n~.#\n...\n")
+    assert terrain.length == 3
+    assert Occupancy.get_cells(terrain.walls) == [2, 5]
+    assert Occupancy.get_cells(terrain.mud) == [3]
+    assert terrain.get_description(1, 0) == constants.MUD_DESCRIPTION
+    assert Terrain.from_map(terrain.to_map()).cells == terrain.cells
+    with pytest.raises(ValueError, match="square"):
+        Terrain.from_map("...\n..\n...")
+    with pytest.raises(ValueError, match="Unknown terrain symbol"):
+        Terrain.from_map("..\n.x")
+    with pytest.raises(ValueError, match="Terrain density"):
+        Terrain.generate(10, 0.9)
+
+
+def test_generated_terrain_is_seeded_and_connected():
+    terrain = Terrain.generate(20, 0.5, seed=4)
+    assert terrain.cells == Terrain.generate(20, 0.5, seed=4).cells
+    assert terrain.walls and terrain.mud
+    occupancy = Occupancy(20, terrain.walls)
+    open_cells = Occupancy.get_cells(occupancy.full & ~terrain.walls)
+    reached, frontier = 1 << open_cells[0], 1 << open_cells[0]
+    while frontier:
+        step = 0
+        for cell in Occupancy.get_cells(frontier):
+            step |= occupancy.adjacent[cell]
+        frontier = step & ~reached
+        reached |= frontier
+    assert reached == occupancy.full & ~terrain.walls
+
+
+def test_masks_of_generated_terrain_are_not_cached_forever():
+    cached = len(OCCUPANCY_MASKS)
+    boards = [Board(20, 10, 1, 5, terrain=Terrain.generate(20, 0.3, seed=seed)) for seed in range(20)]
+    assert len(OCCUPANCY_MASKS) <= cached + 1  # At most the masks of an open 20 x 20 board
+    shared = Board(20, 10, 1, 5, terrain=boards[0].terrain)
+    assert shared.occupancy.steps is boards[0].occupancy.steps  # Boards on one terrain share its masks
+    assert Board(20, 0, 1, 5).occupancy.steps is Board(20, 0, 1, 5).occupancy.steps
+
+
+def test_walls_and_mud():
+    terrain = Terrain.from_map(".#.\n.~.\n...")
+    board = Board(3, 6, 1, 5, terrain=terrain)
+    assert board.game_board[0][1].get_treasure() is None
+    assert board.num_treasures == 6
+    assert str(board.game_board[0][1]) == constants.WALL_DESCRIPTION
+    player = Player((0, 0), "1")
+    board.players.append(player)
+    board.game_board[0][0].remove_treasure()
+    board.game_board[0][0].add_player(player)
+    assert board.is_valid_movement("1", "R") is False
+    assert board.move_player(player, "R") is False
+    assert board.move_player(player, "D") is True
+    assert board.move_player(player, "R") is False  # Wading into the mud
+    assert player.get_coordinates() == (1, 0)
+    assert board.move_player(player, "R") is True
+    assert player.get_coordinates() == (1, 1)
+    assert board.move_player(player, "U") is False
+    with pytest.raises(ValueError, match="Terrain must have the length of the board"):
+        Board(4, 0, 1, 5, terrain=terrain)
+
+
+def test_visibility_follows_moves_incrementally():
+    board = Board(12, 30, 1, 5, TreasureGenerator(seed=5))
+    board.add_player_to_game_board("1")
+    player = board.find_player_by_name("1")
+    visibility = Visibility(12, 3)
+    rng = random.Random(5)
+    for _ in range(300):
+        before = visibility.get_visible(player)
+        board.move_player(player, rng.choice("UDLR"))
+        came, went = visibility.update(player)
+        row, col = player.get_coordinates()
+        window = visibility.get_window(row, col)
+        assert visibility.get_visible(player) == window
+        assert (came, went) == (window & ~before, before & ~window)
+        assert bin(came).count("1") <= 7 and bin(went).count("1") <= 7  # One strip of 2 * radius + 1 cells at most
+        rendered = view.display(board).encode()
+        assert visibility.render(player, rendered) == visibility.render_cells(window, rendered)
+    player.set_coordinates((0, 0))
+    assert visibility.get_visible(player) == visibility.get_window(0, 0)  # A jump recomputes the whole view
+    with pytest.raises(ValueError, match="Fog radius must be at least 1"):
+        Visibility(12, 0)
+
+
+def test_fog_hides_cells_out_of_sight():
+    board = Board(5, 0, 1, 5)
+    player = Player((0, 0), "1")
+    board.players.append(player)
+    board.game_board[0][0].add_player(player)
+    board.game_board[0][1].add_treasure(Treasure(1))
+    board.game_board[4][4].add_treasure(Treasure(1))
+    rendered = view.display(board).encode()
+    fogged = Visibility(5, 1).render(player, rendered).decode()
+    assert fogged.splitlines()[0] == "1 $ ? ? ? "
+    assert fogged.splitlines()[1] == ". . ? ? ? "
+    assert fogged.count("$") == 1
+    assert len(fogged) == len(rendered)
+
+
 # ---------- Tests for Adding player onto the Board ----------
 def test_add_player():
     for i in range(10):
@@ -294,15 +478,610 @@ def test_collect_treasure():
     assert player.get_score() == 6
 
 
+def test_move_bound_player():
+    board = Board(3, 0, 1, 1)
+    player_1 = Player((0, 0), "1")
+    player_2 = Player((1, 0), "2")
+    for player in [player_1, player_2]:
+        row, col = player.get_coordinates()
+        board.players.append(player)
+        board.game_board[row][col].add_player(player)
+    board.game_board[0][1].add_treasure(Treasure(2))
+    assert board.move_player(player_1, "U") is False
+    assert board.move_player(player_1, "D") is False
+    assert board.move_player(player_1, "X") is False
+    assert board.move_player(player_1, "R") is True
+    assert player_1.get_coordinates() == (0, 1)
+    assert board.game_board[0][0].get_player() is None
+    assert player_1.get_score() == 2
+    assert board.num_moves == 1
+
+
+def test_count_moves():
+    board = Board(2, 0, 1, 1)
+    player = Player((0, 0), "1")
+    board.players.append(player)
+    board.game_board[0][0].add_player(player)
+    board.move_player_on_board("1", "U")
+    assert board.num_moves == 0
+    board.move_player_on_board("1", "D")
+    board.move_player_on_board("1", "R")
+    assert board.num_moves == 2
+    assert board.get_duration() >= 0
+
+
+def test_resolve_simultaneous_moves():
+    board = Board(4, 0, 1, 1)
+    players = {}
+    for name, coordinates in [("1", (0, 0)), ("2", (0, 2)), ("3", (2, 2))]:
+        players[name] = Player(coordinates, name)
+        board.players.append(players[name])
+        board.game_board[coordinates[0]][coordinates[1]].add_player(players[name])
+    board.game_board[0][1].add_treasure(Treasure(5))
+    assert board.resolve_moves({"1": "R", "2": "L"}) == []  # Contested tile: nobody moves, treasure stays
+    assert board.game_board[0][1].get_treasure() is not None
+    assert board.resolve_moves({"1": "U", "2": "D"}) == ["2"]  # Moving into the wall is ignored
+    assert board.resolve_moves({"2": "U", "3": "U"}) == ["2", "3"]  # Player 3 follows player 2 in the same tick
+    assert players["3"].get_coordinates() == (1, 2)
+    board.resolve_moves({"1": "R"})
+    assert players["1"].get_score() == 5
+    assert board.game_board[0][1].get_treasure() is None
+    assert board.resolve_moves({"1": "R", "2": "L"}) == []  # Swapping players both stay put
+    assert board.game_board[0][1].get_player() is players["1"]
+    assert board.game_board[0][2].get_player() is players["2"]
+    assert board.num_moves == 4
+
+
+def test_resolve_moves_into_mud():
+    board = Board(3, 0, 1, 1, terrain=Terrain.from_map(".#.\n.~.\n..."))
+    players = {}
+    for name, coordinates in [("1", (1, 0)), ("2", (1, 2)), ("3", (2, 0))]:
+        players[name] = Player(coordinates, name)
+        board.players.append(players[name])
+        board.game_board[coordinates[0]][coordinates[1]].add_player(players[name])
+    assert board.resolve_moves({"1": "R", "2": "L"}) == []  # Contested mud: nobody starts wading
+    assert board.wading == {}
+    assert board.resolve_moves({"1": "R", "3": "U"}) == []  # Player 1 wades, so player 3 is blocked by it
+    assert board.wading == {"1": 4}
+    assert board.resolve_moves({"1": "R", "2": "L"}) == []  # Cancelled again: player 1 keeps wading
+    assert board.wading == {"1": 4}
+    assert board.resolve_moves({"1": "R"}) == ["1"]
+    assert players["1"].get_coordinates() == (1, 1) and board.wading == {}
 
 
+def test_room_holds_back_moves_of_faster_connections():
+    board = Board(4, 0, 1, 1)
+    for name, coordinates in [("1", (0, 0)), ("2", (3, 3))]:
+        player = Player(coordinates, name)
+        board.players.append(player)
+        board.game_board[coordinates[0]][coordinates[1]].add_player(player)
+    room = Room(0, board)
+    for name, rtt in [("1", 0.01), ("2", 0.1)]:
+        room.latency[name] = RttEstimator()
+        room.latency[name].add_sample(rtt)
+    assert [room.get_input_delay(name, 0.05) for name in ["1", "2", "3"]] == [2, 0, 0]  # 135 ms faster: 2 ticks
+    assert room.get_input_delay("1", 0) == 0
+    fast, slow = object(), object()  # Stand-ins for the connections' FrameWriters
+    room.submit_move("1", "D", fast, room.get_input_delay("1", 0.05))
+    room.submit_move("1", "R", fast)  # Never before the player's previous move
+    room.submit_move("2", "U", slow)
+    assert room.waiting == {fast: 2, slow: 1}
+    assert room.resolve_tick() == (["2"], {slow: 1})
+    assert room.resolve_tick() == ([], {})
+    assert room.resolve_tick() == (["1"], {fast: 2})
+    assert board.find_player_by_name("1").get_coordinates() == (0, 1)  # The later move replaced the earlier one
+    assert room.waiting == {} and room.pending_moves == {}
 
+# ------------------------------------------ TESTS FOR BOARD RENDERING -------------------------------------------------
+@pytest.mark.parametrize("length", [10, 25, 50])
+def test_render_matches_tile_by_tile(length):
+    rng = random.Random(length)
+    board = Board(length, length * length // 4, 1, 5, terrain=Terrain.generate(length, 0.2, seed=length))
+    board.add_player_to_game_board("1")
+    board.add_player_to_game_board("2")
+    for _ in range(200):
+        for player in board.players:
+            board.move_player(player, rng.choice("UDLR"))
+        assert view.render(board) == view.render_tiles(board)
+    assert view.render(Board(length, 0, 1, 5)) == ((". " * length + "\n") * length).encode()
+    assert board.terrain.template is not None and all(isinstance(key, int) for key in view.TEMPLATES)  # Only lengths
+    board.find_empty_tile().add_treasure(Treasure(10, "10"))  # Wider than a byte: rendered tile by tile
+    assert view.render(board) == view.render_tiles(board)
+    assert b"10 " in view.render(board)
 
 
+# --------------------------------------- TESTS FOR SERVER CONFIG CLASS ------------------------------------------------
+def test_server_config_defaults():
+    config = ServerConfig.from_sources([], {})
+    assert config.host == constants.HOST
+    assert config.port == constants.PORT
+    assert config.backlog == constants.BACKLOG
+    assert config.reuse_port is False
+    assert config.tcp_nodelay is True
+    assert config.event_loop == constants.LOOP_AUTO
+    assert config.tick_interval == 0
 
 
+def test_server_config_sources():
+    environ = {"GAME_PORT": "4000", "GAME_BACKLOG": "16", "GAME_REUSE_PORT": "1", "GAME_EVENT_LOOP": "asyncio"}
+    config = ServerConfig.from_sources(["--port", "5000", "--no-tcp-nodelay"], environ)
+    assert config.port == 5000
+    assert config.backlog == 16
+    assert config.reuse_port is True
+    assert config.tcp_nodelay is False
+    assert config.get_loop_factory() is None
+    with pytest.raises(ValueError, match="Port must be between 0 and 65535"):
+        ServerConfig(port=70000)
+    with pytest.raises(ValueError, match="Backlog must be at least 1"):
+        ServerConfig(backlog=0)
+    with pytest.raises(ValueError, match="Event loop must be one of"):
+        ServerConfig(event_loop="trio")
+    with pytest.raises(TypeError):
+        ServerConfig('127.0.0.1', 5000)  # Settings are keyword only
+    assert ServerConfig.from_sources([], {"GAME_TICK_INTERVAL": "0.05"}).tick_interval == 0.05
+    with pytest.raises(ValueError, match="Tick interval must be at least 0"):
+        ServerConfig(tick_interval=-1)
+    assert ServerConfig.from_sources([], {"GAME_REPLICA_PREFIX": "treasure"}).replica_prefix == "treasure"
+    assert ServerConfig.from_sources(["--journal-dir", "/tmp"], {}).journal_dir == "/tmp"
 
 
+def test_hotspot_distribution_config():
+    config = ServerConfig.from_sources(["--treasure-distribution", "hotspot", "--treasure-seed", "3"], {})
+    assert config.treasure_distribution == "hotspot"
+    generator = TreasureGenerator.from_name(config.treasure_distribution, seed=config.treasure_seed)
+    assert isinstance(generator.positions, HotSpotPositions)
+    weights = generator.positions.get_weights(10, random.Random(3))
+    assert 0 < weights.count(generator.positions.heat) < 100
+    assert ServerConfig.from_sources([], {"GAME_TREASURE_DISTRIBUTION": "hotspot"}).treasure_distribution == "hotspot"
+    with pytest.raises(ValueError, match="At least one hot spot is required"):
+        HotSpotPositions([])
 
 
+def test_terrain_config(tmp_path):
+    path = tmp_path / "map.txt"
+    path.write_text(Terrain.generate(constants.BOARD_LENGTH, 0.4, seed=1).to_map())
+    config = ServerConfig.from_sources(["--terrain-map", str(path)], {"GAME_TERRAIN_DENSITY": "0.2"})
+    assert (config.terrain_map, config.terrain_density) == (str(path), 0.2)
+    board = Board(constants.BOARD_LENGTH, 30, 1, 5, terrain=Terrain.load(config.terrain_map))
+    board.add_player_to_game_board("1")
+    assert board.terrain.to_map() == path.read_text()
+    assert not board.occupancy.walls & (board.occupancy.players | board.occupancy.treasure)
+    with pytest.raises(ValueError, match="Terrain density must be between"):
+        ServerConfig(terrain_density=0.8)
+    assert ServerConfig.from_sources(["--fog-radius", "3"], {}).fog_radius == 3
+    with pytest.raises(ValueError, match="Fog radius must be at least 0"):
+        ServerConfig(fog_radius=-1)
 
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=10, burst=3)
+    now = bucket.updated_at
+    assert [bucket.take(now) for _ in range(3)] == [0, 0, 0]
+    assert bucket.take(now) == pytest.approx(0.1)
+    assert bucket.take(now) == pytest.approx(0.2)  # Back-to-back commands are paced at the rate
+    assert bucket.take(now + 10) == 0  # Refilled, but never above the burst
+    assert bucket.tokens == pytest.approx(2)
+    with pytest.raises(ValueError, match="Rate must be greater than 0"):
+        TokenBucket(0, 1)
+
+
+def test_rtt_estimator():
+    latency = RttEstimator()
+    assert latency.add_sample(0.1)
+    assert (latency.srtt, latency.jitter) == (0.1, 0.05)  # The first sample seeds both
+    assert latency.add_sample(0.02)
+    assert latency.srtt == pytest.approx(0.1 + 0.125 * (0.02 - 0.1))
+    assert latency.jitter == pytest.approx(0.05 + 0.25 * (0.08 - 0.05))
+    assert not latency.add_sample(0) and not latency.add_sample(constants.MAX_RTT_SAMPLE + 1)  # Bogus samples
+    assert latency.get_summary() == {"srtt_ms": 90.0, "jitter_ms": 57.5, "last_ms": 20.0, "samples": 2}
+    assert latency.get_delay() == pytest.approx(0.045 + 2 * 0.0575)
+    with pytest.raises(ValueError, match="Weights must be between 0 and 1"):
+        RttEstimator(alpha=0)
+
+
+# ----------------------------------------- TESTS FOR BOARD CHECKPOINTS ------------------------------------------------
+def test_checkpoint_round_trip(tmp_path):
+    boards = {}
+    for room_id in range(5):
+        terrain = Terrain.generate(room_id + 5, 0.3, seed=room_id) if room_id % 2 else None
+        board = Board(room_id + 5, room_id * 3, 1, 500, terrain=terrain)
+        board.add_player_to_game_board("1")
+        board.add_player_to_game_board("2")
+        board.find_player_by_name("2").add_points(room_id * 70)
+        boards[room_id] = board
+    path = str(tmp_path / "boards.ckpt")
+    write_checkpoint(path, [encode_board(room_id, board) for room_id, board in boards.items()])
+
+    restored = read_checkpoint(path)
+    assert sorted(restored) == sorted(boards)
+    for room_id, board in boards.items():
+        restored_board = restored[room_id]
+        assert restored_board.length == board.length
+        assert restored_board.num_treasures == board.num_treasures
+        assert (restored_board.min_treasure, restored_board.max_treasure) == (1, 500)
+        assert restored_board.occupancy.walls == board.occupancy.walls
+        assert [str(tile) for row in restored_board.game_board for tile in row] == \
+               [str(tile) for row in board.game_board for tile in row]
+        for player in board.players:
+            restored_player = restored_board.find_player_by_name(player.get_name())
+            assert restored_player.get_score() == player.get_score()
+            assert restored_player.get_coordinates() == player.get_coordinates()
+        for row, restored_row in zip(board.game_board, restored_board.game_board):
+            for tile, restored_tile in zip(row, restored_row):
+                if tile.get_treasure() is not None:
+                    assert restored_tile.get_treasure().get_value() == tile.get_treasure().get_value()
+
+
+def test_read_version_1_checkpoint(tmp_path):
+    board = Board(6, 4, 1, 5)
+    board.add_player_to_game_board("1")
+    record = encode_board(3, board)
+    terrain_flag = BOARD_HEADER.size + 2 * 6 * 6
+    path = tmp_path / "boards.ckpt"
+    path.write_bytes(FILE_HEADER.pack(MAGIC, 1, 1) + record[:terrain_flag] + record[terrain_flag + 1:])
+    restored = read_checkpoint(str(path))[3]
+    assert restored.terrain is None
+    assert [str(tile) for row in restored.game_board for tile in row] == \
+           [str(tile) for row in board.game_board for tile in row]
+
+
+def test_read_invalid_checkpoint(tmp_path):
+    path = tmp_path / "boards.ckpt"
+    path.write_bytes(b'NOPE' + bytes(10))
+    with pytest.raises(ValueError, match="Error: Unsupported checkpoint file"):
+        read_checkpoint(str(path))
+
+
+# ------------------------------------------- TESTS FOR READ REPLICAS --------------------------------------------------
+def replica_board(length: int = 6) -> Board:
+    board = Board(length, 4, 1, 500)
+    board.add_player_to_game_board("1")
+    board.add_player_to_game_board("2")
+    return board
+
+
+def payload_of(board: Board) -> tuple[int, int, bytes]:
+    rendered = ''.join(''.join(str(tile) + ' ' for tile in row) + '\n' for row in board.game_board).encode()
+    return board.players[0].get_score(), board.players[1].get_score(), rendered
+
+
+def test_replica_reads_published_board():
+    prefix = f"treasure_test_{os.getpid()}"
+    board = replica_board()
+    shared = SharedBoard(prefix, 3, board)
+    replica = BoardReplica(prefix, 3)
+    try:
+        assert replica.read()[0] == 0  # Nothing published yet
+        assert shared.publish(board, payload_of(board))
+        assert not shared.publish(board, payload_of(board))  # Unchanged since the last publish
+        board.find_player_by_name("2").add_points(42)
+        board.version += 1
+        assert shared.publish(board, payload_of(board))
+
+        assert replica.get_board_payload() == payload_of(board)
+        shared.memory.buf[:8] = (shared.sequence + 1).to_bytes(8, 'little')  # A write has started
+        board.version += 1
+        writer = threading.Timer(0.05, shared.publish, (board, payload_of(board)))
+        writer.start()
+        assert replica.read()[0] == board.version  # Readers wait for the write to finish
+        assert replica.retries > 0
+        writer.join()
+        copy = replica.get_board()
+        assert copy.find_player_by_name("2").get_score() == 42
+        assert [str(tile) for row in copy.game_board for tile in row] == \
+               [str(tile) for row in board.game_board for tile in row]
+        headers = []
+        store_sequence = shared.store_sequence
+        shared.store_sequence = lambda sequence: (headers.append(HEADER.unpack_from(shared.memory.buf, 0)),
+                                                  store_sequence(sequence))
+        board.find_player_by_name("1").add_points(12345)  # A longer payload and record than before
+        board.version += 1
+        assert shared.publish(board, payload_of(board))
+        sequence, version, payload_length, record_length = headers[-1]  # Just before the even sequence is stored
+        assert sequence % 2 == 1  # Readers still retry, even though the lengths are already the new ones
+        assert (version, payload_length) == (board.version, 4 + len(payload_of(board)[2]))
+        assert replica.read()[2].nbytes == record_length
+        small = SharedBoard(prefix, 4, board, capacity=16)
+        with pytest.raises(ValueError, match="does not fit in its replica segment"):
+            small.publish(board, payload_of(board))
+        small.close()
+    finally:
+        replica.close()
+        shared.close()
+
+
+def test_room_publishes_scheduled_updates_once_per_loop_iteration():
+    prefix = f"treasure_test_{os.getpid()}"
+    board = replica_board()
+    room = Room(6, board)
+    room.replica = SharedBoard(prefix, 6, board)
+    published = []
+    publish = room.replica.publish
+    room.replica.publish = lambda *args: published.append(publish(*args))
+
+    async def move() -> None:
+        for direction in [constants.DOWN, constants.RIGHT]:
+            board.move_player_on_board("1", direction)
+            room.schedule_update()
+        assert published == []
+        await asyncio.sleep(0)
+        assert published == [True]
+        room.schedule_update()
+        await asyncio.sleep(0)
+        assert len(published) == 2
+
+    try:
+        asyncio.run(move())
+    finally:
+        room.replica.close()
+
+def read_replica_snapshots(prefix: str, room_id: int, num_reads: int, results) -> None:
+    """Reads snapshots of a board being written by another process and reports whether each one was consistent."""
+    replica = BoardReplica(prefix, room_id)
+    versions = []
+    consistent = True
+    while len(versions) < num_reads:
+        version, payload, record = replica.read()
+        if version == 0:
+            continue
+        copy = decode_board(record, 0)[1]
+        scores = int.from_bytes(payload[0:2], 'big'), int.from_bytes(payload[2:4], 'big')
+        consistent &= scores == (copy.players[0].get_score(), copy.players[1].get_score())
+        consistent &= scores[1] == 2 * scores[0]  # The writer always adds 1 and 2 points together
+        versions.append(version)
+    replica.close()
+    results.put((consistent, versions == sorted(versions)))
+
+
+def test_replica_snapshots_are_consistent_across_processes():
+    prefix = f"treasure_test_{os.getpid()}"
+    board = replica_board(50)
+    shared = SharedBoard(prefix, 5, board)
+    results = multiprocessing.Queue()
+    worker = multiprocessing.Process(target=read_replica_snapshots, args=(prefix, 5, 100, results))
+    worker.start()
+    try:
+        while worker.is_alive() and results.empty():
+            board.players[0].add_points(1)
+            board.players[1].add_points(2)
+            board.version += 1
+            shared.publish(board, payload_of(board))
+        assert results.get(timeout=10) == (True, True)
+        worker.join(timeout=10)
+    finally:
+        shared.close()
+
+
+# ------------------------------------------- TESTS FOR EVENT JOURNALS -------------------------------------------------
+def test_journal_tails_while_growing(tmp_path):
+    path = str(tmp_path / "room_2.journal")
+    journal = Journal(path, 2, capacity=4)
+    reader = JournalReader(path)
+    assert reader.room_id == 2
+    assert reader.tail() == []
+    journal.append(Journal.JOIN, "1", 0, 1, 7)
+    assert [record[1:] for record in reader.tail()] == [(Journal.JOIN, "1", 0, 1, 7)]
+    for col in range(10):  # Grows the file past the reader's mapping
+        journal.append(Journal.MOVE, "1", 1, col)
+    assert [record[4] for record in reader.tail()] == list(range(10))
+    assert reader.tail() == []
+    journal.close()
+
+    reopened = Journal(path, 2)  # Appends after the records already there
+    reopened.append(Journal.QUIT, "1", 1, 9, 7)
+    assert len(reopened) == 12
+    assert reader.tail()[0][1:] == (Journal.QUIT, "1", 1, 9, 7)
+    assert [record[1] for record in JournalReader(path).read()] == [Journal.JOIN] + [Journal.MOVE] * 10 + [Journal.QUIT]
+    with pytest.raises(ValueError, match="Journal belongs to room 2"):
+        Journal(path, 3)
+    reopened.close()
+    reader.close()
+    (tmp_path / "other").write_bytes(b'NOPE' + bytes(40))
+    with pytest.raises(ValueError, match="Error: Unsupported journal file"):
+        JournalReader(str(tmp_path / "other"))
+
+
+def test_board_journals_its_events(tmp_path):
+    path = str(tmp_path / "room_0.journal")
+    board = Board(4, 0, 1, 1)
+    board.journal = Journal(path, 0)
+    board.add_player_to_game_board("1")
+    player = board.find_player_by_name("1")
+    row, col = player.get_coordinates()
+    direction = constants.DOWN if row == 0 else constants.UP
+    d_row = 1 if row == 0 else -1
+    board.respawn_treasure(Treasure(9), board.game_board[row + d_row][col])
+    assert board.move_player(player, direction)
+    assert board.resolve_moves({"1": constants.RIGHT if col == 0 else constants.LEFT}) == ["1"]
+    board.journal.close()
+    records = [record[1:] for record in JournalReader(path).read()]
+    assert records == [(Journal.JOIN, "1", row, col, 0),
+                       (Journal.RESPAWN, "", row + d_row, col, 9),
+                       (Journal.MOVE, "1", row + d_row, col, 0),
+                       (Journal.COLLECT, "1", row + d_row, col, 9),
+                       (Journal.MOVE, "1", row + d_row, col + (1 if col == 0 else -1), 0)]
+
+
+# --------------------------------------------- TESTS FOR MATCHMAKING --------------------------------------------------
+def test_matchmaker_widens_with_wait():
+    matchmaker = Matchmaker(rating_bucket=100, rtt_bucket=0.02, widen_interval=1.0, max_wait=5.0)
+    novice = Ticket("a", 1000, 0.010, enqueued_at=0.0)
+    assert matchmaker.add(novice, now=0.0) is None
+    assert matchmaker.add(Ticket("b", 1250, 0.010, enqueued_at=0.0), now=0.0) is None  # Two buckets away
+    peer = Ticket("c", 1150, 0.015, enqueued_at=0.5)  # One bucket away
+    far = Ticket("d", 3000, 0.300, enqueued_at=0.5)
+    assert matchmaker.add(peer, now=0.5) is None
+    assert matchmaker.add(far, now=0.5) is None
+    assert len(matchmaker) == 4
+    assert matchmaker.sweep(now=0.9) == []
+    assert matchmaker.sweep(now=1.0) == [[novice, peer]]  # The nearest ring is accepted after one widen interval
+    assert matchmaker.sweep(now=4.9) == []
+    assert [[ticket.key for ticket in group] for group in matchmaker.sweep(now=5.0)] == [["b", "d"]]  # Anybody
+    assert len(matchmaker) == 0
+
+    same, other = Ticket("e", 1010, 0.011), Ticket("f", 1090, 0.019)
+    assert matchmaker.add(same) is None
+    assert matchmaker.add(other) == [same, other]  # Same bucket: matched straight away
+    metrics = matchmaker.get_metrics(now=10.0)
+    assert (metrics["waiting"], metrics["matched"]) == (0, 3)
+    assert metrics["wait_p99"] >= metrics["wait_p50"] >= 0
+
+
+def test_matchmaker_removes_and_rates():
+    matchmaker = Matchmaker()
+    ticket = Ticket("a", 1000, 0.0)
+    matchmaker.add(ticket)
+    assert matchmaker.remove(ticket)
+    assert not matchmaker.remove(ticket)
+    assert matchmaker.buckets == {}
+    matchmaker.record_result([("a", 10), ("b", 3)])
+    assert matchmaker.get_rating("a") == constants.INITIAL_RATING + constants.RATING_K / 2
+    assert matchmaker.get_rating("b") == constants.INITIAL_RATING - constants.RATING_K / 2
+    matchmaker.record_result([("a", 5), ("b", 5)])
+    assert matchmaker.get_rating("a") < constants.INITIAL_RATING + constants.RATING_K / 2
+    matchmaker.record_result([("c", 10), ("c", 3)])  # Two clients of one address
+    assert matchmaker.get_rating("c") == constants.INITIAL_RATING
+    with pytest.raises(ValueError, match="Group size must be at least 2"):
+        Matchmaker(group_size=1)
+
+
+# ------------------------------------------ TESTS FOR MATCH HISTORY ---------------------------------------------------
+def test_match_history(tmp_path):
+    async def play_matches():
+        history = MatchHistory(str(tmp_path / "history.db"), batch_size=3, flush_interval=0.01)
+        task = asyncio.create_task(history.run())
+        for score in range(10):
+            board = Board(5, 0, 1, 1)
+            board.add_player_to_game_board("1")
+            board.add_player_to_game_board("2")
+            board.find_player_by_name("1").add_points(score)
+            board.find_player_by_name("2").add_points(20 - score)
+            board.num_moves = score
+            history.record(board)
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await history.flush()
+        leaderboard = await history.get_leaderboard(3)
+        player_history = await history.get_player_history("1", 2)
+        history.close()
+        return leaderboard, player_history
+
+    leaderboard, player_history = asyncio.run(play_matches())
+    assert leaderboard == [("2", 20, 1), ("2", 19, 2), ("2", 18, 3)]
+    assert [(match_id, score, moves) for match_id, score, _, _, moves in player_history] == [(10, 9, 9), (9, 8, 8)]
+
+
+def test_match_history_flush_writes_the_held_batch(tmp_path):
+    async def record_one() -> list:
+        history = MatchHistory(str(tmp_path / "history.db"), flush_interval=10)
+        task = asyncio.create_task(history.run())
+        board = Board(5, 0, 1, 1)
+        board.add_player_to_game_board("1")
+        history.record(board)
+        await asyncio.sleep(0.05)  # Taken off the queue, held until the flush interval
+        assert history.pending.empty() and len(history.batch) == 1
+        await history.flush()
+        task.cancel()
+        rows = await history.get_player_history("1")
+        history.close()
+        return rows
+
+    assert len(asyncio.run(record_one())) == 1
+
+
+# ---------------------------------------------- TESTS FOR BOT CLASS ---------------------------------------------------
+def test_bot_collects_all_treasure():
+    board = Board(10, 15, 1, 5)
+    bots = [Bot(board, "1"), Bot(board, "2")]
+    runner = BotRunner()
+    for bot in bots:
+        runner.add_bot(bot)
+    for _ in range(500):
+        if runner.step() == 0:
+            break
+    assert board.num_treasures == 0
+    assert sum(bot.player.get_score() for bot in bots) >= 15
+
+
+def test_bot_plans_around_players():
+    board = Board(3, 0, 1, 1)
+    bot_player = Player((0, 0), "1")
+    board.players.append(bot_player)
+    board.game_board[0][0].add_player(bot_player)
+    blocker = Player((0, 1), "2")
+    board.players.append(blocker)
+    board.game_board[0][1].add_player(blocker)
+    board.game_board[0][2].add_treasure(Treasure(5))
+    bot = Bot(board, "1")
+    bot.plan()
+    assert [direction for _, direction in reversed(bot.path)] == ["D", "R", "R", "U"]
+    board.game_board[0][2].remove_treasure()
+    bot.plan()
+    assert bot.path == []
+    assert bot.step() is False
+
+
+def test_bot_walks_around_walls_and_through_mud():
+    board = Board(5, 0, 1, 1, terrain=Terrain.from_map(".....\n####.\n..~..\n.####\n....."))
+    player = Player((0, 0), "1")
+    board.players.append(player)
+    board.game_board[0][0].add_player(player)
+    board.game_board[4][4].add_treasure(Treasure(5))
+    bot = Bot(board, "1")
+    steps = 0
+    while player.get_score() == 0 and steps < 50:
+        bot.step()
+        steps += 1
+    assert steps == 17  # 16 cells along the corridor, one extra move to wade into the mud
+
+
+def test_bots_submit_moves_to_ticks():
+    board = Board(3, 0, 1, 1)
+    board.game_board[0][2].add_treasure(Treasure(5))
+    bot_player = Player((0, 0), "1")
+    board.players.append(bot_player)
+    board.game_board[0][0].add_player(bot_player)
+    runner = BotRunner()
+    runner.add_bot(Bot(board, "1"))
+    for _ in range(2):
+        moves = {}
+        runner.submit_moves(moves.__setitem__)
+        assert moves == {"1": "R"}
+        runner.advance(board.resolve_moves(moves))
+    assert bot_player.get_score() == 5
+
+
+# ------------------------------------------- TESTS FOR TREASURE RESPAWN -----------------------------------------------
+@pytest.mark.parametrize("levels", [1, 2, 3])
+def test_timer_wheel_expires_on_time(levels):
+    wheel = TimerWheel(resolution=1, slots=4, levels=levels)
+    rng = random.Random(levels)
+    pending = {}
+    for timer in range(2000):
+        delay = rng.choice([rng.randrange(1, 8), rng.randrange(1, 300)])
+        pending[timer] = wheel.schedule(delay, timer)
+        for expired in wheel.tick():
+            assert pending.pop(expired) == wheel.current_tick
+    for expired in wheel.advance(300):
+        assert pending.pop(expired) <= wheel.current_tick
+    assert pending == {}
+    assert len(wheel) == 0
+
+
+def test_respawn_collected_treasure():
+    board = Board(3, 0, 1, 1)
+    player = Player((0, 0), "1")
+    board.players.append(player)
+    board.game_board[0][0].add_player(player)
+    board.game_board[0][1].add_treasure(Treasure(4))
+    respawned_boards = []
+    respawner = Respawner(1.0, resolution=0.5, on_respawn=respawned_boards.append)
+    respawner.watch(board)
+    board.move_player_on_board("1", "R")
+    assert board.game_board[0][1].get_treasure() is None
+    assert respawner.advance(1) == 0
+    assert respawner.advance(1) == 1  # The player still stands on the tile, so it respawns elsewhere
+    assert respawned_boards == [board]
+    treasures = [tile for row in board.game_board for tile in row if tile.get_treasure() is not None]
+    assert len(treasures) == 1 and treasures[0].get_coordinates() != (0, 1)
+    assert treasures[0].get_treasure().get_value() == 4
@@ -0,0 +1,611 @@
+import asyncio
+import pytest
+from socket import create_connection
+from struct import pack, unpack
+from protocol import FrameReader, FrameWriter, BOARD_PREFIX, create_codec
+from SpectatorHub import SpectatorHub
+from GameClient import GameClient
+from AdminServer import AdminServer
+from Game import Game
+from GameHarness import GameHarness
+from ServerConfig import ServerConfig
+from SharedBoard import BoardReplica
+from Journal import Journal, JournalReader
+from Matchmaker import Ticket
+import json
+import os
+import sqlite3
+import time
+import constants
+
+
+async def exchange(send_frames) -> bytes:
+    """
+    Runs send_frames against a FrameWriter connected to a loopback server and returns everything the server received.
+    """
+    received = asyncio.get_running_loop().create_future()
+
+    async def handle(reader, writer):
+        received.set_result(await reader.read())
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    _, writer = await asyncio.open_connection('127.0.0.1', port)
+    frames = FrameWriter(writer)
+    await send_frames(frames)
+    await frames.drain()
+    writer.close()
+    data = await received
+    server.close()
+    await server.wait_closed()
+    return data
+
+
+# ------------------------------------------ TESTS FOR FRAME WRITER ----------------------------------------------------
+def test_write_frame():
+    async def send(frames):
+        frames.write_frame(b'hello')
+
+    data = asyncio.run(exchange(send))
+    assert unpack('!H', data[:2])[0] == 5
+    assert data[2:] == b'hello'
+
+
+def test_write_board_frame():
+    async def send(frames):
+        for score in range(3):
+            frames.write_frame(b'. $ \n', BOARD_PREFIX, score, score + 1)
+            await frames.drain_if_needed()
+
+    data = asyncio.run(exchange(send))
+    assert len(data) == 3 * 11
+    for score in range(3):
+        frame = data[score * 11:(score + 1) * 11]
+        assert unpack('!HHH', frame[:6]) == (9, score, score + 1)
+        assert frame[6:] == b'. $ \n'
+
+
+def test_write_frame_with_codec():
+    async def send(frames):
+        frames.set_codec(constants.CODEC_ZLIB)
+        frames.write_frame(BOARD, BOARD_PREFIX, 3, 4)
+        frames.write_frame(BOARD, BOARD_PREFIX, 3, 4)
+
+    data = asyncio.run(exchange(send))
+    codec = create_codec(constants.CODEC_ZLIB)
+    for _ in range(2):
+        codec_id, length = unpack('!BI', data[:5])
+        assert codec_id == constants.CODEC_ZLIB
+        payload = codec.decode(data[5:5 + length])
+        assert unpack('!HH', payload[:4]) == (3, 4)
+        assert payload[4:] == BOARD
+        data = data[5 + length:]
+    assert data == b''
+
+
+# ------------------------------------------------ TESTS FOR CODECS ----------------------------------------------------
+BOARD = (". . $ . 1 \n" + ". . . . . \n" * 3 + "2 . . $ . \n").encode()
+
+
+@pytest.mark.parametrize('codec_id', [constants.CODEC_RAW, constants.CODEC_ZLIB, constants.CODEC_RLE])
+def test_codec_round_trip(codec_id):
+    encoder = create_codec(codec_id)
+    decoder = create_codec(codec_id)
+    for message in [BOARD, b'', b'\x00\x01' + BOARD, BOARD * 40, bytes(range(256)) * 3]:
+        assert decoder.decode(encoder.encode(message[:4], message[4:])) == message
+
+
+def test_codecs_compress_board():
+    empty_board = (". " * 10 + "\n").encode() * 10
+    assert len(create_codec(constants.CODEC_RLE).encode(empty_board)) < len(empty_board) / 4
+    zlib_codec = create_codec(constants.CODEC_ZLIB)
+    first = zlib_codec.encode(BOARD)
+    assert len(zlib_codec.encode(BOARD)) < len(first)
+
+
+def test_run_length_round_trip_long_runs():
+    codec = create_codec(constants.CODEC_RLE)
+    payload = b'\x00\n\x00\x01' + (". " * 300 + "1 \n").encode() + b'x' * 200
+    assert codec.decode(codec.encode(payload[:4], payload[4:])) == payload
+    assert codec.decode(codec.encode(b'abc\n. . . .')) == b'abc\n. . . .'  # Rows of an odd length
+
+
+def test_run_length_truncated():
+    with pytest.raises(ValueError, match="Run-length message is truncated"):
+        create_codec(constants.CODEC_RLE).decode(b'\x05ab')
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError, match="Error: Unknown codec"):
+        create_codec(3)
+
+
+# ------------------------------------------ TESTS FOR FRAME READER ----------------------------------------------------
+def test_read_several_frames_from_one_read():
+    async def read() -> list[list[bytes]]:
+        reader = asyncio.StreamReader()
+        reader.feed_data(pack('!H', 5) + b'hello' + pack('!H', 0) + pack('!H', 5) + b'world' + pack('!H', 3) + b'ne')
+        frames = FrameReader(reader)
+        batches = [await frames.read_frames()]
+        reader.feed_data(b'w')
+        reader.feed_eof()
+        batches.append([frame async for frame in frames])
+        return batches
+
+    assert asyncio.run(read()) == [[b'hello', b'', b'world'], [b'new']]
+
+
+def test_read_frame_split_across_reads():
+    async def read() -> bytes:
+        reader = asyncio.StreamReader()
+        frames = FrameReader(reader, read_size=3)
+        reader.feed_data(pack('!H', 10)[:1])
+        reading = asyncio.create_task(frames.read_frame())
+        await asyncio.sleep(0)
+        for byte in pack('!H', 10)[1:] + b'0123456789':
+            reader.feed_data(bytes([byte]))
+            await asyncio.sleep(0)
+        return await reading
+
+    assert asyncio.run(read()) == b'0123456789'
+
+
+def test_read_frame_truncated():
+    async def read() -> None:
+        reader = asyncio.StreamReader()
+        reader.feed_data(pack('!H', 10) + b'0123')
+        reader.feed_eof()
+        with pytest.raises(asyncio.IncompleteReadError) as e:
+            await FrameReader(reader).read_frame()
+        assert e.value.partial == pack('!H', 10) + b'0123'
+        reader = asyncio.StreamReader()
+        reader.feed_data(pack('!H', 10) + b'0123')
+        reader.feed_eof()
+        with pytest.raises(asyncio.IncompleteReadError):
+            [frame async for frame in FrameReader(reader)]
+
+    asyncio.run(read())
+
+
+@pytest.mark.parametrize("codec_id", [constants.CODEC_RAW, constants.CODEC_ZLIB, constants.CODEC_RLE])
+def test_read_frames_with_codec(codec_id):
+    async def send(frames):
+        frames.set_codec(codec_id)
+        frames.write_frame(b'.' * 300, BOARD_PREFIX, 1, 2)
+        frames.write_frame(b'results')
+
+    async def read() -> list[bytes]:
+        reader = asyncio.StreamReader()
+        reader.feed_data(await exchange(send))
+        reader.feed_eof()
+        frames = FrameReader(reader)
+        frames.set_codec(codec_id)
+        return [frame async for frame in frames]
+
+    assert asyncio.run(read()) == [pack('!HH', 1, 2) + b'.' * 300, b'results']
+
+
+# --------------------------------------------- TESTS FOR SPECTATORS ---------------------------------------------------
+def test_spectators_receive_latest_update():
+    async def watch() -> list[bytes]:
+        hub = SpectatorHub()
+        received = []
+
+        async def handle(reader, writer):
+            received.append(await reader.read())
+            writer.close()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        streams = []
+        for _ in range(2):
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            streams.append((asyncio.create_task(hub.serve(writer, b'first ')), writer))
+        await asyncio.sleep(0.01)
+        assert len(hub) == 2
+        for frame in [b'old ', b'older ', b'latest']:
+            hub.publish(frame)
+        assert all(spectator.dropped == 2 for spectator in hub.spectators)
+        await asyncio.sleep(0.01)
+        for stream, writer in streams:
+            stream.cancel()
+            writer.close()
+        await asyncio.sleep(0.01)
+        assert len(hub) == 0
+        server.close()
+        await server.wait_closed()
+        return received
+
+    assert asyncio.run(watch()) == [b'first latest', b'first latest']
+
+
+# --------------------------------------------- TESTS FOR GAME CLIENT --------------------------------------------------
+def test_game_client_pipelines_commands():
+    async def play() -> tuple[list[bytes], list[tuple[int, int, str]], str]:
+        commands = []
+
+        async def handle(reader, writer):
+            writer.write(pack('!HB', 1, 2))
+            while (byte := await reader.readexactly(1)) != b'\x08':
+                commands.append(byte)
+                board = f'board {len(commands)}'.encode()
+                writer.write(pack('!HHH', 4 + len(board), len(commands), 0) + board)
+            writer.write(pack('!H', 7) + b'results')
+            writer.close()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        game_client = GameClient('127.0.0.1', server.sockets[0].getsockname()[1])
+        assert await game_client.connect() == 2
+        assert await game_client.send_moves("UDLRG") == 5
+        with pytest.raises(ValueError, match="Invalid command: Q"):
+            await game_client.send_moves("Q")
+        results = await game_client.quit()
+        updates = [update async for update in game_client.updates()]
+        server.close()
+        await server.wait_closed()
+        return commands, updates, results
+
+    commands, updates, results = asyncio.run(play())
+    assert commands == [b'\x28', b'\x38', b'\x48', b'\x68', b'\xf8']
+    assert updates == [(i, 0, f'board {i}') for i in range(1, 6)]
+    assert results == 'results'
+
+
+# -------------------------------------------- TESTS FOR ABUSE PROTECTION ----------------------------------------------
+def test_commands_are_rate_limited_and_invalid_bytes_strike():
+    async def flood() -> None:
+        game = Game(ServerConfig(host='127.0.0.1', port=0, command_rate=100, command_burst=10, max_strikes=2))
+        server = asyncio.create_task(game.start())
+        while game.server is None:
+            await asyncio.sleep(0.01)
+        port = game.server.sockets[0].getsockname()[1]
+        player = GameClient('127.0.0.1', port)
+        await player.connect()
+        start = asyncio.get_running_loop().time()
+        await player.send_moves("G" * 30)
+        updates = player.updates()
+        for _ in range(30):
+            await anext(updates)
+        assert asyncio.get_running_loop().time() - start >= 0.19  # 10 at once, then 20 at 100 per second
+        await player.quit()
+
+        for _ in range(2):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            await reader.readexactly(3)
+            writer.write(b'\x14')  # Unknown command
+            assert await reader.read() == b''  # Closed without an error message
+            writer.close()
+        assert game.is_banned('127.0.0.1')
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        assert await reader.read() == b''  # Refused before the handshake
+        writer.close()
+        await game.drain()
+        await server
+
+    asyncio.run(flood())
+
+
+def test_spoofed_player_bits_are_rejected():
+    async def spoof() -> None:
+        game = Game(ServerConfig(host='127.0.0.1', port=0))
+        server = asyncio.create_task(game.start())
+        while game.server is None:
+            await asyncio.sleep(0.01)
+        port = game.server.sockets[0].getsockname()[1]
+        player_2 = game.game_board.find_player_by_name(constants.PLAYER_TWO_NAME)
+        position = player_2.get_coordinates()
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        assert await reader.readexactly(3) == pack('!HB', 1, 1)
+        writer.write(bytes([0x20 | (2 << 2)]))  # Up, claiming to be player 2
+        assert await reader.read() == b''  # Closed without moving player 2
+        writer.close()
+        assert player_2.get_coordinates() == position
+        assert list(game.strikes) == ['127.0.0.1'] and not game.is_banned('127.0.0.1')
+        player = GameClient('127.0.0.1', port)
+        assert await player.connect() == 1  # The seat was given back
+        await player.send_moves("G")
+        assert (await anext(player.updates()))[2] == game.room.get_board_payload()[2].decode()
+        await player.quit()
+        await game.drain()
+        await server
+
+    asyncio.run(spoof())
+
+
+def test_strikes_decay_and_are_bounded(monkeypatch):
+    class Peer:
+        def __init__(self, host: str):
+            self.host = host
+
+        def get_extra_info(self, name: str) -> tuple[str, int]:
+            return self.host, 1234
+
+    game = Game(ServerConfig(host='127.0.0.1', port=0, max_strikes=2))
+    game.add_strike(Peer('10.0.0.1'))
+    assert not game.is_banned('10.0.0.1')
+    game.add_strike(Peer('10.0.0.1'))
+    assert game.is_banned('10.0.0.1')
+    game.strikes['10.0.0.1'].updated_at -= constants.STRIKE_DECAY / 2  # One strike forgiven
+    assert not game.is_banned('10.0.0.1')
+    game.strikes['10.0.0.1'].updated_at -= constants.STRIKE_DECAY  # All forgiven
+    assert not game.is_banned('10.0.0.1') and '10.0.0.1' not in game.strikes
+
+    monkeypatch.setattr(constants, 'MAX_STRIKE_HOSTS', 2)
+    for host in ['10.0.0.2', '10.0.0.3', '10.0.0.2', '10.0.0.4']:
+        game.add_strike(Peer(host))
+    assert list(game.strikes) == ['10.0.0.2', '10.0.0.4']  # The least recently struck address is forgotten
+
+
+# --------------------------------------------- TESTS FOR ADMIN SERVER -------------------------------------------------
+def test_admin_kick_and_drain(tmp_path):
+    admin_path = str(tmp_path / "admin.sock")
+
+    async def admin(command: str) -> dict:
+        reader, writer = await asyncio.open_unix_connection(admin_path)
+        writer.write(command.encode() + b'\n')
+        answer = json.loads(await reader.readline())
+        writer.close()
+        return answer
+
+    async def operate() -> None:
+        game = Game(ServerConfig(host='127.0.0.1', port=0, admin_path=admin_path))
+        server = asyncio.create_task(game.start())
+        while game.server is None:
+            await asyncio.sleep(0.01)
+        port = game.server.sockets[0].getsockname()[1]
+        players = [GameClient('127.0.0.1', port) for _ in range(2)]
+        assert [await player.connect() for player in players] == [1, 2]
+        assert (await admin("rooms"))["rooms"][0]["players"] == ["1", "2"]
+        assert await admin("kick 0 2") == {"kicked": True}
+        await asyncio.sleep(0.05)
+        assert (await admin("rooms"))["rooms"][0]["free_seats"] == 1
+        assert "positions" in await admin("dump 0")
+        assert await admin("dump 7") == {"error": "Room 7 not found"}
+        assert await admin("drain") == {"draining": True, "connections": 1}
+        assert not server.done()
+        await players[0].quit()
+        await asyncio.wait_for(server, 1)
+
+    asyncio.run(operate())
+
+
+def test_drain_writes_the_last_match_to_history(tmp_path):
+    history_path = str(tmp_path / "history.db")
+
+    async def play_and_drain() -> None:
+        game = Game(ServerConfig(host='127.0.0.1', port=0, matchmaking=True, history_path=history_path))
+        server = asyncio.create_task(game.start())
+        while game.server is None:
+            await asyncio.sleep(0.01)
+        port = game.server.sockets[0].getsockname()[1]
+        players = [GameClient('127.0.0.1', port) for _ in range(2)]
+        assert await asyncio.gather(*[player.connect() for player in players]) == [1, 2]
+        for player in players:
+            await player.quit()
+        while game.match_keys:
+            await asyncio.sleep(0.01)
+        await game.drain()
+        await asyncio.wait_for(server, 5)
+
+    asyncio.run(play_and_drain())
+    connection = sqlite3.connect(history_path)
+    assert connection.execute("SELECT COUNT(*) FROM matches").fetchone() == (1,)
+    assert connection.execute("SELECT COUNT(*) FROM match_players").fetchone() == (2,)
+    connection.close()
+
+
+def test_tick_mode_answers_pipelined_moves_before_quit():
+    with GameHarness(seed=6, tick_interval=0.05) as harness:
+        sock, player_id = harness.connect()
+        sock.sendall(bytes([0x34, 0x64, 0xF4, 0x04]))  # Down, Right, Game and Quit, as player 1, in one write
+        for _ in range(3):
+            assert b"final score" not in harness.get_frame(sock)
+        assert b"final score" in harness.get_frame(sock)
+        sock.close()
+
+        async def play() -> str:
+            player = harness.client()
+            await player.connect()
+            await player.send_moves("RDL")
+            return await player.quit()
+
+        assert "final score" in asyncio.run(play())
+
+def test_drain_refuses_players_waiting_for_a_match():
+    async def wait_and_drain() -> None:
+        game = Game(ServerConfig(host='127.0.0.1', port=0, matchmaking=True))
+        server = asyncio.create_task(game.start())
+        while game.server is None:
+            await asyncio.sleep(0.01)
+        port = game.server.sockets[0].getsockname()[1]
+        player = asyncio.create_task(GameClient('127.0.0.1', port).connect())
+        while not len(game.matchmaker):
+            await asyncio.sleep(0.01)
+        await game.drain()
+        with pytest.raises(ConnectionError, match="the game is full"):
+            await asyncio.wait_for(player, 1)
+        assert len(game.matchmaker) == 0
+        await asyncio.wait_for(server, 5)
+
+    asyncio.run(wait_and_drain())
+
+# --------------------------------------------- TESTS FOR GAME HARNESS -------------------------------------------------
+def test_harnesses_run_side_by_side_with_seeded_boards():
+    with GameHarness(seed=7) as first, GameHarness(seed=7) as second, GameHarness(seed=8) as other:
+        assert len({first.port, second.port, other.port}) == 3
+        boards = []
+        for harness in [first, second, other]:
+            sock, player_id = harness.connect()
+            assert player_id == 1
+            boards.append(harness.send_command(sock, 0xF4))  # Game, as player 1
+            sock.close()
+        assert boards[0] == boards[1]
+        assert boards[0] != boards[2]
+
+        async def play() -> str:
+            player = first.client()
+            await player.connect()
+            await player.send_moves("G")
+            score_1, score_2, board = await anext(player.updates())
+            assert board.encode() == boards[0][4:]
+            return await player.quit()
+
+        assert "final score" in asyncio.run(play())
+
+
+@pytest.mark.parametrize("tick_interval", [0, 0.01])
+def test_fog_of_war_hides_the_board_from_players_but_not_spectators(tick_interval):
+    with GameHarness(seed=2, fog_radius=1, tick_interval=tick_interval) as harness:
+        sock, player_id = harness.connect()
+        for command in [0xF4, 0x24, 0x34]:  # Game, Up and Down, as player 1
+            board = harness.send_command(sock, command)[4:].decode()
+            assert board.count(constants.FOG_DESCRIPTION) >= 100 - 9
+            assert board.count(constants.PLAYER_ONE_NAME) == 1
+        spectator, _ = harness.connect()
+        spectator.sendall(bytes([0x50]))  # Spectate
+        assert constants.FOG_DESCRIPTION not in harness.get_frame(spectator)[4:].decode()
+        spectator.close()
+        sock.close()
+
+
+def test_rooms_publish_their_boards_to_read_replicas():
+    prefix = f"treasure_test_{os.getpid()}"
+    with GameHarness(seed=3, replica_prefix=prefix) as harness:
+        replica = BoardReplica(prefix, constants.DEFAULT_ROOM)
+        sock, player_id = harness.connect()
+        for command in [0xF4, 0x34]:  # Game and Down, as player 1
+            payload = harness.send_command(sock, command)
+            harness.call(asyncio.sleep, 0).result(5)  # The update is published on the next loop iteration
+            assert replica.get_board_payload() == unpack('!HH', payload[:4]) + (payload[4:],)
+        assert replica.get_board().find_player_by_name(constants.PLAYER_ONE_NAME).get_coordinates() == \
+               harness.game.game_board.find_player_by_name(constants.PLAYER_ONE_NAME).get_coordinates()
+        replica.close()
+        sock.close()
+    with pytest.raises(FileNotFoundError):  # Removed once the server stopped
+        BoardReplica(prefix, constants.DEFAULT_ROOM)
+
+
+def test_rejected_moves_publish_nothing():
+    with GameHarness(seed=3) as harness:
+        sock, player_id = harness.connect()
+        for _ in range(2 * constants.BOARD_LENGTH):
+            harness.send_command(sock, 0x24)  # Up, as player 1, until the player cannot move up any more
+        scheduled = []
+        harness.game.room.schedule_update = lambda: scheduled.append(True)
+        for _ in range(3):
+            harness.send_command(sock, 0x24)
+        assert scheduled == []
+        sock.close()
+
+def test_rooms_journal_joins_moves_and_quits(tmp_path):
+    with GameHarness(seed=3, journal_dir=str(tmp_path)) as harness:
+        reader = JournalReader(harness.game.get_journal_path(constants.DEFAULT_ROOM))
+        assert [record[1:3] for record in reader.tail()] == [(Journal.JOIN, constants.PLAYER_ONE_NAME),
+                                                             (Journal.JOIN, constants.PLAYER_TWO_NAME)]
+        sock, player_id = harness.connect()
+        for command in [0x34, 0x64, 0x24]:  # Down, Right and Up, as player 1
+            harness.send_command(sock, command)
+        player = harness.game.game_board.find_player_by_name(constants.PLAYER_ONE_NAME)
+        moves = [record for record in reader.tail() if record[1] == Journal.MOVE]
+        assert moves and moves[-1][3:5] == player.get_coordinates()
+        harness.send_command(sock, 0x04)  # Quit, as player 1
+        sock.close()
+        for _ in range(100):
+            quits = [record for record in reader.tail() if record[1] == Journal.QUIT]
+            if quits:
+                break
+            time.sleep(0.01)
+        assert quits[0][2:] == (constants.PLAYER_ONE_NAME, *player.get_coordinates(), player.get_score())
+        reader.close()
+        path = harness.game.get_journal_path(constants.DEFAULT_ROOM)
+    restarted = Game(ServerConfig(host='127.0.0.1', port=0, journal_dir=str(tmp_path)))
+    assert restarted.get_journal_path(constants.DEFAULT_ROOM) != path  # A restart starts new journals
+
+
+def test_matchmaking_gives_every_match_a_room():
+    with GameHarness(seed=4, matchmaking=True) as harness:
+        def connect_pair() -> list:
+            socks = [create_connection(('127.0.0.1', harness.port), timeout=5) for _ in range(2)]
+            assert [harness.get_frame(sock)[0] for sock in socks] == [1, 2]  # Same address and RTT: matched at once
+            return socks
+
+        first, second = connect_pair()
+        third, fourth = connect_pair()
+        assert sorted(harness.game.rooms) == [constants.DEFAULT_ROOM, 1, 2]
+
+        board = harness.send_command(first, 0xF4)[4:]  # Game, as player 1 of room 1
+        harness.send_command(third, 0x34)  # Down, as player 1 of room 2
+        harness.send_command(fourth, 0x38)  # Down, as player 2 of room 2
+        assert harness.send_command(first, 0xF4)[4:] == board  # Rooms do not share boards
+
+        waiting = create_connection(('127.0.0.1', harness.port), timeout=5)
+        time.sleep(0.05)
+        assert harness.game.matchmaker.get_metrics()["waiting"] == 1
+        waiting.sendall(bytes([0x50]))  # Spectate while waiting: leaves the queue
+        assert harness.get_frame(waiting)
+        assert harness.game.matchmaker.get_metrics()["waiting"] == 0
+
+        for sock, command in [(first, 0x04), (second, 0x08)]:  # Quit, as players 1 and 2 of room 1
+            assert b"final score" in harness.send_command(sock, command)
+        for _ in range(100):
+            if 1 not in harness.game.rooms:
+                break
+            time.sleep(0.01)
+        assert sorted(harness.game.rooms) == [constants.DEFAULT_ROOM, 2]
+        assert harness.game.matchmaker.get_metrics()["matched"] == 2
+        for sock in [first, second, third, fourth, waiting]:
+            sock.close()
+
+
+def test_matches_nobody_sits_in_are_abandoned(monkeypatch):
+    monkeypatch.setattr(constants, 'MATCH_SEAT_TIMEOUT', 0.01)
+
+    async def abandon() -> None:
+        game = Game(ServerConfig(host='127.0.0.1', port=0, matchmaking=True))
+        loop = asyncio.get_running_loop()
+        tickets = [Ticket(key, 1000.0, 0.0, future=loop.create_future()) for key in ["a", "b"]]
+        game.start_match(tickets)
+        room, seat = tickets[0].future.result()
+        room.take_seat(None, seat)  # Seated: the match is kept
+        await asyncio.sleep(0.05)
+        assert room.room_id in game.rooms
+        game.start_match([Ticket(key, 1000.0, 0.0, future=loop.create_future()) for key in ["c", "d"]])
+        await asyncio.sleep(0.05)  # Both players lost before taking their seats
+        assert sorted(game.rooms) == [constants.DEFAULT_ROOM, room.room_id]
+        assert list(game.match_keys) == [room.room_id]
+        assert game.matchmaker.ratings == {}
+
+    asyncio.run(abandon())
+
+
+@pytest.mark.parametrize("tick_interval", [0, 0.05])
+def test_ping_measures_round_trip_times(tick_interval):
+    with GameHarness(seed=5, tick_interval=tick_interval) as harness:
+        async def measure() -> list[float]:
+            player = harness.client()
+            await player.connect()
+            rtts = [await player.ping() for _ in range(3)]
+            await player.send_moves("D")
+            rtts.append(await player.ping())  # Answered after the move, even when the move waits for a tick
+            assert player.updates_queue.qsize() == 1
+            assert player.latency.samples == 4 and player.server_latency[0] > 0
+            with pytest.raises(ValueError, match="Invalid command: P"):
+                await player.send_moves("P")
+            await player.quit()
+            return rtts
+
+        sock, _ = harness.connect()
+        sock.sendall(bytes([0x74]) + pack('!QI', 42, 5000))  # Ping, as player 1, reporting a 5 ms sample
+        timestamp, held, srtt, jitter = unpack('!QIII', harness.get_frame(sock))
+        assert (timestamp, held) == (42, 0)
+        latency = harness.game.room.latency[constants.PLAYER_ONE_NAME]
+        assert latency.last == 0.005 and srtt == int(latency.srtt * 1e6)
+        rooms = harness.call(AdminServer(harness.game).get_latency).result(5)["rooms"]
+        assert rooms[0]["players"][constants.PLAYER_ONE_NAME]["last_ms"] == 5.0
+        assert ("input_delay_ticks" in rooms[0]) == bool(tick_interval)
+        sock.close()
+
+        rtts = asyncio.run(measure())
+        assert all(0 < rtt < 1 for rtt in rtts)
+        assert rtts[-1] < tick_interval or not tick_interval  # The tick the answer waited for is left out
@@ -1,10 +1,8 @@
 from re import compile
 from socket import socket, AF_INET, SOCK_STREAM
 from struct import unpack
-from subprocess import run
-from time import sleep
 
-import constants
+from GameHarness import GameHarness
 import pytest
 
 
@@ -22,8 +20,11 @@ PLAYER1_STR = '1'
 PLAYER2 = '8'
 PLAYER2_STR = '2'
 
+SEED = 226
+
 first_run = True
 connections = {}
+harness = None
 
 
 #
@@ -38,20 +39,21 @@ def setup_cnx() -> None:
 
     client1 = socket(AF_INET, SOCK_STREAM)
     connections[PLAYER1] = client1
-    client1.connect((HOST, constants.PORT))
+    client1.connect((HOST, harness.port))
     assert get_data(client1) == b'\x01'
 
     client2 = socket(AF_INET, SOCK_STREAM)
     connections[PLAYER2] = client2
-    client2.connect((HOST, constants.PORT))
+    client2.connect((HOST, harness.port))
     assert get_data(client2) == b'\x02'
 
 
 def teardown_cnx() -> None:
     global connections
 
-    for c in connections:
+    for c in connections.values():
         c.close()
+    connections.clear()
 
 
 def get_buf(current_socket: socket, expected_size: int) -> bytes:
@@ -87,69 +89,45 @@ def put_data(data: str) -> bytes:
 
 
 #
-#  CONTAINER CODE
+#  SERVER CODE
 #
 
 
-def start_container():
-    print('Attempting to start container.')
-    cmd = run(['sudo', 'docker', 'start', '226-server'], capture_output=True)
-    print(cmd)
-
+def start_server():
+    global harness
 
-def stop_container():
-    print('Attempting to stop container.  This may fail, but that\'s probably ok!')
-    cmd = run(['sudo', 'docker', 'stop', '226-server'], capture_output=True)
-    print(cmd)
+    harness = GameHarness(SEED).start()
+    print('Server listening on port', harness.port)
 
 
-def remove_container():
-    print('Attempting to remove container.  This may fail, but that\'s probably ok!')
-    cmd = run(['sudo', 'docker', 'rm', '226-server'], capture_output=True)
-    print(cmd)
+def stop_server():
+    global harness
 
-
-def wait(s):
-    for i in range(s):
-        print('.', end='')
-        sleep(1)
-    print()
+    teardown_cnx()
+    if harness is not None:
+        harness.stop()
+        harness = None
 
 
 def setup_module(module):
-    stop_container()
-    remove_container()
-
-    print('Attempting to build container.')
-    cmd = run(['sudo', 'docker', 'build', '-t', '226-server', '.'], capture_output=True)
-    print(cmd)
-
-    print('Attempting to run container.')
-    cmd = run(['sudo', 'docker', 'run', '-d', '--log-driver', 'journald', '--name', '226-server', '-p',
-               str(constants.PORT) + ':' + str(constants.PORT), '-v', '/dev/log:/dev/log', '226-server'],
-              capture_output=True)
-    print(cmd)
-
-    wait(5)  # Ugly; should properly detect when the container is up and running
+    start_server()
 
 
 def teardown_module(module):
     print('\n\n')
-    stop_container()
-    remove_container()
+    stop_server()
 
 
 @pytest.fixture(autouse=True)
-def restart_container():
+def restart_server():
     global first_run
 
     print('\n--------------------------------------------------------------------------------')
     if first_run:
         first_run = False
     else:
-        stop_container()
-        start_container()
-        wait(5)  # Ugly; should properly detect when the container is up and running
+        stop_server()
+        start_server()
 
 
 
@@ -0,0 +1,255 @@
+from heapq import nlargest
+from itertools import accumulate
+from math import exp
+from typing import Optional, Sequence
+import random
+from Treasure import Treasure
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+"""
+Bulk treasure generation. A TreasureGenerator places every treasure of a board in one pass: the positions are sampled
+together, weighted by a position distribution, and the values are sampled together from a value distribution. Sampling
+uses NumPy when it is installed and the standard library otherwise; either way a generator built with a seed always
+produces the same board.
+
+Every tile holding treasure gets its own Treasure, so changing one treasure never changes another. The generator writes
+them straight into the tiles and updates the board's occupancy bitsets once for the whole batch.
+"""
+
+
+# ----------------------------------------------- POSITION DISTRIBUTIONS -----------------------------------------------
+class UniformPositions:
+    """Every empty tile is equally likely to hold a treasure."""
+    def get_weights(self, length: int, rng: random.Random) -> Optional[list[float]]:
+        """
+        :param length: The length of the board.
+        :param rng: The generator's random number generator.
+        :return: None, meaning every cell has the same weight.
+        """
+        return None
+
+
+class ClusteredPositions:
+    """
+    Treasure is grouped around a number of randomly placed cluster centres, thinning out with distance from the centre.
+    """
+    def __init__(self, num_clusters: int = 4, spread: float = 3.0):
+        """
+        Initialize a ClusteredPositions distribution.
+        :param num_clusters: The number of cluster centres.
+        :param spread: The distance, in tiles, over which a cluster's weight falls to about 60%.
+        :raises ValueError: If num_clusters is less than 1 or spread is not positive.
+        """
+        if num_clusters < 1:
+            raise ValueError("Number of clusters must be at least 1")
+        if spread <= 0:
+            raise ValueError("Spread must be greater than 0")
+        self.num_clusters = num_clusters
+        self.spread = spread
+
+    def get_weights(self, length: int, rng: random.Random) -> Optional[list[float]]:
+        """
+        :param length: The length of the board.
+        :param rng: The generator's random number generator, used to place the cluster centres.
+        :return: The weight of every cell, row by row.
+        """
+        scale = 2 * self.spread * self.spread
+        falloff = [exp(-distance * distance / scale) for distance in range(length)]
+        weights = [1e-6] * (length * length)
+        for _ in range(self.num_clusters):
+            c_row, c_col = rng.randrange(length), rng.randrange(length)
+            # The falloff is separable: exp(-(dr^2 + dc^2) / scale) = exp(-dr^2 / scale) * exp(-dc^2 / scale)
+            col_falloff = [falloff[abs(col - c_col)] for col in range(length)]
+            for row in range(length):
+                row_falloff = falloff[abs(row - c_row)]
+                start = row * length
+                weights[start:start + length] = [weight + row_falloff * column for weight, column in
+                                                 zip(weights[start:start + length], col_falloff)]
+        return weights
+
+
+class HotSpotPositions:
+    """
+    Tiles within a radius of the hot spots are heat times more likely to hold treasure than other tiles. The hot spots
+    are either given or placed at random on each board.
+    """
+    def __init__(self, hot_spots: Sequence[tuple[int, int]] = None, radius: int = 2, heat: float = 10.0,
+                 num_spots: int = 4):
+        """
+        Initialize a HotSpotPositions distribution.
+        :param hot_spots: The (row, col) coordinates of the hot spots, None to place num_spots at random on each board.
+        :param radius: The distance, in moves, a hot spot reaches.
+        :param heat: How many times more likely a tile near a hot spot is to hold treasure.
+        :param num_spots: The number of hot spots placed at random when none are given.
+        :raises ValueError: If there are no hot spots or no spots to place, the radius is negative or heat is less
+                            than 1.
+        """
+        if (num_spots if hot_spots is None else len(hot_spots)) < 1:
+            raise ValueError("At least one hot spot is required")
+        if radius < 0:
+            raise ValueError("Radius must be at least 0")
+        if heat < 1:
+            raise ValueError("Heat must be at least 1")
+        self.hot_spots = list(hot_spots) if hot_spots is not None else None
+        self.radius = radius
+        self.heat = heat
+        self.num_spots = num_spots
+
+    def get_weights(self, length: int, rng: random.Random) -> Optional[list[float]]:
+        """
+        :param length: The length of the board.
+        :param rng: The generator's random number generator, used to place the hot spots if none were given.
+        :return: The weight of every cell, row by row.
+        """
+        weights = [1.0] * (length * length)
+        hot_spots = self.hot_spots
+        if hot_spots is None:
+            hot_spots = [(rng.randrange(length), rng.randrange(length)) for _ in range(self.num_spots)]
+        for spot_row, spot_col in hot_spots:
+            for row in range(max(0, spot_row - self.radius), min(length, spot_row + self.radius + 1)):
+                reach = self.radius - abs(row - spot_row)
+                for col in range(max(0, spot_col - reach), min(length, spot_col + reach + 1)):
+                    weights[row * length + col] = self.heat
+        return weights
+
+
+# ------------------------------------------------ VALUE DISTRIBUTIONS -------------------------------------------------
+class UniformValues:
+    """Every value between the board's minimum and maximum treasure is equally likely."""
+    def get_weights(self, min_treasure: int, max_treasure: int) -> Optional[list[float]]:
+        """
+        :param min_treasure: The smallest treasure value.
+        :param max_treasure: The largest treasure value.
+        :return: None, meaning every value has the same weight.
+        """
+        return None
+
+
+class WeightedValues:
+    """Low values are common and high values rare: each value is decay times as likely as the value below it."""
+    def __init__(self, decay: float = 0.7):
+        """
+        Initialize a WeightedValues distribution.
+        :param decay: The ratio between the weights of consecutive values.
+        :raises ValueError: If decay is not between 0 (exclusive) and 1 (inclusive).
+        """
+        if decay <= 0 or decay > 1:
+            raise ValueError("Decay must be greater than 0 and at most 1")
+        self.decay = decay
+
+    def get_weights(self, min_treasure: int, max_treasure: int) -> Optional[list[float]]:
+        """
+        :param min_treasure: The smallest treasure value.
+        :param max_treasure: The largest treasure value.
+        :return: The weight of every value from min_treasure to max_treasure.
+        """
+        return [self.decay ** step for step in range(max_treasure - min_treasure + 1)]
+
+
+DISTRIBUTIONS = {
+    "uniform": lambda: (UniformPositions(), UniformValues()),
+    "weighted": lambda: (UniformPositions(), WeightedValues()),
+    "clustered": lambda: (ClusteredPositions(), WeightedValues()),
+    "hotspot": lambda: (HotSpotPositions(), WeightedValues()),
+}
+
+
+# ------------------------------------------------- TREASURE GENERATOR -------------------------------------------------
+class TreasureGenerator:
+    """
+    The TreasureGenerator class places treasure on a board in bulk, according to a position distribution and a value
+    distribution. Positions are sampled without replacement from the empty tiles, so no tile is tried twice.
+    """
+    def __init__(self, positions=None, values=None, seed: int = None, use_numpy: bool = True):
+        """
+        Initialize a TreasureGenerator.
+        :param positions: The position distribution, UniformPositions by default.
+        :param values: The value distribution, UniformValues by default.
+        :param seed: The seed of the random number generators, None for a different board every time.
+        :param use_numpy: Whether to sample with NumPy when it is installed.
+        """
+        self.positions = positions if positions is not None else UniformPositions()
+        self.values = values if values is not None else UniformValues()
+        self.random = random.Random(seed)
+        self.numpy_rng = numpy.random.default_rng(seed) if numpy is not None and use_numpy else None
+
+    @classmethod
+    def from_name(cls, name: str, seed: int = None) -> 'TreasureGenerator':
+        """
+        Builds a TreasureGenerator for one of the named distributions.
+        :param name: The name of the distribution: uniform, weighted, clustered or hotspot.
+        :param seed: The seed of the random number generators.
+        :return: The TreasureGenerator.
+        :raises ValueError: If the name is not a known distribution.
+        """
+        if name not in DISTRIBUTIONS:
+            raise ValueError(f"Treasure distribution must be one of {', '.join(DISTRIBUTIONS)}")
+        return cls(*DISTRIBUTIONS[name](), seed=seed)
+
+    def sample_cells(self, cells: list[int], weights: Optional[list[float]], count: int) -> list[int]:
+        """
+        Samples distinct cells.
+        :param cells: The indexes of the cells to choose from.
+        :param weights: The weight of every cell of the board, or None for equal weights.
+        :param count: The number of cells to choose.
+        :return: count distinct cells.
+        """
+        if self.numpy_rng is not None:
+            p = None
+            if weights is not None:
+                p = numpy.asarray(weights)[cells]
+                p = p / p.sum()
+            return self.numpy_rng.choice(numpy.asarray(cells), size=count, replace=False, p=p).tolist()
+        if weights is None:
+            return self.random.sample(cells, count)
+        # Weighted sampling without replacement: keep the count largest keys u ** (1 / weight)
+        rand = self.random.random
+        return nlargest(count, cells, key=lambda cell: rand() ** (1.0 / weights[cell]))
+
+    def sample_values(self, min_treasure: int, max_treasure: int, count: int) -> list[int]:
+        """
+        Samples treasure values.
+        :param min_treasure: The smallest treasure value.
+        :param max_treasure: The largest treasure value.
+        :param count: The number of values to sample.
+        :return: count values between min_treasure and max_treasure (inclusive).
+        """
+        weights = self.values.get_weights(min_treasure, max_treasure)
+        if self.numpy_rng is not None:
+            if weights is None:
+                return self.numpy_rng.integers(min_treasure, max_treasure + 1, size=count).tolist()
+            p = numpy.asarray(weights) / sum(weights)
+            return (self.numpy_rng.choice(len(weights), size=count, p=p) + min_treasure).tolist()
+        population = range(min_treasure, max_treasure + 1)
+        if weights is None:
+            return self.random.choices(population, k=count)
+        return self.random.choices(population, cum_weights=list(accumulate(weights)), k=count)
+
+    def populate(self, board, count: int) -> int:
+        """
+        Places treasure on empty tiles of a board, writing a Treasure of each sampled value straight onto the tiles.
+        The empty tiles are read from the board's occupancy bitsets, which are then updated in one operation.
+        :param board: The Board to place the treasure on.
+        :param count: The number of treasures to place. Fewer are placed if there are not enough empty tiles.
+        :return: The number of treasures placed.
+        """
+        if count <= 0:
+            return 0
+        length = board.length
+        cells = board.occupancy.get_cells(board.occupancy.get_empty())
+        count = min(count, len(cells))
+        if count == 0:
+            return 0
+        chosen = self.sample_cells(cells, self.positions.get_weights(length, self.random), count)
+        values = self.sample_values(board.min_treasure, board.max_treasure, count)
+        game_board = board.game_board
+        placed = 0
+        for cell, value in zip(chosen, values):
+            game_board[cell // length][cell % length].treasure = Treasure(value)
+            placed |= 1 << cell
+        board.occupancy.treasure |= placed
+        return count
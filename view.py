@@ -1,4 +1,8 @@
 from Board import Board
+from Terrain import Terrain
+
+TEMPLATES = {}  # Templates of boards without terrain, by length
+DESCRIPTIONS = bytes(ord(Terrain.DESCRIPTIONS.get(kind, ' ')) for kind in range(256))  # Terrain kind ----> Description
 
 
 def display(board: Board) -> str:
@@ -7,10 +11,74 @@ def display(board: Board) -> str:
     :param board: The Board object
     :return: The String representation of the game-board.
     """
-    output_str = ""
-    for row in board.game_board:
-        for square in row:
-            output_str += str(square) + " "
-        output_str += '\n'
+    output_str = render(board).decode()
     print(output_str)
     return output_str
+
+
+def get_template(board: Board) -> bytes:
+    """
+    Renders a board of the same length and terrain as the given board, without any treasure or players, or retrieves
+    the rendering if another board already needed it. The description of every cell is looked up with one translate of
+    the terrain's cell kinds, and the separators are inserted by slicing: the cells of a row are every other byte of
+    the row, with a space after each, and every row ends with a newline. Terrain never changes, so boards share it:
+    boards without terrain through a cache by length, boards on a Terrain through the terrain itself, so the template
+    is freed with the terrain.
+    :param board: A Board.
+    :return: The rendered empty board, as display would show it.
+    """
+    length = board.length
+    terrain = board.terrain
+    template = TEMPLATES.get(length) if terrain is None else terrain.template
+    if template is None:
+        cells = terrain.cells if terrain is not None else bytes(length * length)
+        width = 2 * length + 1
+        descriptions = cells.translate(DESCRIPTIONS)
+        grid = bytearray(b' ' * (width * length))
+        for row in range(length):
+            grid[row * width:row * width + 2 * length:2] = descriptions[row * length:(row + 1) * length]
+        grid[width - 1::width] = b'\n' * length
+        template = bytes(grid)
+        if terrain is None:
+            TEMPLATES[length] = template
+        else:
+            terrain.template = template
+    return template
+
+
+def render(board: Board) -> bytes:
+    """
+    Renders a board in the format display shows it, without walking its Tiles: the board's template is copied and the
+    description of every treasure and the name of every player are written over their cells. The cells holding
+    treasure or a player are read from the board's occupancy bitsets, so the cost is one copy of the board plus one
+    write per treasure and player. A board where any of them is not a single byte is rendered tile by tile instead.
+    :param board: The Board object
+    :return: The encoded String representation of the game-board.
+    """
+    length = board.length
+    width = 2 * length + 1
+    grid = bytearray(get_template(board))
+    tiles = board.game_board
+    occupancy = board.occupancy
+    treasure = occupancy.treasure & ~occupancy.players  # A player hides the treasure under it
+    players = occupancy.players
+    for bits, is_player in ((treasure, False), (players, True)):
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            row, col = divmod(low.bit_length() - 1, length)
+            tile = tiles[row][col]
+            text = tile.player.get_name() if is_player else tile.treasure.get_description()
+            if len(text) != 1 or not text.isascii():
+                return render_tiles(board)
+            grid[row * width + 2 * col] = ord(text)
+    return bytes(grid)
+
+
+def render_tiles(board: Board) -> bytes:
+    """
+    Renders a board tile by tile, for the boards render cannot write a byte per cell for.
+    :param board: The Board object
+    :return: The encoded String representation of the game-board.
+    """
+    return ''.join(''.join(str(square) + " " for square in row) + '\n' for row in board.game_board).encode()